@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+import types
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# 标量实现（逐日、逐bar递推）的提交，差分测试的参照
+BASELINE = 'c3683ea'
+
+
+def pytest_addoption(parser):
+    parser.addoption('--runslow', action='store_true', default=False, help='run slow tests (full differential sweeps)')
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'slow: full sweep, skipped unless --runslow')
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--runslow'):
+        return
+    skip = pytest.mark.skip(reason='need --runslow')
+    for item in items:
+        if 'slow' in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope='session')
+def baseline():
+    """由git历史取出c3683ea的tradetime.py，作为差分测试的参照；没有git历史时跳过"""
+    path = f'{BASELINE}:tradetime/tradetime.py'
+    try:
+        source = subprocess.run(['git', 'show', path], cwd=ROOT, capture_output=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        pytest.skip(f'{path} is not available')
+    module = types.ModuleType('tradetime_baseline')
+    exec(compile(source, path, 'exec'), module.__dict__)
+    return module
+
+
+@pytest.fixture
+def night_session():
+    """默认交易时段增加21:00-02:30夜盘，结束后恢复"""
+    import tradetime
+    from tradetime.tradetime import Session, _Time
+
+    saved = {name: getattr(Session, name) for name in ['night_open_time', 'night_close_time', 'include']}
+    Session.night_open_time, Session.night_close_time = _Time(21), _Time(2, 30)
+    tradetime.set_time()
+    yield
+    for name, value in saved.items():
+        setattr(Session, name, value)
+    tradetime.set_time(include=saved['include'])
@@ -0,0 +1,33 @@
+import pandas as pd
+
+import tradetime
+
+
+def test_asof_align_daily():
+    # 周五收盘后、周六公告的事件下周一可用
+    events = pd.DataFrame({'value': [1, 2, 3]},
+                          index=pd.to_datetime(['2022-06-09 16:00:00', '2022-06-10 20:00:00', '2022-06-11 10:00:00']))
+    aligned = tradetime.asof_align(events, freq='D')
+    assert aligned['available'].astype(str).tolist() == ['2022-06-10', '2022-06-13', '2022-06-14']
+    aligned = tradetime.asof_align(events, freq='D', lag_bars=0)
+    assert aligned['available'].astype(str).tolist() == ['2022-06-09', '2022-06-10', '2022-06-13']
+
+
+def test_asof_align_intraday():
+    events = pd.DataFrame({'time': pd.to_datetime(['2022-06-10 10:00:30', '2022-06-10 11:45:00', 'NaT'])})
+    aligned = tradetime.asof_align(events, on='time', freq='5min')
+    # 午间休市归属于13:05的bar，之后第一根bar为13:10
+    assert aligned['available'].astype(str).tolist() == ['2022-06-10 10:10:00', '2022-06-10 13:10:00', 'NaT']
+    assert aligned['available_bar'].tolist()[2] == -1
+    labels = tradetime.bar_labels(['2022-06-10 10:00:30'], '5min')
+    assert aligned['available_bar'][0] == labels['bar_index'][0] + 1
+
+
+def test_asof_align_bars():
+    events = pd.DataFrame({'code': ['A', 'B', 'A'], 'value': [1, 2, 3],
+                           'time': pd.to_datetime(['2022-06-08 20:00:00', '2022-06-09 10:00:00', '2022-06-10 20:00:00'])})
+    days = pd.to_datetime(['2022-06-09', '2022-06-10', '2022-06-13'])
+    bars = pd.DataFrame({'code': ['A', 'B'] * 3}, index=days.repeat(2))
+    merged = tradetime.asof_align(events, on='time', freq='D', bars=bars, by='code')
+    assert merged['value'].tolist()[::2] == [1, 1, 3]
+    assert merged['value'].isna().tolist()[1::2] == [True, False, False]
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+import tradetime
+
+
+def test_calendar_attributes():
+    table = tradetime.calendar_attributes()
+    days = pd.Series(pd.to_datetime(table['date']))
+    assert days.tolist() == pd.to_datetime(tradetime.date.D.close_ordinal.astype('datetime64[D]')).tolist()
+    assert table['week'].tolist() == days.dt.isocalendar()['week'].tolist()
+    # 按pandas分组逐个周期计数
+    for name, period in [('week', days.dt.to_period('W-SUN')), ('month', days.dt.to_period('M')),
+                         ('quarter', days.dt.to_period('Q')), ('year', days.dt.to_period('Y'))]:
+        grouped = days.groupby(period.values)
+        assert np.array_equal(table[f'trading_day_of_{name}'], grouped.cumcount() + 1), name
+        assert np.array_equal(table[f'trading_days_left_in_{name}'], grouped.cumcount(ascending=False)), name
+
+
+def test_calendar_attributes_dates():
+    result = tradetime.calendar_attributes(np.array(['2022-06-11', '2022-06-13'], dtype='datetime64[D]'))
+    assert result['week'].tolist() == [23, 24]
+    assert result['trading_day_of_week'].tolist() == [-1, 1]
+    assert result['trading_day_of_month'].tolist() == [-1, 8]
+    assert result['trading_days_left_in_year'].tolist() == [-1, 138]
+
+
+def test_date_attributes():
+    d = tradetime.date(2022, 6, 13)
+    assert d.trading_day_of('M') == 8 and d.trading_day_of('W') == 1
+    assert d.trading_days_left('M') == 13
+    assert tradetime.date(2022, 6, 11, ignore=True).trading_day_of('W') is None
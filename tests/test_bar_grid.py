@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+import tradetime
+
+
+def _expected(start, end, freq, is_open=False):
+    """逐个交易日拼接日期与time.bars"""
+    days = tradetime.date.bars(start, end, 'D')
+    bars = [str(x) for x in tradetime.time.bars('09:30:00', '15:00:00', freq, is_open=is_open)]
+    return pd.DatetimeIndex([f'{day} {bar}' for day in days for bar in bars])
+
+
+def test_bar_grid():
+    grid = tradetime.bar_grid('2022-06-01', '2022-06-30', '5min')
+    assert len(grid) == 21 * 48
+    assert np.array_equal(grid.values, _expected('2022-06-01', '2022-06-30', '5min').values)
+    opens = tradetime.bar_grid('2022-06-01', '2022-06-02', '30min', is_open=True)
+    assert np.array_equal(opens.values, _expected('2022-06-01', '2022-06-02', '30min', is_open=True).values)
+
+
+def test_bar_grid_date_freq():
+    grid = tradetime.bar_grid('2022-01-01', '2022-12-31', '1H', date_freq='M')
+    assert len(grid) == 12 * 4
+    assert grid[:4].astype(str).tolist() == ['2022-01-28 10:30:00', '2022-01-28 11:30:00',
+                                             '2022-01-28 14:00:00', '2022-01-28 15:00:00']
+
+
+def test_bar_grid_night_session(night_session):
+    # 夜盘bar发生在上一交易日的晚上，周一的夜盘在上周五
+    grid = tradetime.bar_grid('2022-06-13', '2022-06-13', '30min')
+    assert grid[0] == pd.Timestamp('2022-06-10 21:30:00')
+    assert grid[grid < pd.Timestamp('2022-06-13')][-1] == pd.Timestamp('2022-06-11 02:30:00')
+    assert grid[-1] == pd.Timestamp('2022-06-13 15:00:00')
+    assert grid.is_monotonic_increasing
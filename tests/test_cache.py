@@ -0,0 +1,60 @@
+import datetime
+
+import tradetime
+
+
+class _Clock:
+    """回放时钟"""
+
+    def __init__(self, now: str):
+        self.now = datetime.datetime.fromisoformat(now)
+
+    def __call__(self) -> datetime.datetime:
+        return self.now
+
+    def set(self, now: str):
+        self.now = datetime.datetime.fromisoformat(now)
+
+
+def test_cache_per_bar():
+    clock, calls = _Clock('2022-01-04 10:00:01'), []
+
+    @tradetime.cache_per_bar('5min', clock=clock)
+    def signal(code, scale=1):
+        calls.append((clock.now, code))
+        return len(calls) * scale
+
+    assert signal('A') == 1 and signal('A') == 1
+    assert signal('B') == 2 and signal('A', scale=2) == 6
+    clock.set('2022-01-04 10:05:00')  # 同一个bar的收盘
+    assert signal('A') == 1
+    clock.set('2022-01-04 10:05:01')  # 下一个bar，之前的结果失效
+    assert signal('A') == 4
+    assert signal.cache_info() == {'hits': 2, 'misses': 4, 'maxsize': 128, 'currsize': 1}
+
+    # 午间休市属于13:05的bar
+    clock.set('2022-01-04 12:00:00')
+    value = signal('A')
+    clock.set('2022-01-04 13:04:00')
+    assert signal('A') == value
+
+    signal.cache_clear()
+    assert signal('A') == value + 1
+    assert signal.cache_info()['hits'] == 0
+
+
+def test_cache_per_bar_daily():
+    clock, calls = _Clock('2022-01-07 09:00:00'), []
+
+    @tradetime.cache_per_bar('D', maxsize=1, clock=clock)
+    def signal(code):
+        calls.append(code)
+        return len(calls)
+
+    assert signal('A') == 1
+    clock.set('2022-01-08 12:00:00')  # 周六属于下一个交易日
+    assert signal('A') == 2
+    clock.set('2022-01-10 23:59:59')
+    assert signal('A') == 2
+    # 超出maxsize淘汰最久未使用的结果
+    assert signal('B') == 3 and signal('A') == 4
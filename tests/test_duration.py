@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+import tradetime
+
+
+def test_trading_duration():
+    # 剔除午间休市、隔夜和周末
+    assert tradetime.trading_duration('2022-06-10 14:00', '2022-06-13 10:00', 'min') == 90
+    assert tradetime.trading_duration('2022-06-13 10:00', '2022-06-10 14:00', 'min') == -90
+    assert tradetime.trading_duration('2022-06-13 11:00', '2022-06-13 13:30', 'min') == 60
+    assert tradetime.trading_duration('2022-06-13 09:00', '2022-06-13 15:30', 'H') == 4
+    assert tradetime.trading_duration('2022-06-11 10:00', '2022-06-12 10:00') == 0
+    # 端午节
+    assert tradetime.trading_duration('2022-06-02 15:00', '2022-06-06 09:30') == 0
+
+
+def test_trading_duration_arrays():
+    start = pd.to_datetime(['2022-06-13 10:00', 'NaT', '2022-06-13 11:29:59'])
+    result = tradetime.trading_duration(start, pd.Timestamp('2022-06-14 10:00'))
+    assert np.isnan(result[1])
+    assert result[[0, 2]].tolist() == [4 * 3600, 1 + 2 * 3600 + 1800]
+
+
+def test_trading_duration_bars():
+    start, end = '2022-06-10 14:00', '2022-06-13 10:00'
+    closes = tradetime.bar_grid('2022-06-10', '2022-06-13', '5min')
+    expected = ((closes > pd.Timestamp(start)) & (closes <= pd.Timestamp(end))).sum()
+    assert tradetime.trading_duration(start, end, 'bars', '5min') == expected == 18
+
+
+def test_trading_duration_night_session(night_session):
+    # 周五21:00-02:30的夜盘属于下周一
+    assert tradetime.trading_duration('2022-06-10 15:00', '2022-06-13 09:00', 'H') == 5.5
+    assert tradetime.trading_duration('2022-06-10 23:00', '2022-06-11 01:00', 'min') == 120
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+import tradetime
+
+
+@pytest.fixture
+def extended():
+    tradetime.extend_calendar('2024-12-31')
+    yield
+    tradetime.extend_calendar('2000-01-01')
+
+
+def test_extend_calendar(extended):
+    last = tradetime.date(2023, 12, 29)
+    assert not last.projected
+    # 推算的交易日剔除周末和固定日期的节假日
+    assert str(last + 1) == '2024-01-02' and (last + 1).projected
+    days = [str(x) for x in tradetime.date.bars('2024-04-26', '2024-05-06', 'D')]
+    assert days == ['2024-04-26', '2024-04-29', '2024-04-30', '2024-05-02', '2024-05-03', '2024-05-06']
+    assert str(tradetime.date(2024, 10, 2, ignore=True).close('D', 'future')) == '2024-10-08'
+    assert str(tradetime.date(2024, 11, 5).close('M')) == '2024-11-29'
+    with pytest.raises(IndexError):
+        tradetime.date(2024, 12, 31) + 1
+
+    projected = tradetime.is_projected(np.array(['2023-12-29', '2024-01-02'], dtype='datetime64[D]'))
+    assert projected.tolist() == [False, True]
+
+
+def test_extend_calendar_cancel(extended):
+    confirmed_end = tradetime.date.confirmed_end
+    assert confirmed_end == tradetime.date(2023, 12, 29).ordinal
+    tradetime.extend_calendar('2000-01-01')
+    assert tradetime.date.confirmed_end is None
+    assert tradetime.date.D.close_ordinal[-1] == confirmed_end
+    assert not tradetime.is_projected(np.array(['2024-01-02'], dtype='datetime64[D]'))[0]
+
+
+@pytest.mark.parametrize('name', ['tables.npz', 'tables'])
+def test_extend_calendar_round_trip(tmp_path, extended, name):
+    path = tmp_path / name
+    tradetime.export_tables(path)
+    tradetime.extend_calendar('2000-01-01')
+    tradetime.import_tables(path)
+    assert tradetime.date.confirmed_end == tradetime.date(2023, 12, 29).ordinal
+    assert (tradetime.date(2023, 12, 29) + 1).projected
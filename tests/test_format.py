@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+import tradetime
+
+
+def test_dates_round_trip():
+    bars = tradetime.date.bars('2022-01-01', '2022-12-31', 'D')
+    strings = tradetime.to_strings(bars)
+    assert strings[:2].tolist() == ['2022-01-04', '2022-01-05']
+    assert np.array_equal(tradetime.parse_dates(strings), tradetime.parse_dates(tradetime.to_ints(bars)))
+    assert tradetime.to_strings(tradetime.parse_dates(strings)).tolist() == strings.tolist()
+
+
+def test_quarter_labels():
+    bars = tradetime.date.bars('2022-01-01', '2022-12-31', 'Q')
+    labels = tradetime.to_strings(bars, '%YQ%q')
+    assert labels.tolist() == ['2022Q1', '2022Q2', '2022Q3', '2022Q4']
+    assert tradetime.to_strings(tradetime.parse_dates(labels)).tolist() == tradetime.to_strings(bars).tolist()
+
+
+def test_times_round_trip():
+    closes = tradetime.time.session['5min']
+    strings = tradetime.to_strings(closes)
+    assert strings[0] == '09:35:00'
+    assert tradetime.to_ints(closes)[0] == 93500
+    assert np.array_equal(tradetime.parse_times(strings).view('int64'), tradetime.parse_times(tradetime.to_ints(closes)).view('int64'))
+
+
+def test_parse_times_mixed_layouts():
+    seconds = tradetime.parse_times(['09:30:00', '093000', '9:31:00', '']).view('int64')
+    assert seconds[:3].tolist() == [34200, 34200, 34260]
+    assert np.isnat(tradetime.parse_times(['09:30:00', ''])[1])
+
+
+@pytest.mark.parametrize('values', [['09:30:00', '93000'], ['09:30:00', '0930xx'], ['09:30:00', '24:00:00'],
+                                    ['093000', '9:75:00']])
+def test_parse_times_invalid(values):
+    with pytest.raises(ValueError):
+        tradetime.parse_times(values)
@@ -0,0 +1,44 @@
+import datetime
+import pickle
+
+import tradetime
+from tradetime.tradetime import _convert2date, _convert2time
+
+
+def test_date_interning():
+    canonical = tradetime.date.calendar['D'][0]
+    assert tradetime.date(pydate='2005-01-04').close() is canonical
+    assert _convert2date('2005-01-04') is canonical and _convert2date(20050104) is canonical
+
+    day = tradetime.date(2022, 6, 10, ignore=True).close()
+    assert tradetime.date(2022, 6, 9) + 1 is day
+    assert tradetime.date(2022, 6, 13) - 1 is day
+    assert tradetime.date(2022, 6, 9) + datetime.timedelta(days=1) is day
+    assert pickle.loads(pickle.dumps(day)) is day
+    assert tradetime.date(2022, 6, 9).close('M') is tradetime.date(2022, 6, 30).close('M')
+    # 不在交易日历上的日期不是规范实例，但仍然相等
+    saturday = tradetime.date(2022, 6, 11, ignore=True)
+    assert saturday == _convert2date('2022-06-11') and saturday is not _convert2date('2022-06-11')
+
+
+def test_time_interning():
+    canonical = tradetime.time.session_close['1min'].loc[30]
+    assert str(canonical) == '10:00:00'
+    assert tradetime.time(9, 59, 30, ignore=True).close('1min') is canonical
+    assert _convert2time('10:00:00') is canonical
+    assert tradetime.time(9, 59) + 1 is canonical
+    assert pickle.loads(pickle.dumps(canonical)) is canonical
+    assert canonical.index('1min') == 30
+
+
+def test_interning_after_reinstall():
+    # 重新安装交易日历：不变的bar沿用原规范实例，新增的bar（如推算的交易日）生成新的规范实例
+    old = tradetime.date(2022, 6, 10, ignore=True).close()
+    tradetime.extend_calendar('2024-12-31')
+    try:
+        assert tradetime.date(2022, 6, 10, ignore=True).close() is old
+        assert tradetime.date.calendar['D'][old.index('D')] is old
+        projected = tradetime.date(2024, 1, 2, ignore=True).close()
+        assert projected is _convert2date('2024-01-02') is tradetime.date(2023, 12, 29) + 1
+    finally:
+        tradetime.extend_calendar('2000-01-01')
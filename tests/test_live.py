@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import tradetime
+from tradetime import BarAggregator
+
+
+def _ticks(seed=0, n=600):
+    rng = np.random.default_rng(seed)
+    seconds = np.sort(rng.integers(0, 2 * 3600, n))
+    return pd.DataFrame({
+        'symbol': rng.choice(['A', 'B', 'C'], n),
+        'price': rng.normal(10, 1, n).round(2),
+        'volume': rng.integers(1, 100, n).astype('float64'),
+        'time': pd.Timestamp('2022-01-04 10:30:00') + pd.to_timedelta(seconds, unit='s'),
+    })
+
+
+def _expected(ticks, freq):
+    """按bar_labels离线合成"""
+    ticks = ticks.assign(**tradetime.bar_labels(ticks['time'], freq).set_index(ticks.index))
+    ticks = ticks[ticks['bar_index'] >= 0]
+    grouped = ticks.groupby(['bar_index', 'symbol'], sort=True)
+    return grouped.agg(bar_close=('bar_close', 'first'), open=('price', 'first'), high=('price', 'max'),
+                       low=('price', 'min'), close=('price', 'last'), volume=('volume', 'sum')).reset_index()
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_bar_aggregator(seed):
+    ticks = _ticks(seed)
+    symbols = ['A', 'B', 'C']
+    aggregator = BarAggregator(symbols, ['1min', '5min', '30min'])
+    ids = ticks['symbol'].map({symbol: i for i, symbol in enumerate(symbols)}).to_numpy()
+
+    frames = {freq: [] for freq in aggregator.freqs}
+    for start in range(0, len(ticks), 50):
+        batch = slice(start, start + 50)
+        aggregator.update(ids[batch], ticks['price'].values[batch], ticks['volume'].values[batch],
+                          ticks['time'].values[batch])
+        # tick按时间推送，批次最后一个tick的前一秒之前收盘的bar已完整
+        now = ticks['time'].iloc[batch].iloc[-1] - pd.Timedelta(seconds=1)
+        for freq, frame in aggregator.flush(now).items():
+            frames[freq].append(frame)
+    for freq, frame in aggregator.flush().items():
+        frames[freq].append(frame)
+
+    for freq in aggregator.freqs:
+        result = pd.concat(frames[freq]).sort_values(['bar_index', 'symbol']).reset_index(drop=True)
+        expected = _expected(ticks, freq)
+        assert result['bar_index'].tolist() == expected['bar_index'].tolist(), freq
+        pd.testing.assert_frame_equal(result[expected.columns], expected, check_dtype=False)
+
+
+def test_bar_aggregator_boundaries():
+    aggregator = BarAggregator(1, ['5min'])
+    # 午间休市的tick归属于13:05的bar，收盘之后的tick丢弃
+    timestamps = pd.to_datetime(['2022-01-04 11:29:00', '2022-01-04 12:00:00', '2022-01-04 15:00:30'])
+    aggregator.update([0, 0, 0], [1., 2., 3.], [1., 1., 1.], timestamps)
+    assert aggregator.next_close('2022-01-04 11:29:00')['5min'] == np.datetime64('2022-01-04T11:30:00')
+
+    bars = aggregator.flush('2022-01-04 11:30:00')['5min']
+    assert bars['bar_close'].astype(str).tolist() == ['2022-01-04 11:30:00']
+    # 已输出的bar不再接收tick
+    aggregator.update([0], [9.], [1.], pd.to_datetime(['2022-01-04 11:29:30']))
+    bars = aggregator.flush()['5min']
+    assert bars['bar_close'].astype(str).tolist() == ['2022-01-04 13:05:00']
+    assert bars[['open', 'close', 'volume']].values.tolist() == [[2., 2., 1.]]
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import tradetime
+from tradetime.__main__ import _split
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize('data, expected', [
+    (b'20220104\n20220105\n', [b'20220104', b'20220105']),
+    (b'20220104\r\n20220105\r\n', [b'20220104', b'20220105']),
+    # 行长度相同但有空行、\r\n与\n混用，不能按定长矩阵切分
+    (b'10:00\n9:31\n\n', [b'10:00', b'9:31', b'']),
+    (b'10:00\r\n0931\r\r\n', [b'10:00', b'0931', b'']),
+    (b'1234\r\n12345\n', [b'1234', b'12345']),
+])
+def test_split(data, expected):
+    values, _ = _split(data, b',', None)
+    assert values.tolist() == expected
+
+
+@pytest.mark.parametrize('freq', ['D', 'W', 'M'])
+@pytest.mark.parametrize('flags', [[], ['--overflow'], ['--is-open'], ['--is-open', '--overflow']])
+def test_bars_counts(freq, flags):
+    days = np.arange(np.datetime64('2021-12-20'), np.datetime64('2022-02-20'))
+    pairs = [(start, start + span) for start in days for span in [0, 1, 2, 5, 9, 31]]
+    data = ''.join(f'{start},{end}\n' for start, end in pairs)
+    result = subprocess.run([sys.executable, '-m', 'tradetime', 'bars', '--freq', freq] + flags, input=data,
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    expected = [len(tradetime.date.bars(str(start), str(end), freq, is_open='--is-open' in flags,
+                                        overflow='--overflow' in flags)) for start, end in pairs]
+    assert [int(x) for x in result.stdout.split()] == expected
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+import tradetime
+
+
+def _dates(*values):
+    return np.array(values, dtype='datetime64[D]')
+
+
+def test_offset():
+    # 2022-06-10为周五，2022-06-11为周六
+    assert tradetime.offset(_dates('2022-06-10', '2022-06-10'), [1, -1]).astype(str).tolist() == ['2022-06-13', '2022-06-09']
+    assert tradetime.offset(_dates('2022-06-11', '2022-06-11'), [0, 1], if_break='future').astype(str).tolist() == \
+        ['2022-06-13', '2022-06-14']
+    assert tradetime.offset(_dates('2022-06-11'), 0, if_break='past').astype(str).tolist() == ['2022-06-10']
+    assert tradetime.offset(_dates('2022-06-10'), 1, 'M').astype(str).tolist() == ['2022-07-29']
+    timestamps = np.array(['2022-06-10T10:00'], dtype='datetime64[ns]')
+    assert tradetime.offset(timestamps, 1).astype(str).tolist() == ['2022-06-13']
+
+
+def test_offset_matches_date_arithmetic():
+    days = tradetime.date.bars('2022-01-01', '2022-03-31', 'D')
+    ordinal = np.array([str(day) for day in days], dtype='datetime64[D]')
+    expected = [str(day + 3) for day in days]
+    assert tradetime.offset(ordinal, 3).astype(str).tolist() == expected
+
+
+def test_offset_errors():
+    with pytest.raises(ValueError):
+        tradetime.offset(_dates('2022-06-11'), 1)
+    with pytest.raises(IndexError):
+        tradetime.offset(_dates('2023-12-29'), 1)
+    result = tradetime.offset(_dates('2023-12-29', '2022-06-11', '2022-06-10'), [1, 1, 2], errors='coerce')
+    assert result.astype(str).tolist() == ['NaT', 'NaT', '2022-06-14']
+
+
+def test_date_arithmetic_does_not_wrap():
+    # 超出交易日历报错，不循环到交易日历另一端
+    last, first = tradetime.date.D.close_ordinal[[-1, 0]].astype('datetime64[D]').astype(str)
+    with pytest.raises(IndexError):
+        tradetime.date(*map(int, last.split('-'))) + 1
+    with pytest.raises(IndexError):
+        tradetime.date(*map(int, first.split('-'))) - 1
+    assert str(tradetime.date(2022, 6, 10) + 1) == '2022-06-13'
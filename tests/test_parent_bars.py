@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+import tradetime
+
+
+@pytest.mark.parametrize('freq, parent_freq', [('1min', '5min'), ('1min', '30min'), ('5min', '1H'), ('15min', '15min')])
+def test_parent_map(freq, parent_freq):
+    session, parent = tradetime.time.sessions[freq], tradetime.time.sessions[parent_freq]
+    table = session.parent_map(parent)
+    # 与time.close(parent_freq)一致
+    expected = [parent.close.tolist().index(x.close(parent_freq)) for x in session.close]
+    assert table['parent'].tolist() == expected
+    assert table['position'][table['first']].tolist() == [0] * len(parent.close_ordinal)
+    assert np.bincount(table['parent']).tolist() == (np.flatnonzero(table['last']) - np.flatnonzero(table['first']) + 1).tolist()
+
+
+def test_parent_bars():
+    timestamps = tradetime.bar_grid('2022-06-09', '2022-06-10', '1min')
+    bar_index = tradetime.bar_labels(timestamps, '1min')['bar_index']
+    parents = tradetime.parent_bars(np.append(bar_index, -1), '1min', '30min')
+    expected = tradetime.bar_labels(timestamps, '30min')['bar_index']
+    assert parents['parent_index'].tolist()[:-1] == expected.tolist()
+    assert parents.iloc[-1].tolist() == [-1, -1, False, False]
+    # 每根30min bar的第一、最后一根1min bar
+    assert parents['is_first'].sum() == parents['is_last'].sum() == 2 * 8
+    assert parents['position'][parents['is_last']].max() == 30
@@ -0,0 +1,23 @@
+import tradetime
+
+
+def test_rolling_windows():
+    starts, stops = tradetime.rolling_windows(20220104, 20220110, 2)
+    assert starts.tolist() == [0, 0, 1, 2, 3]
+    assert stops.tolist() == [1, 2, 3, 4, 5]
+
+
+def test_rolling_windows_origin_after_start():
+    # 2022-01-07之前结束的窗口为空
+    starts, stops = tradetime.rolling_windows(20220104, 20220110, 2, origin=20220107)
+    assert starts.tolist() == [0, 0, 0, 0, 0]
+    assert stops.tolist() == [0, 0, 0, 1, 2]
+
+
+def test_rolling_windows_intraday_int_endpoints():
+    # YYYYMMDD整数与同一天的字符串一致，为当天00:00:00，不能按纳秒解析
+    starts, stops = tradetime.rolling_windows(20220104, 20220110, 3, '5min')
+    expected = tradetime.rolling_windows('2022-01-04', '2022-01-10', 3, '5min')
+    assert len(stops) == 4 * 48
+    assert starts.tolist() == expected[0].tolist() and stops.tolist() == expected[1].tolist()
+    assert starts[:4].tolist() == [0, 0, 0, 1]
@@ -0,0 +1,21 @@
+import pytest
+
+import tradetime
+
+
+def test_rule_is_abstract():
+    with pytest.raises(TypeError):
+        tradetime.Rule()
+
+
+def test_union():
+    rule = tradetime.NthWeekday(3, 4) | tradetime.NthTradingDay(1)
+    assert rule == tradetime.Union(tradetime.NthWeekday(3, 4), tradetime.NthTradingDay(1))
+    assert tradetime.events('2022-01-01', '2022-02-28', rule).map(str).tolist() == \
+        ['2022-01-04', '2022-01-21', '2022-02-07', '2022-02-18']
+
+
+def test_get_close_before_calendar():
+    assert str(tradetime.date.get_close(2022, m=1)) == '2022-01-28'
+    with pytest.raises(IndexError, match='before the start of calendar'):
+        tradetime.date.get_close(1990, m=1)
@@ -0,0 +1,207 @@
+"""
+差分测试：查表、二分查找实现与c3683ea的标量实现（逐日、逐bar递推）结果一致
+
+默认只在交易日历首尾和长假前后抽样；完整扫描（交易日历内每一天、一天中每一秒）标记为slow，用--runslow运行。
+标量实现在交易日历之外不会终止，只在交易日历内比较。
+异常按类型比较：缺少if_break为ValueError，超出交易日历为IndexError（标量实现为KeyError或IndexError）。
+标量实现在交易日历首尾按下标绕回另一端（如2005-01的上一个月为2023-12），也视为超出交易日历。
+"""
+import datetime
+
+import numpy as np
+import pytest
+
+import tradetime
+
+DATE_FREQS = ['D', 'W', 'M', 'Q', 'Y']
+TIME_FREQS = ['1min', '5min', '15min', '30min', '1H']
+IF_BREAKS = [None, 'past', 'future']
+
+# 交易日历首尾，国庆、春节前后
+WINDOWS = [('2005-01-04', '2005-02-10'), ('2015-09-28', '2015-10-10'), ('2020-01-20', '2020-02-04'),
+           ('2023-12-16', '2023-12-29')]
+DAYS = np.concatenate([np.arange(np.datetime64(start), np.datetime64(end) + 1) for start, end in WINDOWS])
+# 交易日历内每一天，按年分组
+ALL_DAYS = np.arange(np.datetime64(WINDOWS[0][0]), np.datetime64(WINDOWS[-1][1]) + 1)
+YEARS = ALL_DAYS.astype('datetime64[Y]')
+DAY_SWEEPS = [pytest.param(DAYS, id='sample')] + [
+    pytest.param(ALL_DAYS[YEARS == year], id=str(year), marks=pytest.mark.slow) for year in np.unique(YEARS)]
+
+
+def _outcome(func):
+    try:
+        return func()
+    except ValueError:
+        return 'ValueError'
+    except (IndexError, KeyError):
+        return 'IndexError'
+
+
+def _unwrap(result, day):
+    """标量实现的结果离查询日期超过三年（交易日历跨度近二十年），即下标绕回了交易日历另一端"""
+    if isinstance(result, str):
+        return result
+    if any(abs(np.datetime64(datetime.date(*ymd)) - day) > np.timedelta64(1100, 'D') for ymd in result):
+        return 'IndexError'
+    return result
+
+
+def _ymd(d):
+    return d.year, d.month, d.day
+
+
+def _hms(t):
+    return t.hour, t.minute, t.second
+
+
+def _dates(baseline, day):
+    """(当前实现的date, 标量实现的date)"""
+    d = day.astype(datetime.date)
+    return tradetime.date(d.year, d.month, d.day, freq='D', ignore=True), \
+        baseline.date(d.year, d.month, d.day, freq='D', ignore=True)
+
+
+def _boundaries():
+    """每个bar开盘、收盘及其前后1秒"""
+    sessions = tradetime.time.sessions.values()
+    edges = np.concatenate([session.close_ordinal for session in sessions] + [session.open_ordinal for session in sessions])
+    return np.concatenate([edges - 1, edges, edges + 1]) % 86400
+
+
+def _seconds(step):
+    """每step秒抽样，加上bar的边界，不含00:00:00（标量实现视为当前时间）"""
+    seconds = np.unique(np.concatenate([np.arange(1, 86400, step), _boundaries()]))
+    return seconds[seconds > 0].tolist()
+
+
+SECOND_SWEEPS = [pytest.param(7, id='sample'), pytest.param(1, id='full', marks=pytest.mark.slow)]
+
+
+def _times(baseline, second):
+    """(当前实现的time, 标量实现的time)"""
+    hour, minute, s = second // 3600, second // 60 % 60, second % 60
+    return tradetime.time(hour, minute, s, ignore=True), baseline.time(hour, minute, s, ignore=True)
+
+
+@pytest.mark.parametrize('days', DAY_SWEEPS)
+def test_date_nearest(baseline, days):
+    for day in days:
+        new, old = _dates(baseline, day)
+        for if_break in ['past', 'future']:
+            assert _outcome(lambda: _ymd(new.nearest(if_break))) == _outcome(lambda: _ymd(old.nearest(if_break))), \
+                (day, if_break)
+
+
+@pytest.mark.parametrize('days', DAY_SWEEPS)
+def test_date_is_trading(baseline, days):
+    for day in days:
+        new, old = _dates(baseline, day)
+        assert tradetime.date.is_trading(new) == baseline.date.is_trading(old), day
+        assert tradetime.date.is_break(new) == baseline.date.is_break(old), day
+
+
+@pytest.mark.parametrize('freq', DATE_FREQS)
+@pytest.mark.parametrize('days', DAY_SWEEPS)
+def test_date_index_validate(baseline, freq, days):
+    for day in days:
+        new, old = _dates(baseline, day)
+        assert new.validate(freq) == old.validate(freq), day
+        assert _outcome(lambda: new.index(freq)) == _outcome(lambda: old.index(freq)), day
+
+
+@pytest.mark.parametrize('freq', DATE_FREQS)
+@pytest.mark.parametrize('days', DAY_SWEEPS)
+def test_date_break_type(baseline, freq, days):
+    for day in days:
+        new, old = _dates(baseline, day)
+        assert tradetime.date.break_type(new, freq) == baseline.date.break_type(old, freq), day
+
+
+@pytest.mark.parametrize('freq', DATE_FREQS)
+@pytest.mark.parametrize('days', DAY_SWEEPS)
+def test_date_close_open(baseline, freq, days):
+    for day in days:
+        new, old = _dates(baseline, day)
+        for if_break in IF_BREAKS:
+            expected = _unwrap(_outcome(lambda: (_ymd(old.close(freq, if_break)), _ymd(old.open(freq, if_break)))), day)
+            actual = _outcome(lambda: (_ymd(new.close(freq, if_break)), _ymd(new.open(freq, if_break))))
+            assert actual == expected, (day, if_break)
+
+
+# 抽样时每隔4天比较所有跨度和overflow；完整扫描时每一天轮流取一种
+BAR_COMBOS = [(span, overflow) for overflow in [False, True] for span in [0, 1, 6, 30]]
+
+
+def _bar_cases(days, step, last):
+    """(起始日期, 跨度, overflow)，结束日期不超过last"""
+    cases = [(day, span, overflow) for day in days[::step] for span, overflow in BAR_COMBOS] if step > 1 else \
+        [(day, *BAR_COMBOS[i % len(BAR_COMBOS)]) for i, day in enumerate(days)]
+    return [case for case in cases if case[0] + case[1] <= last]
+
+
+BAR_SWEEPS = [pytest.param([case for start, end in WINDOWS for case in _bar_cases(
+    np.arange(np.datetime64(start), np.datetime64(end) + 1), 4, np.datetime64(end))], id='sample')] + [
+    pytest.param(_bar_cases(ALL_DAYS[YEARS == year], 1, ALL_DAYS[-1]), id=str(year), marks=pytest.mark.slow)
+    for year in np.unique(YEARS)]
+
+
+@pytest.mark.parametrize('freq', DATE_FREQS)
+@pytest.mark.parametrize('cases', BAR_SWEEPS)
+def test_date_bars(baseline, freq, cases):
+    for day, span, overflow in cases:
+        new_start, old_start = _dates(baseline, day)
+        new_end, old_end = _dates(baseline, day + span)
+        expected = _unwrap(_outcome(lambda: [_ymd(x) for x in baseline.date.bars(
+            old_start, old_end, freq, overflow=overflow)]), day)
+        actual = _outcome(lambda: [_ymd(x) for x in tradetime.date.bars(new_start, new_end, freq, overflow=overflow)])
+        assert actual == expected, (day, span, overflow)
+
+
+@pytest.mark.parametrize('freq', TIME_FREQS)
+@pytest.mark.parametrize('step', SECOND_SWEEPS)
+def test_time_close_open(baseline, freq, step):
+    for second in _seconds(step):
+        new, old = _times(baseline, second)
+        expected = _outcome(lambda: (_hms(old.close(freq)), _hms(old.open(freq))))
+        actual = _outcome(lambda: (_hms(new.close(freq)), _hms(new.open(freq))))
+        assert actual == expected, second
+
+
+@pytest.mark.parametrize('freq', TIME_FREQS)
+@pytest.mark.parametrize('step', SECOND_SWEEPS)
+def test_time_index_validate(baseline, freq, step):
+    for second in _seconds(step):
+        new, old = _times(baseline, second)
+        assert new.validate(freq) == old.validate(freq), second
+        assert _outcome(lambda: new.index(freq)) == _outcome(lambda: old.index(freq)), second
+
+
+@pytest.mark.parametrize('step', SECOND_SWEEPS)
+def test_time_is_trading_break_type(baseline, step):
+    for second in _seconds(step):
+        new, old = _times(baseline, second)
+        assert tradetime.time.is_trading(new) == baseline.time.is_trading(old), second
+        assert tradetime.time.break_type(new) == baseline.time.break_type(old), second
+
+
+# 起始时间为bar的边界，结束时间向后偏移
+TIME_SPANS = [0, 1, 59, 60, 61, 299, 300, 301, 1800, 3600, 7200]
+
+
+@pytest.mark.parametrize('freq', TIME_FREQS)
+@pytest.mark.parametrize('step', [pytest.param(7, id='sample'), pytest.param(1, id='full', marks=pytest.mark.slow)])
+def test_time_bars(baseline, freq, step):
+    starts = np.unique(_boundaries())
+    for start in starts[::step].tolist():
+        for span in TIME_SPANS:
+            if start == 0 or start + span >= 86400:
+                continue
+            new_start, old_start = _times(baseline, start)
+            new_end, old_end = _times(baseline, start + span)
+            for is_open in [False, True]:
+                for overflow in [False, True]:
+                    expected = _outcome(lambda: [_hms(x) for x in baseline.time.bars(
+                        old_start, old_end, freq, is_open=is_open, overflow=overflow)])
+                    actual = _outcome(lambda: [_hms(x) for x in tradetime.time.bars(
+                        new_start, new_end, freq, is_open=is_open, overflow=overflow)])
+                    assert actual == expected, (start, span, is_open, overflow)
@@ -0,0 +1,35 @@
+import pytest
+
+import tradetime
+from tradetime.tradetime import _cache
+
+NIGHT = [('21:00:00', '23:00:00'), ('09:30:00', '11:30:00'), ('13:00:00', '15:00:00')]
+
+
+@pytest.fixture
+def night_week():
+    """默认交易时段没有夜盘，2022-01-10至2022-01-14有夜盘，结束后恢复"""
+    schedules, rules = list(tradetime.time.schedules), list(tradetime.time.schedule_rules)
+    tradetime.set_schedule(NIGHT, '2022-01-10', '2022-01-14')
+    yield
+    tradetime.time.schedules, tradetime.time.schedule_rules = schedules, rules
+    _cache.clear()
+
+
+def test_rollover_per_schedule(night_week):
+    # 默认交易时段没有夜盘，晚上为收盘后，不切换交易日；2022-01-14本身有夜盘，但下一交易日没有
+    assert tradetime.session_states([19 * 3600]).tolist() == [3]
+    labels = tradetime.bar_labels(['2022-01-04 19:00:00', '2022-01-14 21:30:30'], 'D')
+    assert labels['trading_date'].astype(str).tolist() == ['2022-01-04', '2022-01-14']
+    assert tradetime.bar_labels(['2022-01-04 19:00:00'], '1min')['bar_index'].tolist() == [-1]
+    states = tradetime.session_states(['2022-01-04 19:00:00', '2022-01-14 19:00:00', '2022-01-14 21:30:30'])
+    assert states.tolist() == [3, 3, 3]
+
+
+def test_rollover_night_schedule(night_week):
+    # 下一交易日有夜盘时，交易日切换之后属于下一交易日，跨越周末同样如此
+    timestamps = ['2022-01-07 21:30:30', '2022-01-10 21:30:30', '2022-01-10 19:00:00']
+    labels = tradetime.bar_labels(timestamps, '1min')
+    assert labels['trading_date'].astype(str).tolist() == ['2022-01-10', '2022-01-11', '2022-01-11']
+    assert labels['bar_close'].astype(str).tolist()[:2] == ['2022-01-07 21:31:00', '2022-01-10 21:31:00']
+    assert tradetime.session_states(timestamps).tolist() == [0, 0, 2]
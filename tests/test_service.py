@@ -0,0 +1,53 @@
+import os
+import stat
+
+import numpy as np
+import pytest
+
+import tradetime
+
+
+@pytest.fixture
+def runtime_dir(tmp_path, monkeypatch):
+    monkeypatch.delenv('TRADETIME_SERVICE', raising=False)
+    monkeypatch.setenv('XDG_RUNTIME_DIR', str(tmp_path))
+    return tmp_path
+
+
+def test_serve_calendar(runtime_dir):
+    server = tradetime.serve_calendar(reload=None, block=False)
+    try:
+        path = runtime_dir / 'tradetime.sock'
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+        with tradetime.CalendarClient() as client:
+            dates = ['2022-01-01', '2022-01-04']
+            result = client.offset(dates, 2, if_break='future')
+            assert client.version is not None
+            assert np.array_equal(result, tradetime.offset(np.array(dates, dtype='datetime64[D]'), 2,
+                                                           if_break='future'))
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert not path.exists()
+
+
+def test_serve_calendar_keeps_other_files(runtime_dir):
+    path = runtime_dir / 'tradetime.sock'
+    path.write_text('not a socket')
+    with pytest.raises(FileExistsError):
+        tradetime.serve_calendar(reload=None, block=False)
+    assert path.read_text() == 'not a socket'
+
+
+def test_default_dir_is_private(tmp_path, monkeypatch):
+    monkeypatch.delenv('TRADETIME_SERVICE', raising=False)
+    monkeypatch.delenv('XDG_RUNTIME_DIR', raising=False)
+    monkeypatch.setattr('tempfile.tempdir', str(tmp_path))
+    server = tradetime.serve_calendar(reload=None, block=False)
+    try:
+        directory = tmp_path / f'tradetime-{os.getuid()}'
+        assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+        assert tradetime.CalendarClient().path == str(directory / 'tradetime.sock')
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,108 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_with_released_tables():
+    env = dict(os.environ, TRADETIME_SHARED='tradetime_released_tables', PYTHONWARNINGS='default')
+    code = "import tradetime; print(tradetime.date.D.close_ordinal[0] == tradetime.date.D.close_ordinal.min())"
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == 'True'
+    assert 'not found' in result.stderr
+
+
+def test_spawn_children_attach(tmp_path):
+    script = tmp_path / 'spawn.py'
+    script.write_text("""
+import multiprocessing
+import tradetime
+
+def last_day(_):
+    from tradetime import shared
+    return int(tradetime.date.D.close_ordinal[-1]), shared._attached is not None
+
+if __name__ == '__main__':
+    with tradetime.share_tables():
+        with multiprocessing.get_context('spawn').Pool(2) as pool:
+            print(pool.map(last_day, range(2)))
+""")
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, str(script)], env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert 'True' in result.stdout and 'leaked' not in result.stderr
+
+
+def test_independent_process_attach(tmp_path):
+    # 独立进程退出时不删除共享内存，创建者挂载自己的共享内存不影响释放
+    script = tmp_path / 'attach.py'
+    script.write_text("""
+import subprocess
+import sys
+import tradetime
+
+with tradetime.share_tables(environ=False) as tables:
+    for _ in range(2):
+        code = f"import tradetime; tradetime.attach_tables('{tables.name}')"
+        subprocess.run([sys.executable, '-c', code], check=True)
+    tradetime.attach_tables(tables.name)
+print('ok')
+""")
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, str(script)], env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == 'ok' and 'Error' not in result.stderr, result.stderr
+
+
+def test_spawn_children_night_session(tmp_path):
+    # 默认交易时段的夜盘同样共享
+    script = tmp_path / 'night.py'
+    script.write_text("""
+import multiprocessing
+import tradetime
+from tradetime.tradetime import Session, _Time
+
+def state(_):
+    return tradetime.time.is_trading('22:00:00'), repr(tradetime.time.schedules[0])
+
+if __name__ == '__main__':
+    Session.night_open_time, Session.night_close_time = _Time(21), _Time(2, 30)
+    tradetime.set_time()
+    with tradetime.share_tables():
+        with multiprocessing.get_context('spawn').Pool(1) as pool:
+            print(pool.map(state, range(1))[0] == state(0))
+""")
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, str(script)], env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == 'True'
+
+
+def test_spawn_children_include(tmp_path):
+    # 子进程的Session.include与默认交易时段一致
+    script = tmp_path / 'include.py'
+    script.write_text("""
+import multiprocessing
+import tradetime
+from tradetime.tradetime import Session
+
+BOUNDARIES = ['09:29:59', '09:30:00', '09:30:01', '11:30:00', '11:30:01', '13:00:00', '15:00:00', '15:00:01']
+
+def state(_):
+    labels = tradetime.bar_labels(['2022-01-04 09:30:00', '2022-01-04 09:31:00'], '1min')
+    return (Session.include, tradetime.time.schedules[0].include,
+            [tradetime.time.is_trading(x) for x in BOUNDARIES], labels['bar_index'].tolist())
+
+if __name__ == '__main__':
+    tradetime.set_time(include=False)
+    with tradetime.share_tables():
+        with multiprocessing.get_context('spawn').Pool(1) as pool:
+            child = pool.map(state, range(1))[0]
+    print(child == state(0), child[:2])
+""")
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, str(script)], env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == 'True (False, False)'
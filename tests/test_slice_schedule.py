@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+import tradetime
+
+
+def test_slice_schedule():
+    # 收盘时间在(start, end]内的bar，跨越周末
+    result = tradetime.slice_schedule('2022-06-10 14:00', '2022-06-13 10:00', '30min')
+    assert result['bar_close'].astype(str).tolist() == ['2022-06-10 14:30:00', '2022-06-10 15:00:00', '2022-06-13 10:00:00']
+    assert result['order'].tolist() == [0, 0, 0]
+    assert np.allclose(result['weight'], 1 / 3)
+    labels = tradetime.bar_labels(result['bar_close'], '30min')
+    assert result['bar_index'].tolist() == labels['bar_index'].tolist()
+    assert tradetime.slice_schedule('2022-06-13 10:00', '2022-06-13 10:00', '30min').empty
+
+
+def test_slice_schedule_profile():
+    profile = pd.Series([4., 1., 1., 2.], index=['10:30:00', '11:30:00', '14:00:00', '15:00:00'])
+    start = pd.to_datetime(['2022-06-13 09:30', '2022-06-13 14:00', 'NaT'])
+    result = tradetime.slice_schedule(start, pd.Timestamp('2022-06-14 10:30'), '1H', profile=profile)
+    first = result[result['order'] == 0]
+    assert first['bar_close'].astype(str).tolist()[-1] == '2022-06-14 10:30:00'
+    assert np.allclose(first['weight'], np.array([4., 1., 1., 2., 4.]) / 12)
+    assert result.groupby('order')['weight'].sum().round(12).tolist() == [1., 1.]
+    assert 2 not in result['order'].tolist()
+
+
+def test_slice_schedule_zero_profile():
+    # 权重全部为0的母单等权
+    result = tradetime.slice_schedule('2022-06-13 10:00', '2022-06-13 11:00', '30min', profile=np.zeros(8))
+    assert result['weight'].tolist() == [0.5, 0.5]
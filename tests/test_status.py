@@ -0,0 +1,30 @@
+import gc
+import weakref
+
+import numpy as np
+
+import tradetime
+
+
+def _status():
+    return tradetime.SecurityStatus.from_suspensions(['600000', '600000', '000001'],
+                                                     ['2022-01-05', '2022-01-06', '2022-01-05'])
+
+
+def test_runs_follow_calendar_generation():
+    status = _status()
+    assert status.is_tradable('600000', ['2022-01-04', '2022-01-05', '2022-01-07']).tolist() == [True, False, True]
+    runs = status._runs()
+    assert status._runs() is runs
+    tradetime.date.install(tradetime.date.calendars, tradetime.date.confirmed_end)
+    assert status._runs() is not runs
+    assert np.array_equal(status._runs()['key'], runs['key'])
+
+
+def test_status_is_not_retained():
+    status = _status()
+    status.next_tradable('600000', '2022-01-05')
+    ref = weakref.ref(status)
+    del status
+    gc.collect()
+    assert ref() is None
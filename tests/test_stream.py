@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+import tradetime
+from tradetime.stream import label_bars
+
+
+def test_bar_labels():
+    labels = tradetime.bar_labels(['2022-01-04 09:30:30', '2022-01-04 12:00:00', '2022-01-08 10:00:00',
+                                   '2022-01-05 09:31:00'], '1min')
+    # 午间休市归属于之后最近的bar，非交易日不属于任何bar
+    assert labels['bar_close'].astype(str).tolist() == [
+        '2022-01-04 09:31:00', '2022-01-04 13:01:00', 'NaT', '2022-01-05 09:31:00']
+    assert labels['trading_date'].astype(str).tolist() == ['2022-01-04', '2022-01-04', 'NaT', '2022-01-05']
+    bar_index = labels['bar_index'].tolist()
+    assert bar_index[2] == -1
+    assert bar_index[3] - bar_index[0] == len(tradetime.time.sessions['1min'].close_ordinal)
+
+    labels = tradetime.bar_labels(['2022-01-04 09:30:30'], 'M')
+    assert labels['bar_close'].astype(str).tolist() == ['2022-01-28']
+
+
+def test_label_bars_chunks():
+    timestamps = pd.date_range('2022-01-04 09:30:00', '2022-01-04 11:30:00', freq='20s')
+    chunks = [timestamps[i: i + 7] for i in range(0, len(timestamps), 7)]
+    frames = list(label_bars(chunks, '5min'))
+    expected = tradetime.bar_labels(timestamps, '5min')
+
+    result = pd.concat(frames)
+    assert result['time'].tolist() == timestamps.tolist()
+    assert np.array_equal(result['bar_index'].to_numpy(), expected['bar_index'].to_numpy())
+    # 每块只包含完整的bar
+    for first, second in zip(frames[:-1], frames[1:]):
+        assert first['bar_index'].iloc[-1] < second['bar_index'].iloc[0]
+
+
+def test_label_bars_unaligned():
+    frame = pd.DataFrame({'price': [1., 2., 3.]},
+                         index=pd.to_datetime(['2022-01-04 09:30:30', '2022-01-04 09:30:40', '2022-01-04 09:31:30']))
+    frames = list(label_bars([frame.iloc[:1], frame.iloc[1:]], '1min', align=False))
+    assert [len(x) for x in frames] == [1, 2]
+    assert frames[1]['price'].tolist() == [2., 3.]
+    assert frames[1]['bar_close'].astype(str).tolist() == ['2022-01-04 09:31:00', '2022-01-04 09:32:00']
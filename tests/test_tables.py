@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+import tradetime
+from tradetime.tradetime import Session
+
+
+def _reset_time():
+    """模拟新进程的默认设置"""
+    Session.night_open_time = Session.night_close_time = None
+    tradetime.set_time()
+
+
+@pytest.mark.parametrize('name', ['tables.npz', 'tables'])
+def test_round_trip_night_session(tmp_path, night_session, name):
+    path = tmp_path / name
+    tradetime.export_tables(path)
+    schedule = tradetime.time.schedules[0]
+    assert tradetime.time.is_trading('22:00:00')
+
+    _reset_time()
+    assert not tradetime.time.is_trading('22:00:00')
+    tradetime.import_tables(path)
+    assert tradetime.time.schedules[0] == schedule
+    assert tradetime.time.is_trading('22:00:00') and tradetime.time.is_trading('02:00:00')
+    assert tradetime.time.break_type('03:00:00') == 'internal break'
+    assert tradetime.time.break_type('18:30:00') == 'external break'
+
+
+@pytest.mark.parametrize('name', ['tables.npz', 'tables'])
+def test_round_trip_calendars(tmp_path, name):
+    path = tmp_path / name
+    calendars = {freq: calendar.close_ordinal.copy() for freq, calendar in tradetime.date.calendars.items()}
+    sessions = {freq: session.open_ordinal.copy() for freq, session in tradetime.time.sessions.items()}
+    bars = tradetime.date.bars('2022-01-01', '2022-03-31', 'W')
+    tradetime.export_tables(path)
+
+    generation = tradetime.date.generation
+    tradetime.import_tables(path)
+    assert tradetime.date.generation == generation + 1
+    for freq, closes in calendars.items():
+        assert np.array_equal(tradetime.date.calendars[freq].close_ordinal, closes), freq
+    for freq, opens in sessions.items():
+        assert np.array_equal(tradetime.time.sessions[freq].open_ordinal, opens), freq
+    assert tradetime.date.bars('2022-01-01', '2022-03-31', 'W').equals(bars)
+    assert str(tradetime.date(2022, 1, 4).close('M')) == '2022-01-28'
+
+
+BOUNDARIES = ['09:29:59', '09:30:00', '09:30:01', '11:30:00', '11:30:01', '13:00:00', '15:00:00', '15:00:01']
+
+
+def _session_state():
+    labels = tradetime.bar_labels(['2022-01-04 09:30:00', '2022-01-04 09:31:00'], '1min')
+    return (Session.include, tradetime.time.schedules[0].include, [tradetime.time.is_trading(x) for x in BOUNDARIES],
+            labels['bar_index'].tolist())
+
+
+@pytest.mark.parametrize('name', ['tables.npz', 'tables'])
+def test_round_trip_include(tmp_path, name):
+    path = tmp_path / name
+    tradetime.set_time(include=False)
+    try:
+        tradetime.export_tables(path)
+        expected = _session_state()
+        tradetime.set_time(include=True)
+        tradetime.import_tables(path)
+        assert _session_state() == expected
+        assert expected[:2] == (False, False)
+    finally:
+        tradetime.set_time(include=True)
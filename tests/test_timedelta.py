@@ -0,0 +1,53 @@
+import datetime
+
+import numpy as np
+import pytest
+
+import tradetime
+from tradetime.tradetime import _Time
+
+TIMEDELTAS = [datetime.timedelta(days=3), datetime.timedelta(days=-1), datetime.timedelta(days=1, hours=5),
+              datetime.timedelta(hours=-5), datetime.timedelta(hours=14, seconds=59), datetime.timedelta(seconds=-1),
+              datetime.timedelta(days=400, minutes=1), datetime.timedelta(0)]
+
+
+def _combine(t: datetime.time, delta: datetime.timedelta, sign: int) -> datetime.time:
+    """datetime.combine往返的参照结果"""
+    start = datetime.datetime.combine(datetime.date(2022, 6, 10), t)
+    return (start + delta if sign > 0 else start - delta).time()
+
+
+@pytest.mark.parametrize('delta', TIMEDELTAS)
+def test_date_timedelta(delta):
+    for day in [datetime.date(2022, 6, 10), datetime.date(2020, 2, 28), datetime.date(2023, 12, 31)]:
+        d = tradetime.date(day.year, day.month, day.day, ignore=True)
+        assert (d + delta).py_date() == day + delta, day
+        assert (d - delta).py_date() == day - delta, day
+        assert (d + delta).freq == d.freq
+
+
+@pytest.mark.parametrize('delta', TIMEDELTAS)
+def test_time_timedelta(delta):
+    for t in [datetime.time(10, 0), datetime.time(0, 0, 1), datetime.time(23, 59, 59)]:
+        x = tradetime.time(t.hour, t.minute, t.second, ignore=True)
+        assert (x + delta).py_time() == _combine(t, delta, 1), t
+        assert (x - delta).py_time() == _combine(t, delta, -1), t
+        assert _Time(t.hour, t.minute, t.second) + delta == _combine(t, delta, 1), t
+        assert _Time(t.hour, t.minute, t.second) - delta == _combine(t, delta, -1), t
+
+
+def test_add_timedelta():
+    days = np.array(['2022-06-10', '2020-02-28'], dtype='datetime64[D]')
+    assert tradetime.add_timedelta(days, np.array([1, 2], dtype='timedelta64[D]')).astype(str).tolist() == \
+        ['2022-06-11', '2020-03-01']
+    # 日期按天数取整
+    assert tradetime.add_timedelta(days, [datetime.timedelta(hours=30)]).astype(str).tolist() == \
+        ['2022-06-11', '2020-02-29']
+
+    timestamps = np.array(['2022-06-10T23:00'], dtype='datetime64[ns]')
+    assert tradetime.add_timedelta(timestamps, 7200).astype(str).tolist() == ['2022-06-11T01:00:00.000000000']
+
+    # 时间跨越午夜取模
+    seconds = tradetime.add_timedelta(tradetime.time(10, 0), np.arange(0, 3600 * 15, 3600 * 4))
+    assert seconds.view('int64').tolist() == [36000, 50400, 64800, 79200]
+    assert tradetime.add_timedelta(tradetime.time(23, 0, ignore=True), 7200).view('int64').tolist() == [3600]
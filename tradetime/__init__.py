@@ -1,2 +1,9 @@
 from .tradetime import *
+from .shared import SharedTables, share_tables, attach_tables
+from .stream import label_bars
+from .live import BarAggregator
+from .status import SecurityStatus
+from .cache import cache_per_bar
+from .service import CalendarClient, serve_calendar, connect_calendar
+from .rules import Rule, NthTradingDay, NthWeekday, Union, next_event, previous_event, events
 from .__version__ import __version__
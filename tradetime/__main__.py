@@ -0,0 +1,324 @@
+"""
+命令行批量转换
+
+从stdin按大块读取换行或CSV分隔的日期、时间戳，向量化计算后写入stdout，用于shell、Spark等ETL管道：
+
+$ cat dates.txt | python -m tradetime offset -n 2 --if-break future
+$ python -m tradetime close --freq M -c 1 --header --append < orders.csv
+$ python -m tradetime label-bars --freq 5min --fields bar_close,bar_index < ticks.txt
+$ python -m tradetime bars 2022-01-01 2022-01-31
+"""
+import sys
+import argparse
+from typing import IO, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .tradetime import (date, offset, bar_labels, session_states, parse_dates, to_strings, _freq_date_type,
+                        _session_freq, _days_from_civil, _civil_from_days, _IN_SESSION)
+
+_LABEL_FIELDS = ['trading_date', 'bar_open', 'bar_close', 'bar_index']
+
+# 定长格式直接按字节解析，Y, M, D, h, m, s为数字，其他为分隔符
+_LAYOUTS = ['YYYYMMDD', 'YYYY-MM-DD', 'YYYY-MM-DD hh:mm:ss', 'YYYY-MM-DDThh:mm:ss']
+
+
+def _batches(stream: IO[bytes], size: int) -> Iterator[bytes]:
+    """按约size字节读取，每块以完整的行结束"""
+    while True:
+        data = stream.read(size)
+        if not data:
+            return
+        if not data.endswith(b'\n'):
+            data += stream.readline()
+        yield data
+
+
+def _split(data: bytes, delimiter: bytes, column: Optional[int]) -> Tuple[np.ndarray, Optional[List[bytes]]]:
+    """一块数据 -> (字段的定长bytes数组, 原始行)
+    整行为字段且行长度相同时直接按定长矩阵切分，不逐行处理
+    """
+    width = data.find(b'\n') + 1
+    if column is None and width > 1 and len(data) % width == 0:
+        matrix = np.frombuffer(data, dtype='uint8').reshape(-1, width)
+        crlf = matrix[:, -2] == 13
+        end = width - 2 if crlf[0] else width - 1
+        # 每行只在行尾有一个\n（或\r\n，不混用），字段内没有换行，才是定长行
+        if end > 0 and (matrix[:, -1] == 10).all() and (crlf == crlf[0]).all() \
+                and ((matrix[:, :end] != 10) & (matrix[:, :end] != 13)).all():
+            values = np.ascontiguousarray(matrix[:, :end]).view(f'S{end}').ravel()
+            return values, None
+    lines = data.splitlines()
+    if column is None:
+        return np.array([line.strip() for line in lines], dtype='S'), lines
+    return np.array([line.split(delimiter)[column].strip() for line in lines], dtype='S'), lines
+
+
+def _key2ordinal(key: np.ndarray) -> Optional[np.ndarray]:
+    """YYYYMMDD整数 -> days since 1970-01-01，取值范围内每个自然日查表，无效日期返回None"""
+    low, high = int(key.min()), int(key.max())
+    if low < 10000101 or high > 99991231:
+        return None
+    days = np.arange(_days_from_civil(low // 10000, 1, 1), _days_from_civil(high // 10000 + 1, 1, 1))
+    year, month, day = _civil_from_days(days)
+    table = np.full(high - low + 1, np.iinfo('int64').min)
+    inside = (year * 10000 + month * 100 + day >= low) & (year * 10000 + month * 100 + day <= high)
+    table[(year * 10000 + month * 100 + day)[inside] - low] = days[inside]
+    ordinal = table[key - low]
+    return None if (ordinal == np.iinfo('int64').min).any() else ordinal
+
+
+def _parse_fixed(values: np.ndarray) -> Optional[Tuple[np.ndarray, str]]:
+    """定长bytes数组按_LAYOUTS解析，不转换为str，格式不符返回None"""
+    width = values.dtype.itemsize
+    layouts = [layout for layout in _LAYOUTS if len(layout) == width]
+    if not len(values) or not layouts:
+        return None
+    matrix = values.view('uint8').reshape(len(values), width)
+    layout = layouts[0] if len(layouts) == 1 or matrix[0, 10] == 32 else layouts[1]
+    columns = [i for i, c in enumerate(layout) if c in 'YMDhms']
+    separators = [i for i, c in enumerate(layout) if c not in 'YMDhms']
+    if (matrix[:, separators] != np.frombuffer(layout.encode('ascii'), dtype='uint8')[separators]).any():
+        return None
+    digits = matrix[:, columns] - np.uint8(48)
+    if (digits > 9).any():
+        return None
+
+    # 日期部分合并为YYYYMMDD整数后查表
+    digits = digits.astype('int32')
+    ordinal = _key2ordinal(digits[:, :8] @ (10 ** np.arange(7, -1, -1, dtype='int32')))
+    if ordinal is None:
+        return None
+    if width <= 10:
+        return ordinal.astype('datetime64[D]'), 'date'
+    hour, minute, second = (digits[:, 8:] @ np.array([[10, 0, 0], [1, 0, 0], [0, 10, 0], [0, 1, 0], [0, 0, 10],
+                                                         [0, 0, 1]], dtype='int32')).T
+    if ((hour > 23) | (minute > 59) | (second > 59)).any():
+        return None
+    return (ordinal * 86400 + hour * 3600 + minute * 60 + second).astype('datetime64[s]'), 'datetime'
+
+
+def _parse(values: np.ndarray) -> Tuple[np.ndarray, str]:
+    """字段 -> (datetime64数组, kind)，YYYYMMDD、YYYY-MM-DD为日期，其他按ISO日期时间解析"""
+    parsed = _parse_fixed(values)
+    if parsed is not None:
+        return parsed
+    values = values.astype('U')
+    if values.dtype.itemsize <= 40:
+        return parse_dates(values), 'date'
+    return values.astype('datetime64[s]'), 'datetime'
+
+
+def _lines(strings: np.ndarray) -> bytes:
+    """bytes数组 -> 换行分隔的bytes，按矩阵拼接，去掉定长的填充"""
+    if not len(strings):
+        return b''
+    width = strings.dtype.itemsize
+    matrix = np.empty((len(strings), width + 1), dtype='uint8')
+    matrix[:, :-1] = np.ascontiguousarray(strings).view('uint8').reshape(len(strings), width)
+    matrix[:, -1] = 10
+    return matrix.tobytes() if matrix.all() else matrix[matrix != 0].tobytes()
+
+
+def _join(columns: List[np.ndarray], delimiter: bytes) -> np.ndarray:
+    """多个bytes数组按列拼接，填充留在中间，由_lines去掉"""
+    if len(columns) == 1:
+        return columns[0]
+    sep = np.frombuffer(delimiter, dtype='uint8')
+    parts = []
+    for column in columns:
+        if parts:
+            parts.append(np.broadcast_to(sep, (len(column), len(sep))))
+        parts.append(np.ascontiguousarray(column).view('uint8').reshape(len(column), column.dtype.itemsize))
+    matrix = np.concatenate(parts, axis=1)
+    return np.ascontiguousarray(matrix).view(f'S{matrix.shape[1]}').ravel()
+
+
+def _per_value(values: np.ndarray, func) -> np.ndarray:
+    """取值范围小于数组长度时，先计算取值范围内的每个值再索引，如按日、按日内秒数计算"""
+    if len(values) and int(values.max()) - int(values.min()) < len(values):
+        low = values.min()
+        return func(np.arange(low, values.max() + 1))[values - low]
+    return func(values)
+
+
+def _format(values: np.ndarray, fmt: str = None) -> np.ndarray:
+    """datetime64[D]或datetime64[s]数组 -> bytes数组，NaT为空
+    日期时间默认格式按日期和日内时间分别格式化后拼接
+    """
+    nat = np.isnat(values)
+    ordinal = np.where(nat, 0, values.view('int64')) if nat.any() else values.view('int64')
+    if values.dtype == np.dtype('datetime64[D]'):
+        strings = _per_value(ordinal, lambda x: to_strings(x.astype('datetime64[D]'), fmt).astype('S'))
+    elif fmt is None:
+        day, second = np.divmod(ordinal, 86400)
+        strings = _join([_per_value(day, lambda x: to_strings(x.astype('datetime64[D]')).astype('S')),
+                         _per_value(second, lambda x: to_strings(x.astype('timedelta64[s]')).astype('S'))], b' ')
+    else:
+        strings = to_strings(ordinal.astype('datetime64[s]'), fmt).astype('S')
+    return np.where(nat, b'', strings) if nat.any() else strings
+
+
+def _bar_counts(start: np.ndarray, end: np.ndarray, freq: str, overflow: bool = False) -> np.ndarray:
+    """start到end之间的bar数，与len(date.bars(start, end, freq, is_open, overflow))一致，is_open不影响bar数
+    从start所在或之后的第一个bar，到end之前最后一个结束的bar；overflow时end为交易日则到end所在的bar
+    """
+    closes, end = date.calendars[freq].close_ordinal, end.view('int64')
+    if overflow:
+        trading = date.D.close_ordinal
+        is_trading = trading[np.searchsorted(trading, end).clip(0, len(trading) - 1)] == end
+        stop = np.searchsorted(closes, end, side='left') + is_trading
+    else:
+        stop = np.searchsorted(closes, end, side='right')
+    return (stop - np.searchsorted(closes, start.view('int64'), side='left')).clip(0)
+
+
+def _convert(args, values: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+    """一块字段 -> 结果bytes数组"""
+    if args.command == 'bars':
+        start, _ = _parse(values)
+        end, _ = _parse(rows)
+        return _bar_counts(start.astype('datetime64[D]'), end.astype('datetime64[D]'), args.freq,
+                           args.overflow).astype('S')
+
+    parsed, kind = _parse(values)
+    if args.command in ('close', 'open', 'offset'):
+        n = args.n if args.command == 'offset' else 0
+        days = parsed.astype('datetime64[D]')
+        result = _per_value(days.view('int64'), lambda x: offset(
+            x.astype('datetime64[D]'), n, args.freq, args.if_break, errors='coerce'))
+        if args.errors == 'raise' and np.isnat(result).any():
+            # 以第一个无效日期报错
+            offset(days[np.isnat(result)][:1], n, args.freq, args.if_break, errors='raise')
+        if args.command == 'open':
+            calendar = date.calendars[args.freq]
+            valid = ~np.isnat(result)
+            index = np.searchsorted(calendar.close_ordinal, result[valid].view('int64'))
+            result[valid] = calendar.open_ordinal[index].astype('datetime64[D]')
+        return _format(result, args.fmt)
+    if args.command == 'is-trading':
+        if kind == 'datetime':
+            trading = session_states(parsed) == _IN_SESSION
+        else:
+            closes = date.D.close_ordinal
+            trading = _per_value(parsed.view('int64'), lambda x: closes[
+                np.searchsorted(closes, x).clip(0, len(closes) - 1)] == x)
+        return np.where(trading, b'1', b'0')
+    if args.command == 'label-bars':
+        labels = bar_labels(parsed.astype('datetime64[s]'), args.freq)
+        columns = []
+        for field in args.fields:
+            column = labels[field].to_numpy()
+            if field == 'bar_index':
+                valid = column >= 0
+                low = column[valid].min() if valid.any() else 0
+                strings = _per_value(np.where(valid, column, low), lambda x: x.astype('S'))
+                columns.append(strings if valid.all() else np.where(valid, strings, b'-1'))
+            elif field == 'trading_date' or args.freq in _freq_date_type:
+                columns.append(_format(column.astype('datetime64[D]'), args.fmt))
+            else:
+                columns.append(_format(column.astype('datetime64[s]'), args.fmt))
+        return _join(columns, args.delimiter.encode('utf-8'))
+    raise ValueError(f"Invalid command: {args.command}")
+
+
+def _run(args, stdin: IO[bytes], stdout: IO[bytes]):
+    delimiter = args.delimiter.encode('utf-8')
+    column = args.column
+    header = stdin.readline() if args.header else b''
+    if header:
+        stdout.write(header.rstrip(b'\r\n') + delimiter + args.command.encode('utf-8') + b'\n' if args.append
+                     else (args.command + '\n').encode('utf-8'))
+
+    for data in _batches(stdin, args.batch_size):
+        if args.command == 'bars':
+            # 每行为start, end两列
+            lines = data.splitlines()
+            first = 0 if column is None else column
+            fields = [line.split(delimiter) for line in lines]
+            values = np.array([x[first] for x in fields], dtype='S')
+            rows = np.array([x[first + 1] for x in fields], dtype='S')
+        else:
+            values, lines = _split(data, delimiter, column)
+            rows = None
+        result = _convert(args, values, rows)
+        if args.append:
+            if lines is None:
+                lines = data.splitlines()
+            stdout.write(b''.join(line.rstrip(b'\r') + delimiter + value + b'\n'
+                                  for line, value in zip(lines, result.tolist())))
+        else:
+            stdout.write(_lines(result))
+
+
+def _list_bars(args, stdout: IO[bytes]):
+    """bars start end：输出start到end之间的bar"""
+    bars = date.bars(args.start, args.end, args.freq, is_open=args.is_open, overflow=args.overflow)
+    stdout.write(_lines(to_strings(bars, args.fmt).astype('S')))
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m tradetime', description='批量交易日历转换，stdin -> stdout')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    io = argparse.ArgumentParser(add_help=False)
+    io.add_argument('-d', '--delimiter', default=',', help="CSV分隔符，默认','")
+    io.add_argument('-c', '--column', type=int, default=None, help="日期所在列（从0开始），默认整行")
+    io.add_argument('--header', action='store_true', help="第一行为表头")
+    io.add_argument('--append', action='store_true', help="输出原始行并追加结果列")
+    io.add_argument('--batch-size', type=int, default=1 << 24, help="每块读取的字节数，默认16MB")
+    io.add_argument('--fmt', default=None, help="输出格式，如'%%Y%%m%%d'，见to_strings")
+
+    bar = argparse.ArgumentParser(add_help=False)
+    bar.add_argument('--freq', default='D', choices=_freq_date_type, help="日期频率，默认'D'")
+    bar.add_argument('--if-break', default=None, choices=['past', 'future'], help="非交易日取之前或之后的bar")
+    bar.add_argument('--errors', default='raise', choices=['raise', 'coerce'],
+                     help="超出交易日历或缺少if_break时，'raise'报错，'coerce'输出空字段")
+
+    commands.add_parser('close', parents=[io, bar], help="所属bar的收盘日")
+    commands.add_parser('open', parents=[io, bar], help="所属bar的开盘日")
+    command = commands.add_parser('offset', parents=[io, bar], help="所属bar位移n个bar的收盘日")
+    command.add_argument('-n', type=int, default=0, help="位移bar数")
+
+    command = commands.add_parser('bars', parents=[io], help="start到end之间的bar，不指定start, end时按行输出bar数")
+    command.add_argument('start', nargs='?', default=None)
+    command.add_argument('end', nargs='?', default=None)
+    command.add_argument('--freq', default='D', choices=_freq_date_type, help="日期频率，默认'D'")
+    command.add_argument('--is-open', action='store_true', help="输出bar的开盘日")
+    command.add_argument('--overflow', action='store_true', help="包含end所在的未结束bar")
+
+    commands.add_parser('is-trading', parents=[io], help="日期是否交易日，日期时间是否在交易时段内，输出1或0")
+
+    command = commands.add_parser('label-bars', parents=[io], help="时间戳所属bar，见bar_labels")
+    command.add_argument('--freq', default=None, choices=_freq_date_type + _session_freq,
+                         help="bar频率，默认为默认时间频率")
+    command.add_argument('--fields', default='bar_close', type=lambda x: x.split(','),
+                         help=f"输出的列，逗号分隔，可选{','.join(_LABEL_FIELDS)}，默认bar_close")
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if args.command == 'label-bars' and not set(args.fields) <= set(_LABEL_FIELDS):
+        parser.error(f"--fields can only be {_LABEL_FIELDS}")
+    if args.command == 'bars' and (args.start is None) != (args.end is None):
+        parser.error("bars needs both start and end, or neither to read start, end rows from stdin")
+
+    stdout = sys.stdout.buffer
+    try:
+        if args.command == 'bars' and args.start is not None:
+            _list_bars(args, stdout)
+        else:
+            _run(args, sys.stdin.buffer, stdout)
+        stdout.flush()
+    except (ValueError, IndexError, TypeError) as e:
+        parser.exit(1, f"{parser.prog}: error: {e}\n")
+    except BrokenPipeError:
+        # 下游提前关闭，如head
+        sys.stderr.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+按bar缓存
+
+同一个bar内重复计算的信号按当前bar和参数缓存，bar收盘后自动失效：
+
+>>> @tradetime.cache_per_bar('5min')
+... def signal(code):
+...     ...
+>>> signal('600000')  # 同一个5min bar内只计算一次
+>>> signal.cache_clear()
+"""
+import threading
+import functools
+import datetime as _datetime
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+from .tradetime import date, time, _freq_date_type, _bar_closes, _EPOCH_ORDINAL
+
+__all__ = ['cache_per_bar']
+
+
+def _clock_seconds(now: _datetime.datetime) -> int:
+    """seconds since 1970-01-01 00:00:00, 本地时间"""
+    return (now.toordinal() - _EPOCH_ORDINAL) * 86400 + now.hour * 3600 + now.minute * 60 + now.second
+
+
+def _bar_bounds(freq: str, seconds: int) -> Tuple[int, int, int]:
+    """seconds所属bar（之后最近收盘的bar），返回 (bar位置, 上一个bar收盘秒数, 收盘秒数)
+    日期频率的收盘为收盘日最后一秒，超出交易日历的bar位置为len，不会收盘
+    """
+    if freq in _freq_date_type:
+        closes = (date.calendars[freq].close_ordinal + 1) * 86400 - 1
+    else:
+        closes = _bar_closes(freq)
+    i = int(np.searchsorted(closes, seconds, side='left'))
+    previous = int(closes[i - 1]) if i > 0 else np.iinfo('int64').min
+    close = int(closes[i]) if i < len(closes) else np.iinfo('int64').max
+    return i, previous, close
+
+
+def cache_per_bar(freq: str = None, maxsize: int = 128, clock: Callable[[], _datetime.datetime] = None):
+    """按当前bar和参数缓存函数结果的装饰器，bar收盘后失效，线程安全
+    freq: 日期频率或时间频率，默认为默认时间频率；时间戳归属与bar_labels一致，午间休市属于下一个bar
+    maxsize: 最多缓存的结果数，超出时淘汰最久未使用的结果
+    clock: 返回当前时间的函数，默认datetime.datetime.now，回测时可传入回放时钟
+    """
+    freq = freq if freq else time.default_freq
+    clock = clock if clock else _datetime.datetime.now
+
+    def decorator(func):
+        lock = threading.Lock()
+        entries: OrderedDict = OrderedDict()  # (bar, 参数) -> 结果
+        # 最近一次定位的bar，时钟仍在(previous, close]内时无需查找
+        bounds = {'bar': -1, 'previous': 0, 'close': -1}
+        info = {'hits': 0, 'misses': 0}
+
+        def current_bar() -> int:
+            seconds = _clock_seconds(clock())
+            with lock:
+                if bounds['previous'] < seconds <= bounds['close']:
+                    return bounds['bar']
+                bar, previous, close = _bar_bounds(freq, seconds)
+                if bar != bounds['bar']:
+                    # 新的bar，之前bar的结果全部失效
+                    entries.clear()
+                bounds.update(bar=bar, previous=previous, close=close)
+                return bar
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (current_bar(), args, tuple(sorted(kwargs.items())))
+            with lock:
+                if key in entries:
+                    entries.move_to_end(key)
+                    info['hits'] += 1
+                    return entries[key]
+                info['misses'] += 1
+            result = func(*args, **kwargs)
+            with lock:
+                if key[0] == bounds['bar']:
+                    entries[key] = result
+                    if len(entries) > maxsize:
+                        entries.popitem(last=False)
+            return result
+
+        def cache_info() -> Dict[str, int]:
+            with lock:
+                return {**info, 'maxsize': maxsize, 'currsize': len(entries)}
+
+        def cache_clear():
+            with lock:
+                entries.clear()
+                info.update(hits=0, misses=0)
+                bounds.update(bar=-1, previous=0, close=-1)
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
@@ -0,0 +1,145 @@
+"""
+实时bar合成
+
+实盘行情按批推送tick，BarAggregator用按symbol编号预分配的numpy数组保存每个频率当前bar的OHLCV，
+一次处理整批tick并同时合成多个频率；bar只在交易时间表的收盘边界由flush输出：
+
+>>> aggregator = tradetime.BarAggregator(symbols, ['1min', '5min', '30min'])
+>>> aggregator.update(symbol_ids, prices, volumes, timestamps)  # 每批tick
+>>> aggregator.next_close(now)  # 下一个收盘边界，用于设置定时器
+>>> bars = aggregator.flush(now)  # 定时器触发时输出已收盘的bar，{freq: pd.DataFrame}
+"""
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from .tradetime import time, _bar_closes, _bar_locate, _bar_offset, _to_seconds
+
+__all__ = ['BarAggregator']
+
+_FIELDS = ['bar', 'close_at', 'open', 'high', 'low', 'close', 'volume']
+
+
+class BarAggregator:
+    """多symbol、多频率的实时bar合成
+    symbols: symbol数量，或symbol列表，update使用其中的位置作为symbol编号
+    bar与bar_labels一致，时间戳归属于之后最近的bar，开盘集合竞价归属于include时的第一根bar，收盘之后的tick丢弃
+    """
+
+    def __init__(self, symbols, freqs: List[str] = None):
+        self._symbols = np.arange(symbols) if isinstance(symbols, int) else np.asarray(symbols)
+        self._freqs = list(freqs) if freqs else [time.default_freq]
+        n = len(self._symbols)
+        self._state = {freq: {
+            'bar': np.full(n, -1, dtype='int64'),
+            'close_at': np.zeros(n, dtype='int64'),
+            'open': np.zeros(n), 'high': np.zeros(n), 'low': np.zeros(n), 'close': np.zeros(n),
+            'volume': np.zeros(n),
+            'emitted': np.full(n, -1, dtype='int64'),  # 最后输出的bar
+        } for freq in self._freqs}
+        # 被之后的tick结束、等待收盘边界输出的bar
+        self._pending: Dict[str, List[Dict[str, np.ndarray]]] = {freq: [] for freq in self._freqs}
+
+    def __repr__(self):
+        return "%s(symbols=%d, freqs=%s)" % (self.__class__.__qualname__, len(self._symbols), self._freqs)
+
+    @property
+    def symbols(self) -> np.ndarray:
+        return self._symbols
+
+    @property
+    def freqs(self) -> List[str]:
+        return self._freqs
+
+    def update(self, symbol_ids, prices, volumes, timestamps):
+        """合成一批tick，同一symbol的tick按时间排序，早于当前bar或已输出bar的tick丢弃"""
+        symbol_ids = np.asarray(symbol_ids, dtype='int64')
+        prices = np.asarray(prices, dtype='float64')
+        volumes = np.asarray(volumes, dtype='float64')
+        seconds = _to_seconds(timestamps)
+        for freq in self._freqs:
+            self._update(freq, symbol_ids, prices, volumes, seconds)
+
+    def _update(self, freq, symbol_ids, prices, volumes, seconds):
+        located = _bar_locate(seconds, freq)
+        valid = located['valid'] & located['found']
+        bar = (_bar_offset(freq)[located['day_index']] + located['bar'])[valid]
+        sid, close_at, price, volume = symbol_ids[valid], located['close'][valid], prices[valid], volumes[valid]
+        state = self._state[freq]
+
+        keep = (bar >= state['bar'][sid]) & (bar > state['emitted'][sid])
+        sid, bar, close_at, price, volume = sid[keep], bar[keep], close_at[keep], price[keep], volume[keep]
+        if not len(sid):
+            return
+
+        # 按(symbol, bar)分组，组内保持tick顺序
+        order = np.lexsort((bar, sid))
+        sid, bar, close_at, price, volume = sid[order], bar[order], close_at[order], price[order], volume[order]
+        start = np.flatnonzero(np.concatenate([[True], (np.diff(sid) != 0) | (np.diff(bar) != 0)]))
+        end = np.concatenate([start[1:], [len(sid)]])
+        group = {
+            'sid': sid[start], 'bar': bar[start], 'close_at': close_at[start],
+            'open': price[start], 'high': np.maximum.reduceat(price, start), 'low': np.minimum.reduceat(price, start),
+            'close': price[end - 1], 'volume': np.add.reduceat(volume, start),
+        }
+        first = np.concatenate([[True], group['sid'][1:] != group['sid'][:-1]])
+        last = np.concatenate([group['sid'][1:] != group['sid'][:-1], [True]])
+
+        # 每个symbol第一组与当前bar相同则合并，否则当前bar结束
+        current = state['bar'][group['sid']]
+        merge = first & (current == group['bar'])
+        ids = group['sid'][merge]
+        group['open'][merge] = state['open'][ids]
+        group['high'][merge] = np.maximum(group['high'][merge], state['high'][ids])
+        group['low'][merge] = np.minimum(group['low'][merge], state['low'][ids])
+        group['volume'][merge] += state['volume'][ids]
+
+        ended = group['sid'][first & ~merge & (current >= 0)]
+        if len(ended):
+            self._pending[freq].append({'sid': ended, **{field: state[field][ended] for field in _FIELDS}})
+        if (~last).any():
+            self._pending[freq].append({field: values[~last] for field, values in group.items()})
+
+        # 每个symbol最后一组为新的当前bar
+        ids = group['sid'][last]
+        for field in _FIELDS:
+            state[field][ids] = group[field][last]
+
+    def next_close(self, now=None) -> Dict[str, np.datetime64]:
+        """每个频率now之后下一个bar收盘边界"""
+        now = _to_seconds([pd.Timestamp.now() if now is None else pd.Timestamp(now)])[0]
+        result = {}
+        for freq in self._freqs:
+            closes = _bar_closes(freq)
+            i = np.searchsorted(closes, now, side='right')
+            result[freq] = np.datetime64(int(closes[i]), 's') if i < len(closes) else np.datetime64('NaT')
+        return result
+
+    def flush(self, now=None) -> Dict[str, pd.DataFrame]:
+        """输出收盘时间不晚于now的bar，now为None时输出全部bar（如收盘后）
+        返回{freq: pd.DataFrame}，列为symbol, bar_index, bar_close, open, high, low, close, volume
+        """
+        now = np.iinfo('int64').max if now is None else _to_seconds([pd.Timestamp(now)])[0]
+        result = {}
+        for freq in self._freqs:
+            state = self._state[freq]
+            closed = np.flatnonzero((state['bar'] >= 0) & (state['close_at'] <= now))
+            chunks = self._pending[freq] + [{'sid': closed, **{field: state[field][closed] for field in _FIELDS}}]
+            state['bar'][closed] = -1
+
+            bars = {field: np.concatenate([chunk[field] for chunk in chunks]) for field in ['sid'] + _FIELDS}
+            ready = bars['close_at'] <= now
+            self._pending[freq] = [{field: values[~ready] for field, values in bars.items()}] if (~ready).any() else []
+
+            order = np.lexsort((bars['sid'][ready], bars['bar'][ready]))
+            bars = {field: values[ready][order] for field, values in bars.items()}
+            np.maximum.at(state['emitted'], bars['sid'], bars['bar'])
+            result[freq] = pd.DataFrame({
+                'symbol': self._symbols[bars['sid']],
+                'bar_index': bars['bar'],
+                'bar_close': bars['close_at'].astype('datetime64[s]').astype('datetime64[ns]'),
+                'open': bars['open'], 'high': bars['high'], 'low': bars['low'], 'close': bars['close'],
+                'volume': bars['volume'],
+            })
+        return result
@@ -0,0 +1,185 @@
+"""
+交易日规则
+
+每月第N个交易日、期权到期日（每月第三个周五）、指数调仓日等规则，在交易日历范围内一次向量化计算为
+交易日序数数组并缓存，之后二分查找查询：
+
+>>> expiry = tradetime.rules.NthWeekday(3, 4)  # 每月第三个周五，非交易日顺延
+>>> tradetime.rules.next_event('2022-06-18', expiry)
+>>> rebalance = tradetime.rules.NthWeekday(2, 4, months=[6, 12], shift=1)  # 6月和12月第二个周五的下一交易日
+>>> tradetime.rules.events('2020-01-01', '2022-12-31', rebalance)
+"""
+import abc
+from typing import List, Tuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from .tradetime import date, offset, _cache, _convert2date, _ordinal2date, _freq_date_type
+
+__all__ = ['Rule', 'NthTradingDay', 'NthWeekday', 'Union', 'next_event', 'previous_event', 'events']
+
+
+class Rule(abc.ABC):
+    """交易日规则，编译为交易日历范围内排序的交易日序数数组，按规则缓存
+    shift: 编译后再按交易日位移，超出交易日历的事件剔除
+    """
+
+    def __init__(self, shift: int = 0):
+        self._shift = shift
+
+    def __repr__(self):
+        return "%s(%s)" % (self.__class__.__qualname__, ', '.join("%s=%r" % x for x in self._params()))
+
+    def __eq__(self, other):
+        if isinstance(other, Rule):
+            return self._getstate() == other._getstate()
+        else:
+            return NotImplemented
+
+    def __hash__(self):
+        return hash(self._getstate())
+
+    def __or__(self, other):
+        if isinstance(other, Rule):
+            return Union(self, other)
+        else:
+            return NotImplemented
+
+    def _params(self) -> List[Tuple[str, object]]:
+        return [('shift', self._shift)] if self._shift else []
+
+    def _getstate(self):
+        return (self.__class__.__qualname__,) + tuple(self._params())
+
+    @abc.abstractmethod
+    def _compile(self) -> np.ndarray:
+        """交易日历范围内的事件日序数，可以未排序、重复"""
+
+    @property
+    def ordinal(self) -> np.ndarray:
+        """days since 1970-01-01 of events"""
+        if ('rule', self) not in _cache:
+            ordinal = np.unique(self._compile())
+            if self._shift:
+                shifted = offset(ordinal.astype('datetime64[D]'), self._shift, errors='coerce')
+                ordinal = shifted[~np.isnat(shifted)].view('int64')
+            _cache[('rule', self)] = ordinal
+        return _cache[('rule', self)]
+
+
+class NthTradingDay(Rule):
+    """每个周期的第n个交易日，n为负数时倒数，如NthTradingDay(-1, 'M')为每月最后一个交易日"""
+
+    def __init__(self, n: int, freq: str = 'M', shift: int = 0):
+        assert n != 0, "n can't be 0"
+        assert freq in _freq_date_type, f"{freq} is not in {_freq_date_type}"
+        super().__init__(shift)
+        self._n = n
+        self._freq = freq
+
+    def _params(self):
+        return [('n', self._n), ('freq', self._freq)] + super()._params()
+
+    def _compile(self):
+        trading = date.D.close_ordinal
+        period = np.searchsorted(date.calendars[self._freq].close_ordinal, trading)
+        i = np.arange(len(trading))
+        if self._n > 0:
+            position = i - np.searchsorted(period, period, side='left')
+            return trading[position == self._n - 1]
+        else:
+            position = np.searchsorted(period, period, side='right') - i
+            return trading[position == -self._n]
+
+
+class NthWeekday(Rule):
+    """每月第n个周几，n为负数时倒数，weekday: 0为周一
+    months: 只取这些月份，如[3, 6, 9, 12]
+    roll: 非交易日'future'顺延到下一交易日，'past'提前到上一交易日
+    """
+
+    def __init__(self, n: int, weekday: int, months: List[int] = None, roll: str = 'future', shift: int = 0):
+        assert n != 0 and -5 <= n <= 5, "n should be in [-5, -1] or [1, 5]"
+        assert 0 <= weekday <= 6, "weekday should be in [0, 6]"
+        assert roll in ['past', 'future'], "roll can only be 'past' or 'future'"
+        super().__init__(shift)
+        self._n = n
+        self._weekday = weekday
+        self._months = tuple(sorted(months)) if months else None
+        self._roll = roll
+
+    def _params(self):
+        params = [('n', self._n), ('weekday', self._weekday)]
+        params += [('months', list(self._months))] if self._months else []
+        params += [('roll', self._roll)] if self._roll != 'future' else []
+        return params + super()._params()
+
+    def _getstate(self):
+        return self.__class__.__qualname__, self._n, self._weekday, self._months, self._roll, self._shift
+
+    def _compile(self):
+        trading = date.D.close_ordinal
+        first, last = trading[[0, -1]].astype('datetime64[D]').astype('datetime64[M]').view('int64')
+        month = np.arange(first, last + 1)
+        if self._months:
+            month = month[np.isin(month % 12 + 1, self._months)]
+        month_open = month.astype('datetime64[M]').astype('datetime64[D]').view('int64')
+        month_close = (month + 1).astype('datetime64[M]').astype('datetime64[D]').view('int64') - 1
+
+        # 1970-01-01为周四
+        if self._n > 0:
+            day = month_open + (self._weekday - (month_open + 3)) % 7 + 7 * (self._n - 1)
+        else:
+            day = month_close - ((month_close + 3) - self._weekday) % 7 - 7 * (-self._n - 1)
+        day = day[(day >= month_open) & (day <= month_close)]  # 没有第5个周几的月份
+
+        if self._roll == 'future':
+            i = np.searchsorted(trading, day, side='left')
+            return trading[i[i < len(trading)]]
+        else:
+            i = np.searchsorted(trading, day, side='right') - 1
+            return trading[i[i >= 0]]
+
+
+class Union(Rule):
+    """多个规则的并集，rule1 | rule2"""
+
+    def __init__(self, *rules: Rule, shift: int = 0):
+        super().__init__(shift)
+        self._rules = tuple(rules)
+
+    def __repr__(self):
+        union = ' | '.join(repr(rule) for rule in self._rules)
+        return "%s(%s, shift=%d)" % (self.__class__.__qualname__, union, self._shift) if self._shift else union
+
+    def _getstate(self):
+        return self.__class__.__qualname__, self._rules, self._shift
+
+    def _compile(self):
+        return np.concatenate([rule.ordinal for rule in self._rules])
+
+
+def next_event(d, rule: Rule, inclusive: bool = True) -> Optional[date]:
+    """d之后最近的事件日，inclusive时包含d，超出交易日历为None"""
+    d = d if isinstance(d, date) else _convert2date(d)
+    ordinal = rule.ordinal
+    i = np.searchsorted(ordinal, d.ordinal, side='left' if inclusive else 'right')
+    return _ordinal2date(ordinal[i:i + 1], 'D')[0] if i < len(ordinal) else None
+
+
+def previous_event(d, rule: Rule, inclusive: bool = True) -> Optional[date]:
+    """d之前最近的事件日，inclusive时包含d，超出交易日历为None"""
+    d = d if isinstance(d, date) else _convert2date(d)
+    ordinal = rule.ordinal
+    i = np.searchsorted(ordinal, d.ordinal, side='right' if inclusive else 'left') - 1
+    return _ordinal2date(ordinal[i:i + 1], 'D')[0] if i >= 0 else None
+
+
+def events(start, end, rule: Rule) -> pd.Series:
+    """start到end之间的事件日"""
+    start = start if isinstance(start, date) else _convert2date(start)
+    end = end if isinstance(end, date) else _convert2date(end)
+    ordinal = rule.ordinal
+    i, j = np.searchsorted(ordinal, start.ordinal, side='left'), np.searchsorted(ordinal, end.ordinal, side='right')
+    return pd.Series(_ordinal2date(ordinal[i:j], 'D'), name='time', dtype=object)
@@ -0,0 +1,402 @@
+"""
+本地交易日历服务
+
+同一台机器上的大量进程各自计算交易日历，data.csv更新时间不同会导致版本不一致。
+由一个守护进程持有交易日历、交易时间，通过Unix domain socket以二进制协议批量查询
+close/open/offset/bars/is_trading，客户端复用连接，服务不可用时回退到进程内的交易日历：
+
+>>> tradetime.serve_calendar()  # 守护进程，data.csv更新后自动重新加载
+>>> client = tradetime.connect_calendar()  # 其他进程
+>>> client.offset(dates, 2)
+>>> client.version  # 服务端交易日历版本，回退时为None
+
+socket默认在$XDG_RUNTIME_DIR，或临时目录下当前用户的tradetime-<uid>目录，权限为0600，只有当前用户可以连接。
+服务只保证各进程的交易日历版本一致，不减少内存：客户端import tradetime时同样加载交易日历，用于回退。
+需要多进程共用一份内存时，客户端进程设置环境变量TRADETIME_SHARED，见shared.share_tables。
+
+协议：请求为头部<BBBBII>（操作，频率，if_break，标志位，数组长度，n的长度）+ int64数组，
+响应为头部<BxxxIq>（状态，长度，交易日历版本）+ int64数组或utf-8错误信息。
+"""
+import os
+import stat
+import zlib
+import queue
+import socket
+import struct
+import threading
+import tempfile
+import socketserver
+import time as _time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from .tradetime import (date, Calendar, session_states, offset, _cache, _freq_date_type, _session_freq, _to_ordinal,
+                        _IN_SESSION, __packagePath__)
+
+__all__ = ['CalendarClient', 'serve_calendar', 'connect_calendar']
+
+ENVIRON = 'TRADETIME_SERVICE'
+SOCKET_NAME = 'tradetime.sock'
+
+_REQUEST = struct.Struct('<BBBBII')
+_RESPONSE = struct.Struct('<BxxxIq')
+
+_OP_CLOSE, _OP_OPEN, _OP_OFFSET, _OP_BARS, _OP_IS_TRADING = range(5)
+_OK, _VALUE_ERROR, _INDEX_ERROR, _ERROR = range(4)
+_ERRORS = {_VALUE_ERROR: ValueError, _INDEX_ERROR: IndexError, _ERROR: RuntimeError}
+
+_FREQS = _freq_date_type + _session_freq
+_IF_BREAKS = [None, 'past', 'future']
+# 标志位
+_COERCE, _OVERFLOW, _IS_OPEN, _DATETIME = 1, 2, 4, 8
+
+
+def _runtime_dir() -> str:
+    """当前用户的运行时目录，$XDG_RUNTIME_DIR，否则为临时目录下的tradetime-<uid>"""
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        return os.environ['XDG_RUNTIME_DIR']
+    return os.path.join(tempfile.gettempdir(), f'tradetime-{os.getuid()}')
+
+
+def _socket_path(path: Optional[str]) -> str:
+    """path，环境变量TRADETIME_SERVICE，或运行时目录下的tradetime.sock"""
+    return path or os.environ.get(ENVIRON) or os.path.join(_runtime_dir(), SOCKET_NAME)
+
+
+def _check_private_dir(directory: str):
+    """创建运行时目录，必须属于当前用户且其他用户不可写"""
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    st = os.stat(directory)
+    if st.st_uid != os.getuid() or st.st_mode & 0o022:
+        raise PermissionError(f"{directory} should be owned by the current user and not writable by others")
+
+
+def _tables_version() -> int:
+    """交易日历版本，交易日序数和最后一个确认的交易日的crc32"""
+    if 'tables_version' not in _cache:
+        confirmed_end = -1 if date.confirmed_end is None else date.confirmed_end
+        _cache['tables_version'] = zlib.crc32(np.append(date.D.close_ordinal, confirmed_end).tobytes())
+    return _cache['tables_version']
+
+
+def _values_ordinal(values) -> Tuple[np.ndarray, str]:
+    """日期、日期时间或字符串（数组） -> (序数, kind)，字符串按numpy datetime64解析"""
+    values = [values] if np.ndim(values) == 0 else values
+    values = values.values if hasattr(values, 'values') else np.asarray(values)
+    if values.dtype.kind in 'US' or values.dtype.kind == 'O' and len(values) and isinstance(values[0], str):
+        values = values.astype('datetime64')
+    ordinal, kind = _to_ordinal(values)
+    assert kind != 'time', "values should be date or datetime"
+    return ordinal, kind
+
+
+def _bar_dates(days: np.ndarray, freq: str, if_break: Optional[str], flags: int, n: np.ndarray) -> np.ndarray:
+    """所属bar位移n后的close（或open）序数，NaT为int64最小值"""
+    closes = offset(days.astype('datetime64[D]'), n, freq, if_break,
+                    errors='coerce' if flags & _COERCE else 'raise').view('int64')
+    if not flags & _IS_OPEN:
+        return closes
+    calendar = date.calendars[freq]
+    valid = closes != np.iinfo('int64').min
+    index = np.searchsorted(calendar.close_ordinal, closes[valid])
+    opens = closes.copy()
+    opens[valid] = calendar.open_ordinal[index]
+    return opens
+
+
+def _execute(op: int, freq: str, if_break: Optional[str], flags: int, values: np.ndarray, n: np.ndarray) -> np.ndarray:
+    """执行一个请求，服务端和回退共用，保证结果一致"""
+    if op in (_OP_CLOSE, _OP_OPEN, _OP_OFFSET):
+        flags = flags | _IS_OPEN if op == _OP_OPEN else flags
+        return _bar_dates(values, freq, if_break, flags, n)
+    if op == _OP_BARS:
+        start, end = values.astype('datetime64[D]').tolist()
+        bars = date.bars(start, end, freq, is_open=bool(flags & _IS_OPEN), overflow=bool(flags & _OVERFLOW))
+        return _to_ordinal(bars)[0]
+    if op == _OP_IS_TRADING:
+        if flags & _DATETIME:
+            return (session_states(values.astype('datetime64[s]')) == _IN_SESSION).astype('int64')
+        trading = date.D.close_ordinal
+        index = np.searchsorted(trading, values).clip(0, len(trading) - 1)
+        return (trading[index] == values).astype('int64')
+    raise ValueError(f"Invalid op: {op}")
+
+
+def _recv(sock: socket.socket, size: int) -> Optional[bytearray]:
+    """读取size字节，对端在消息边界关闭时返回None"""
+    buffer = bytearray(size)
+    view, received = memoryview(buffer), 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if not n:
+            if received:
+                raise ConnectionError("Connection closed in the middle of a message")
+            return None
+        received += n
+    return buffer
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """一个连接上顺序处理多个请求"""
+
+    def handle(self):
+        try:
+            self._handle()
+        except ConnectionError:
+            # 客户端断开
+            pass
+
+    def _handle(self):
+        while True:
+            header = _recv(self.request, _REQUEST.size)
+            if header is None:
+                return
+            op, freq, if_break, flags, count, n_count = _REQUEST.unpack(header)
+            payload = _recv(self.request, (count + n_count) * 8) if count + n_count else b''
+            array = np.frombuffer(payload, dtype='<i8')
+            values, n = array[:count], array[count:] if n_count > 1 else int(array[count:].sum())
+            with self.server.lock:
+                try:
+                    result = _execute(op, _FREQS[freq], _IF_BREAKS[if_break], flags, values, n)
+                    status = _OK
+                except (ValueError, AssertionError) as e:
+                    result, status = str(e), _VALUE_ERROR
+                except IndexError as e:
+                    result, status = str(e), _INDEX_ERROR
+                except Exception as e:
+                    result, status = f"{e.__class__.__name__}: {e}", _ERROR
+                version = _tables_version()
+            if status == _OK:
+                body = np.ascontiguousarray(result, dtype='<i8').tobytes()
+                self.request.sendall(_RESPONSE.pack(status, len(result), version) + body)
+            else:
+                body = result.encode('utf-8')
+                self.request.sendall(_RESPONSE.pack(status, len(body), version) + body)
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, reload: Optional[float]):
+        self.lock = threading.Lock()
+        self.reload = reload
+        self._stopped = threading.Event()
+        self._mtime = os.path.getmtime(os.path.join(__packagePath__, 'data.csv'))
+        super().__init__(path, _Handler)
+        if reload:
+            threading.Thread(target=self._watch, daemon=True).start()
+
+    def server_bind(self):
+        """socket权限为0600，只有当前用户可以连接"""
+        umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+        os.chmod(self.server_address, 0o600)
+
+    def _watch(self):
+        """data.csv更新后重新加载交易日历，所有客户端同时切换到新版本"""
+        path = os.path.join(__packagePath__, 'data.csv')
+        while not self._stopped.wait(self.reload):
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            if mtime != self._mtime:
+                calendars = {freq: Calendar(freq) for freq in _freq_date_type}
+                with self.lock:
+                    date.install(calendars)
+                self._mtime = mtime
+
+    def server_close(self):
+        self._stopped.set()
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+def serve_calendar(path: str = None, reload: Optional[float] = 60.0, block: bool = True) -> '_Server':
+    """启动交易日历服务
+    path: Unix domain socket路径，默认为环境变量TRADETIME_SERVICE，或$XDG_RUNTIME_DIR（没有时为临时目录下的
+        tradetime-<uid>，权限0700）下的tradetime.sock；已存在的失效socket属于当前用户时删除，其他文件不删除
+    reload: 检查data.csv是否更新的间隔秒数，None不检查
+    block: 是否阻塞当前线程，False时在后台线程运行，返回的服务调用shutdown()和server_close()停止
+    """
+    if not (path or os.environ.get(ENVIRON)):
+        _check_private_dir(_runtime_dir())
+    path = _socket_path(path)
+    if os.path.lexists(path):
+        st = os.lstat(path)
+        if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+            raise FileExistsError(f"{path} exists and is not a socket of the current user")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(path)
+            except OSError:
+                os.unlink(path)
+            else:
+                raise OSError(f"tradetime service is already running at {path}")
+    server = _Server(path, reload)
+    if not block:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+    return server
+
+
+class CalendarClient:
+    """交易日历服务的客户端，线程安全
+    进程内仍加载交易日历用于回退，不减少内存
+    pool_size: 最多保留的空闲连接数
+    timeout: 连接、读写超时秒数
+    retry: 服务不可用后，retry秒内直接使用进程内的交易日历，不再尝试连接
+    """
+
+    def __init__(self, path: str = None, pool_size: int = 8, timeout: float = 1.0, retry: float = 5.0):
+        self._path = _socket_path(path)
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._timeout = timeout
+        self._retry = retry
+        self._down_until = 0.0
+        self._version: Optional[int] = None
+
+    def __repr__(self):
+        return "%s(path='%s', version=%s)" % (self.__class__.__qualname__, self._path, self._version)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close_pool()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def version(self) -> Optional[int]:
+        """最近一次响应的服务端交易日历版本，回退到进程内的交易日历时为None"""
+        return self._version
+
+    def close_pool(self):
+        """关闭空闲连接"""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _acquire(self) -> socket.socket:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self._timeout)
+        try:
+            sock.connect(self._path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _release(self, sock: socket.socket):
+        try:
+            self._pool.put_nowait(sock)
+        except queue.Full:
+            sock.close()
+
+    def _request(self, op: int, freq: str, if_break: Optional[str], flags: int, values: np.ndarray, n=0) -> np.ndarray:
+        values = np.ascontiguousarray(values, dtype='<i8')
+        n = np.asarray(n, dtype='<i8')
+        if _time.monotonic() >= self._down_until:
+            try:
+                return self._remote(op, freq, if_break, flags, values, n)
+            except OSError:
+                # 服务不可用（未启动、重启中或超时），回退到进程内的交易日历
+                self._down_until = _time.monotonic() + self._retry
+        self._version = None
+        return _execute(op, freq, if_break, flags, values, n if n.ndim else int(n))
+
+    def _remote(self, op, freq, if_break, flags, values: np.ndarray, n: np.ndarray) -> np.ndarray:
+        n = n.reshape(-1)
+        header = _REQUEST.pack(op, _FREQS.index(freq), _IF_BREAKS.index(if_break), flags, len(values), len(n))
+        sock = self._acquire()
+        try:
+            sock.sendall(header + values.tobytes() + n.tobytes())
+            response = _recv(sock, _RESPONSE.size)
+            if response is None:
+                raise ConnectionError("tradetime service closed the connection")
+            status, count, version = _RESPONSE.unpack(response)
+            body = _recv(sock, count * 8 if status == _OK else count) if count else b''
+        except BaseException:
+            sock.close()
+            raise
+        self._release(sock)
+        self._version = version
+        if status != _OK:
+            raise _ERRORS[status](bytes(body).decode('utf-8'))
+        return np.frombuffer(body, dtype='<i8')
+
+    def _days(self, dates) -> np.ndarray:
+        ordinal, kind = _values_ordinal(dates)
+        return ordinal // 86400 if kind == 'datetime' else ordinal
+
+    @staticmethod
+    def _check(freq: str, if_break: Optional[str], errors: str = 'raise'):
+        assert freq in _freq_date_type, f"freq can only be one of {_freq_date_type}"
+        assert if_break in _IF_BREAKS, "if_break can only be 'past', 'future' or None"
+        assert errors in ['raise', 'coerce'], "errors can only be 'raise' or 'coerce'"
+
+    def close(self, dates, freq: str = 'D', if_break: str = None, errors: str = 'raise') -> np.ndarray:
+        """批量date.close，返回datetime64[D]，errors与offset一致"""
+        self._check(freq, if_break, errors)
+        flags = _COERCE if errors == 'coerce' else 0
+        return self._request(_OP_CLOSE, freq, if_break, flags, self._days(dates)).astype('datetime64[D]')
+
+    def open(self, dates, freq: str = 'D', if_break: str = None, errors: str = 'raise') -> np.ndarray:
+        """批量date.open，返回datetime64[D]，errors与offset一致"""
+        self._check(freq, if_break, errors)
+        flags = _COERCE if errors == 'coerce' else 0
+        return self._request(_OP_OPEN, freq, if_break, flags, self._days(dates)).astype('datetime64[D]')
+
+    def offset(self, dates, n=0, freq: str = 'D', if_break: str = None, errors: str = 'raise') -> np.ndarray:
+        """与tradetime.offset一致"""
+        self._check(freq, if_break, errors)
+        flags = _COERCE if errors == 'coerce' else 0
+        days = self._days(dates)
+        n = np.asarray(n, dtype='int64')
+        n = n if n.ndim == 0 else np.broadcast_to(n, days.shape)
+        return self._request(_OP_OFFSET, freq, if_break, flags, days, n).astype('datetime64[D]')
+
+    def bars(self, start, end, freq: str = 'D', is_open: bool = False, overflow: bool = False) -> np.ndarray:
+        """与date.bars一致，返回datetime64[D]"""
+        self._check(freq, None)
+        flags = (_IS_OPEN if is_open else 0) | (_OVERFLOW if overflow else 0)
+        days = self._days([start, end])
+        return self._request(_OP_BARS, freq, None, flags, days).astype('datetime64[D]')
+
+    def is_trading(self, values) -> np.ndarray:
+        """日期为是否交易日，日期时间为是否在交易时段内，返回bool数组"""
+        ordinal, kind = _values_ordinal(values)
+        flags = _DATETIME if kind == 'datetime' else 0
+        return self._request(_OP_IS_TRADING, 'D', None, flags, ordinal).astype(bool)
+
+
+# 当前进程的默认客户端
+_clients: Dict[str, CalendarClient] = {}
+
+
+def connect_calendar(path: str = None, **kwargs) -> CalendarClient:
+    """获取path对应的客户端，同一进程内共用连接池，kwargs见CalendarClient"""
+    path = _socket_path(path)
+    if path not in _clients:
+        _clients[path] = CalendarClient(path, **kwargs)
+    return _clients[path]
@@ -0,0 +1,177 @@
+"""
+交易日历、交易时间的共享内存
+
+父进程调用share_tables将全部序数数组写入一块共享内存，子进程只需挂载，
+无需重新读取data.csv计算交易日历和交易时间：
+
+- fork子进程直接继承父进程的交易日历；
+- spawn子进程导入tradetime时，通过环境变量TRADETIME_SHARED自动挂载；
+- 也可以将SharedTables.name作为进程池initializer的参数，显式调用attach_tables。
+"""
+import re
+import os
+import json
+import multiprocessing
+from multiprocessing import shared_memory, resource_tracker
+from typing import Dict, Tuple
+
+import numpy as np
+
+from .tradetime import (Calendar, Session, Schedule, date, time, _cache, _check_time_freq, _freq_date_type,
+                        _session_freq, _set_default_segments, _time2second)
+
+ENVIRON = 'TRADETIME_SHARED'
+
+# 当前进程挂载的共享内存，保持引用避免被释放
+_attached: 'SharedTables' = None
+# 当前进程创建的共享内存名，由当前进程的resource_tracker管理
+_created = set()
+
+
+class SharedTables:
+    """共享内存中的交易日历、交易时间序数数组
+    布局：8字节头部长度 + json头部 + int64数组
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool = False):
+        self._shm = shm
+        self._owner = owner
+        header_size = int(np.frombuffer(shm.buf, dtype='int64', count=1)[0])
+        self._header = json.loads(bytes(shm.buf[8: 8 + header_size]).decode('utf-8'))
+        self._start = _data_start(header_size)
+
+    def __repr__(self):
+        return "%s(name='%s', owner=%s)" % (self.__class__.__qualname__, self.name, self._owner)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def owner(self) -> bool:
+        return self._owner
+
+    @property
+    def header(self) -> Dict:
+        return self._header
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """共享内存上的只读数组，不复制"""
+        arrays = {}
+        for key, (offset, length) in self._header['arrays'].items():
+            array = np.ndarray((length,), dtype='int64', buffer=self._shm.buf, offset=self._start + offset)
+            array.flags.writeable = False
+            arrays[key] = array
+        return arrays
+
+    def close(self):
+        """父进程释放共享内存"""
+        if self._owner:
+            if os.environ.get(ENVIRON) == self.name:
+                os.environ.pop(ENVIRON)
+            self._shm.close()
+            self._shm.unlink()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """挂载共享内存，不交由当前进程的resource_tracker管理"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # python>=3.13
+    except TypeError:
+        pass
+    # 子进程与父进程共用resource_tracker，独立进程退出时自己的resource_tracker会误删共享内存
+    shm = shared_memory.SharedMemory(name=name)
+    if multiprocessing.parent_process() is None and shm.name not in _created:
+        resource_tracker.unregister('/' + shm.name, 'shared_memory')  # POSIX共享内存按/name注册
+    return shm
+
+
+def _data_start(header_size: int) -> int:
+    return 8 + (header_size + 7) // 8 * 8
+
+
+def _collect() -> Tuple[Dict, Dict[str, np.ndarray]]:
+    arrays = {}
+    for freq, calendar in date.calendars.items():
+        arrays[f'calendar_{freq}.open_ordinal'] = calendar.open_ordinal
+        arrays[f'calendar_{freq}.close_ordinal'] = calendar.close_ordinal
+    for freq, session in time.sessions.items():
+        arrays[f'session_{freq}.open_ordinal'] = session.open_ordinal
+        arrays[f'session_{freq}.close_ordinal'] = session.close_ordinal
+    options = {
+        'date_freq': date.default_freqType, 'time_freq': time.default_freq, 'include': Session.include,
+        'confirmed_end': date.confirmed_end,
+        'rollover': _time2second(Session.rollover_time),
+        'schedules': [[schedule.segments, schedule.include] for schedule in time.schedules],
+        'schedule_rules': time.schedule_rules,
+    }
+    return options, arrays
+
+
+def share_tables(environ: bool = True) -> SharedTables:
+    """将交易日历、交易时间写入共享内存
+    environ: 是否设置环境变量TRADETIME_SHARED，spawn子进程导入时自动挂载
+    """
+    options, arrays = _collect()
+
+    # 数组偏移相对于头部之后的数据区
+    layout, offset = {}, 0
+    for key, array in arrays.items():
+        layout[key] = [offset, len(array)]
+        offset += len(array) * 8
+    header = json.dumps({**options, 'arrays': layout}).encode('utf-8')
+    start = _data_start(len(header))
+
+    shm = shared_memory.SharedMemory(create=True, size=start + max(offset, 8))
+    shm.buf[:8] = np.array([len(header)], dtype='int64').tobytes()
+    shm.buf[8: 8 + len(header)] = header
+    for key, array in arrays.items():
+        np.ndarray((len(array),), dtype='int64', buffer=shm.buf, offset=start + layout[key][0])[:] = array
+
+    _created.add(shm.name)
+    if environ:
+        os.environ[ENVIRON] = shm.name
+    return SharedTables(shm, owner=True)
+
+
+def attach_tables(name: str = None) -> SharedTables:
+    """挂载共享内存中的交易日历、交易时间，可作为进程池的initializer"""
+    global _attached
+    name = name if name else os.environ[ENVIRON]
+    if _attached is not None and _attached.name == name.lstrip('/'):
+        return _attached
+
+    tables = SharedTables(_attach(name), owner=False)
+    arrays = tables.arrays()
+    header = tables.header
+
+    date.install({
+        freq: Calendar(freq, arrays[f'calendar_{freq}.open_ordinal'], arrays[f'calendar_{freq}.close_ordinal'])
+        for freq in _freq_date_type
+    }, header['confirmed_end'])
+    # 默认交易时段（0）按父进程的设置恢复，包括夜盘和开盘集合竞价
+    _set_default_segments(header['schedules'][0][0], header['rollover'])
+    Session.include = header['include']
+    time.install({
+        freq: Session(freq, arrays[f'session_{freq}.open_ordinal'], arrays[f'session_{freq}.close_ordinal'])
+        for freq in _session_freq
+    })
+
+    # 同步父进程的默认设置
+    date.default_freqType = header['date_freq']
+    _check_time_freq(header['time_freq'])
+    time.default_freq = header['time_freq']
+    time.default_freqN = int(re.sub(u"([^\u0030-\u0039])", "", header['time_freq']))
+    time.default_freqType = re.sub(u"([^\u0041-\u007a])", "", header['time_freq'])
+    time.schedules = time.schedules[:1] + [Schedule(segments, include) for segments, include in header['schedules'][1:]]
+    time.schedule_rules = [tuple(rule) for rule in header['schedule_rules']]
+    _cache.clear()
+
+    _attached = tables
+    return tables
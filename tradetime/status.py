@@ -0,0 +1,208 @@
+"""
+证券交易状态
+
+交易日历只区分交易所的交易日，个股停牌按symbol保存为交易日序数上的停牌区间（行程编码），
+内存只与停牌区间数量相关，而不是symbol数 × 交易日数：
+
+>>> status = tradetime.SecurityStatus.from_frame(suspensions, symbol='code', date='date')
+>>> status.is_tradable(codes, dates)  # 广播
+>>> status.next_tradable(codes, dates)
+>>> status.offset(codes, dates, 5)  # 跳过停牌日位移
+"""
+import datetime as _datetime
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .tradetime import date, _to_ordinal
+
+__all__ = ['SecurityStatus']
+
+
+def _date_ordinal(dates) -> np.ndarray:
+    """日期、日期时间或日期字符串（数组） -> days since 1970-01-01"""
+    if isinstance(dates, (str, date, _datetime.date, np.datetime64)):
+        dates = [dates]
+    dates = dates.values if isinstance(dates, (pd.Series, pd.Index)) else np.asarray(dates)
+    if dates.dtype.kind in 'US':
+        dates = dates.astype('datetime64[D]')
+    ordinal, kind = _to_ordinal(dates)
+    assert kind != 'time', "dates should be date or datetime"
+    return ordinal // 86400 if kind == 'datetime' else ordinal
+
+
+def _take(values: np.ndarray, index: np.ndarray) -> np.ndarray:
+    """按位置取值，-1等无效位置由调用方屏蔽"""
+    return values[index.clip(0)] if len(values) else np.zeros(index.shape, dtype=values.dtype)
+
+
+class SecurityStatus:
+    """按symbol保存停牌区间，区间为交易日序数上的闭区间[first, last]，非交易日不计入
+    symbols: 排序的symbol数组，runs按(symbol, first)排序且同一symbol的区间互不相邻
+    """
+
+    def __init__(self, symbols, run_symbol: np.ndarray, run_first: np.ndarray, run_last: np.ndarray):
+        self._symbols = np.asarray(symbols)
+        self._run_symbol = np.asarray(run_symbol, dtype='int32')
+        self._run_first = np.asarray(run_first, dtype='int64')
+        self._run_last = np.asarray(run_last, dtype='int64')
+        # (交易日历版本, _runs)，安装新的交易日历后重新计算
+        self._cached = None
+
+    def __repr__(self):
+        return "%s(symbols=%d, runs=%d)" % (self.__class__.__qualname__, len(self._symbols), len(self._run_symbol))
+
+    def __len__(self):
+        return len(self._run_symbol)
+
+    @property
+    def symbols(self) -> np.ndarray:
+        return self._symbols
+
+    @property
+    def nbytes(self) -> int:
+        return self._symbols.nbytes + self._run_symbol.nbytes + self._run_first.nbytes + self._run_last.nbytes
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, symbol: str = 'symbol', date: str = 'date') -> 'SecurityStatus':
+        """由停牌记录生成，每行为一个symbol的一个停牌日"""
+        return cls.from_suspensions(frame[symbol].values, frame[date].values)
+
+    @classmethod
+    def from_mask(cls, mask: pd.DataFrame) -> 'SecurityStatus':
+        """由布尔DataFrame生成，index为日期，columns为symbol，True为可交易"""
+        day, column = np.nonzero(~mask.values.astype(bool))
+        return cls.from_suspensions(mask.columns.values[column], mask.index.values[day])
+
+    @classmethod
+    def from_suspensions(cls, symbols, dates) -> 'SecurityStatus':
+        """由等长的symbol、停牌日数组生成，非交易日忽略"""
+        symbols, codes = np.unique(np.asarray(symbols), return_inverse=True)
+        trading = date.D.close_ordinal
+        ordinal = _date_ordinal(dates)
+        index = np.searchsorted(trading, ordinal)
+        inside = index < len(trading)
+        inside[inside] = trading[index[inside]] == ordinal[inside]
+        codes, index = codes.reshape(-1)[inside], index[inside]
+
+        # 同一symbol连续交易日合并为一个区间
+        key = np.unique(codes.astype('int64') * (len(trading) + 1) + index)
+        codes, index = key // (len(trading) + 1), key % (len(trading) + 1)
+        start = np.flatnonzero(np.concatenate([[True], (np.diff(codes) != 0) | (np.diff(index) != 1)])[:len(key)])
+        end = np.concatenate([start[1:], [len(key)]])[:len(start)] - 1
+        return cls(symbols, codes[start], trading[index[start]], trading[index[end]])
+
+    def to_frame(self) -> pd.DataFrame:
+        """停牌区间，列为symbol, first, last"""
+        return pd.DataFrame({
+            'symbol': self._symbols[self._run_symbol],
+            'first': self._run_first.astype('datetime64[D]'),
+            'last': self._run_last.astype('datetime64[D]'),
+        })
+
+    def _runs(self) -> Dict[str, np.ndarray]:
+        """区间在当前交易日历上的位置，按symbol编号 * (交易日数 + 1) + 位置编码为排序键
+        key: 起始位置的排序键，start, stop: 起始、结束位置（不含），before: 同一symbol之前区间的停牌天数，
+        rank_key: 起始位置可交易日排名的排序键，total: 每个symbol可交易日数
+        """
+        if self._cached is None or self._cached[0] != date.generation:
+            trading = date.D.close_ordinal
+            width = len(trading) + 1
+            symbol = self._run_symbol.astype('int64')
+            start = np.searchsorted(trading, self._run_first, side='left')
+            stop = np.searchsorted(trading, self._run_last, side='right')
+            length = stop - start
+            before = np.cumsum(length) - length
+            if len(length):
+                # 同一symbol内累计
+                first_run = np.concatenate([[True], self._run_symbol[1:] != self._run_symbol[:-1]])
+                before -= np.maximum.accumulate(np.where(first_run, before, 0))
+            self._cached = date.generation, {
+                'key': symbol * width + start, 'start': start, 'stop': stop, 'before': before,
+                'rank_key': symbol * width + start - before,
+                'total': len(trading) - np.bincount(self._run_symbol, weights=length,
+                                                    minlength=len(self._symbols)).astype('int64'),
+            }
+        return self._cached[1]
+
+    def _locate(self, symbols, dates) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """返回 (symbol编号（未知symbol为-1）, 交易日位置（非交易日为之后的交易日）, 是否交易日)"""
+        symbols, ordinal = np.broadcast_arrays(np.asarray(symbols), _date_ordinal(dates))
+        trading = date.D.close_ordinal
+        code = np.searchsorted(self._symbols, symbols).clip(0, max(len(self._symbols) - 1, 0))
+        known = self._symbols[code] == symbols if len(self._symbols) else np.zeros(symbols.shape, dtype=bool)
+        index = np.searchsorted(trading, ordinal)
+        is_trading = (index < len(trading)) & (trading[index.clip(0, len(trading) - 1)] == ordinal)
+        return np.where(known, code, -1), index, is_trading
+
+    def _search(self, key: str, code: np.ndarray, value: np.ndarray, side: str) -> np.ndarray:
+        """同一symbol内排序键不大于（side='right'）或小于（side='left'）value的最后一个区间，没有为-1"""
+        width = len(date.D.close_ordinal) + 1
+        keys = self._runs()[key]
+        run = np.searchsorted(keys, code * width + value, side=side) - 1
+        same = (run >= 0) & (code >= 0)
+        same[same] = self._run_symbol[run[same]] == code[same]
+        return np.where(same, run, -1)
+
+    def _run_at(self, code: np.ndarray, index: np.ndarray) -> np.ndarray:
+        """交易日位置所在的停牌区间，不在区间内为-1"""
+        run = self._search('key', code, index, 'right')
+        inside = run >= 0
+        inside[inside] = index[inside] < self._runs()['stop'][run[inside]]
+        return np.where(inside, run, -1)
+
+    def is_tradable(self, symbols, dates) -> np.ndarray:
+        """symbols与dates广播，交易日且未停牌为True"""
+        code, index, is_trading = self._locate(symbols, dates)
+        return is_trading & (self._run_at(code, index) < 0)
+
+    def next_tradable(self, symbols, dates, inclusive: bool = True) -> np.ndarray:
+        """dates之后最近的可交易日，inclusive时包含dates，超出交易日历为NaT，返回datetime64[D]"""
+        code, index, is_trading = self._locate(symbols, dates)
+        index = index + (is_trading & (not inclusive))
+        run = self._run_at(code, index)
+        return self._index2date(np.where(run >= 0, _take(self._runs()['stop'], run), index))
+
+    def previous_tradable(self, symbols, dates, inclusive: bool = True) -> np.ndarray:
+        """dates之前最近的可交易日，inclusive时包含dates，超出交易日历为NaT，返回datetime64[D]"""
+        code, index, is_trading = self._locate(symbols, dates)
+        index = index - 1 + (is_trading & inclusive)
+        run = self._run_at(code, index)
+        return self._index2date(np.where(run >= 0, _take(self._runs()['start'], run) - 1, index))
+
+    def offset(self, symbols, dates, n=0, roll: str = 'past', errors: str = 'raise') -> np.ndarray:
+        """按symbol的可交易日位移n天，跳过停牌日，返回datetime64[D]
+        roll: dates不可交易时，'past'从之前最近的可交易日位移，'future'从之后最近的可交易日位移
+        errors: 'raise'超出交易日历时报错，'coerce'返回NaT
+        """
+        assert roll in ['past', 'future'], "roll can only be 'past' or 'future'"
+        assert errors in ['raise', 'coerce'], "errors can only be 'raise' or 'coerce'"
+        code, index, is_trading = self._locate(symbols, dates)
+        runs = self._runs()
+        start, stop, before = runs['start'], runs['stop'], runs['before']
+
+        # 可交易日排名 = 位置 - 之前的停牌天数
+        run = self._search('key', code, index, 'left')
+        suspended = _take(before, run) + np.minimum(_take(stop, run), index) - _take(start, run)
+        rank = index - np.where(run >= 0, suspended, 0)
+        tradable = is_trading & (self._run_at(code, index) < 0)
+        rank = np.where(tradable | (roll == 'future'), rank, rank - 1) + np.asarray(n, dtype='int64')
+
+        # 排名 -> 位置：加上起始排名不大于rank的区间及之前区间的停牌天数
+        run = self._search('rank_key', code, rank, 'right')
+        index = rank + np.where(run >= 0, _take(before, run) + _take(stop, run) - _take(start, run), 0)
+
+        total = np.where(code >= 0, _take(runs['total'], code), len(date.D.close_ordinal))
+        inside = (rank >= 0) & (rank < total)
+        if errors == 'raise' and not inside.all():
+            ordinal = np.broadcast_to(_date_ordinal(dates), inside.shape)
+            raise IndexError(f"{ordinal[~inside][0].astype('datetime64[D]')} is out of calendar")
+        return self._index2date(np.where(inside, index, -1))
+
+    @staticmethod
+    def _index2date(index: np.ndarray) -> np.ndarray:
+        trading = date.D.close_ordinal
+        inside = (index >= 0) & (index < len(trading))
+        result = trading[index.clip(0, len(trading) - 1)].astype('datetime64[D]')
+        return np.where(inside, result, np.datetime64('NaT'))
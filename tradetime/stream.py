@@ -0,0 +1,58 @@
+"""
+流式标记bar
+
+逐块读取大体量tick文件，每块通过预计算的交易日历、交易时间向量化标记所属bar，
+内存只与块大小相关：
+
+>>> chunks = pd.read_csv('ticks.csv', parse_dates=['time'], chunksize=1_000_000)
+>>> for frame in tradetime.stream.label_bars(chunks, '5min', on='time'):
+...     frame.groupby('bar_index').agg(...)
+"""
+from typing import Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from .tradetime import bar_labels
+
+__all__ = ['label_bars']
+
+
+def _chunk2frame(chunk, on: str = None) -> pd.DataFrame:
+    if isinstance(chunk, pd.DataFrame):
+        return chunk
+    if isinstance(chunk, pd.Series):
+        return chunk.to_frame(on if on else chunk.name if chunk.name else 'time')
+    return pd.DataFrame({on if on else 'time': np.asarray(chunk)})
+
+
+def label_bars(chunks: Iterable, freq: str = None, on: str = None, align: bool = True) -> Iterator[pd.DataFrame]:
+    """逐块标记bar，增加trading_date, bar_open, bar_close, bar_index列
+    chunks: pd.DataFrame块（如pd.read_csv(chunksize=...)），或时间戳数组块
+    on: 时间戳列，不指定则DataFrame使用DatetimeIndex，数组使用'time'列
+    align: 将每块最后一个bar的行留到下一块，输出的每块只包含完整的bar（要求时间戳有序）
+    """
+    carry = None
+    for chunk in chunks:
+        frame = _chunk2frame(chunk, on)
+        if on is None and isinstance(frame.index, pd.DatetimeIndex):
+            timestamps = frame.index
+        else:
+            timestamps = frame[on if on else 'time']
+        labels = bar_labels(timestamps, freq)
+        labels.index = frame.index
+        frame = frame.assign(**{column: labels[column] for column in labels})
+
+        if carry is not None:
+            frame = pd.concat([carry, frame])
+            carry = None
+        if align and len(frame):
+            bar_index = frame['bar_index'].to_numpy()
+            tail = bar_index[::-1] != bar_index[-1]
+            cut = len(bar_index) - int(np.argmax(tail)) if tail.any() else 0
+            frame, carry = frame.iloc[:cut], frame.iloc[cut:]
+        if len(frame):
+            yield frame
+
+    if carry is not None and len(carry):
+        yield carry
@@ -1,13 +1,14 @@
 import re
 import os
 import sys
-import bisect
+import warnings
 import importlib
 import time as _time
 import datetime as _datetime
 import calendar as _calendar
 from typing import List, Tuple, Dict, Optional, TypeVar
 
+import numpy as np
 import pandas as pd
 
 # Package Attributes
@@ -41,6 +42,31 @@ _freq_hour_type = ['H']
 _freq_minute_type = ['min', 'T']
 _freq_second_type = ['s']
 _freq_time_type = _freq_minute_type + _freq_hour_type + _freq_second_type
+# loaded session freq
+_session_freq = ['1min', '5min', '15min', '30min', '1H']
+
+# ordinal: date -> days since 1970-01-01 (numpy datetime64[D]), time -> seconds since 00:00:00
+_EPOCH_ORDINAL = _datetime.date(1970, 1, 1).toordinal()
+
+# schedule id * _SCHEDULE_KEY + seconds, 多个交易时段的bar合并查找
+_SCHEDULE_KEY = 1 << 20
+
+# 由交易日历、交易时间派生的数组缓存，重新安装时清空
+_cache: Dict = {}
+
+# 日内状态：交易中，午间休市，开盘前，收盘后，非交易日
+_IN_SESSION, _INTERNAL_BREAK, _PRE_OPEN, _POST_CLOSE, _CLOSED = range(5)
+_break_types = {_INTERNAL_BREAK: 'internal break', _PRE_OPEN: 'external break', _POST_CLOSE: 'external break'}
+
+# 交易日属性表的周期
+_period_names = {'W': 'week', 'M': 'month', 'Q': 'quarter', 'Y': 'year'}
+
+# 固定日期的节假日MM-DD，用于推算交易日历：元旦、劳动节、国庆节
+_fixed_holidays = ['01-01', '05-01', '10-01', '10-02', '10-03', '10-04', '10-05', '10-06', '10-07']
+
+# format directive -> (field, width)
+_fmt_directive = {'%Y': ('Y', 4), '%q': ('q', 1), '%m': ('m', 2), '%d': ('d', 2),
+                  '%H': ('H', 2), '%M': ('M', 2), '%S': ('S', 2)}
 
 
 def _check_time_bars(bars: int):
@@ -100,7 +126,7 @@ def _convert2date(x=None, freq=None) -> 'date':
     if isinstance(x, _datetime.time):  # 只给时间默认日期为今天
         x = _datetime.date.today()
     if isinstance(x, _datetime.date):
-        x = date(year=x.year, month=x.month, day=x.day, freq=freq, ignore=True)
+        x = date._from_ordinal(_days_from_civil(x.year, x.month, x.day), freq if freq else date.default_freqType)
     else:
         raise TypeError(f"Invalid format: '{x}'")
     return x
@@ -131,37 +157,182 @@ def _convert2time(x=None, freq=None) -> 'time':
     if isinstance(x, _datetime.date):  # 只给时间默认日期为今天
         x = _datetime.datetime.now().time()
     if isinstance(x, _datetime.time):
-        x = time(hour=x.hour, minute=x.minute, second=x.second, freq=freq, ignore=True)
+        x = time._from_ordinal(x.hour * 3600 + x.minute * 60 + x.second, freq if freq else time.default_freq)
     else:
         raise TypeError(f"Invalid format: '{x}'")
     return x
 
 
+def _ordinal2date(ordinal, freq=None) -> List['date']:
+    """transfer days since 1970-01-01 to tradetime.date objects"""
+    return [date._from_ordinal(i, freq) for i in ordinal.tolist()]
+
+
+def _ordinal2time(ordinal, freq=None) -> List['time']:
+    """transfer seconds since 00:00:00 to tradetime.time objects, 夜盘的负数秒数取当日时间"""
+    return [time._from_ordinal(i, freq) for i in (ordinal % 86400).tolist()]
+
+
+def _intern_bars(open_ordinal: np.ndarray, close_ordinal: np.ndarray, convert) -> Tuple[list, list, Dict[int, object]]:
+    """生成open、close实例，同一序数只生成一个实例，返回 (open, close, 序数 -> 实例)"""
+    close = convert(close_ordinal)
+    pool = dict(zip(close_ordinal.tolist(), close))
+    missing = np.unique(open_ordinal[~np.isin(open_ordinal, close_ordinal)])
+    pool.update(zip(missing.tolist(), convert(missing)))
+    return [pool[i] for i in open_ordinal.tolist()], close, pool
+
+
+def _days_from_civil(year, month, day):
+    """year, month, day -> days since 1970-01-01，整数运算，也适用于numpy数组"""
+    year = year - (month <= 2)
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    return era * 146097 + yoe * 365 + yoe // 4 - yoe // 100 + doy - 719468
+
+
+def _civil_from_days(ordinal):
+    """days since 1970-01-01 -> (year, month, day)，整数运算，也适用于numpy数组"""
+    ordinal = ordinal + 719468
+    era = ordinal // 146097
+    doe = ordinal - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    month = mp + 3 - 12 * (mp >= 10)
+    return yoe + era * 400 + (month <= 2), month, doy - (153 * mp + 2) // 5 + 1
+
+
+def _iso_week(ordinal):
+    """days since 1970-01-01 -> ISO周数，也适用于numpy数组"""
+    thursday = ordinal - (ordinal + 3) % 7 + 3  # 所在周的周四，1970-01-01为周四
+    year = _civil_from_days(thursday)[0]
+    return (thursday - _days_from_civil(year, 1, 1)) // 7 + 1
+
+
+def _timedelta2second(x: _datetime.timedelta) -> int:
+    return x.days * 86400 + x.seconds
+
+
+def _time2second(x) -> int:
+    """transfer time or HH:MM:SS str to seconds since 00:00:00"""
+    if isinstance(x, (int, np.integer)):
+        return int(x)
+    if isinstance(x, str):
+        x = _datetime.time.fromisoformat(x)
+    return x.hour * 3600 + x.minute * 60 + x.second
+
+
+def _second_of_day(t=None) -> int:
+    """time, datetime or HHMMSS -> seconds since 00:00:00, None为现在"""
+    if isinstance(t, time):
+        return t.ordinal
+    if t is None:
+        t = _datetime.datetime.now()
+    if isinstance(t, (_datetime.datetime, _datetime.time)):
+        return t.hour * 3600 + t.minute * 60 + t.second
+    return _convert2time(t).ordinal
+
+
+def _normalize_segments(segments) -> Tuple[Tuple[int, int], ...]:
+    """交易时段转为秒数并排序
+    Session.rollover_time之后的时间属于下一交易日，减去一天为负数，如夜盘21:00-02:30为(-10800, 9000)
+    """
+    rollover = _time2second(Session.rollover_time)
+    normalized = []
+    for open_, close_ in segments:
+        open_, close_ = _time2second(open_), _time2second(close_)
+        open_ = open_ - 86400 if open_ >= rollover else open_
+        close_ = close_ - 86400 if close_ >= rollover else close_
+        assert open_ < close_, f"Invalid segment: ({open_}, {close_})"
+        normalized.append((open_, close_))
+    return tuple(sorted(normalized))
+
+
+def _freq2second(freq: str) -> int:
+    """5min -> 300"""
+    n = int(re.sub(u"([^\u0030-\u0039])", "", freq))
+    type_ = re.sub(u"([^\u0041-\u007a])", "", freq)
+    return n * (3600 if type_ in _freq_hour_type else 60 if type_ in _freq_minute_type else 1)
+
+
+def _session_grid(freq: str, segments: List[Tuple[int, int]], include: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """按交易时段计算bar的open和close秒数
+    1min和1s频率每个时段从开盘后第一根bar开始，include时第一个时段包含开盘集合竞价bar
+    其他频率每个时段从开盘后第一个完整bar开始，时段长度不能整除时以收盘作为最后一根bar
+    """
+    step = _freq2second(freq)
+    opens, closes = [], []
+    for i, (open_, close_) in enumerate(segments):
+        if freq in ('1min', '1s') and i == 0 and include:
+            bar_close = np.arange(open_, close_ + 1, step)
+        else:
+            bar_close = np.arange(open_ + step, close_ + 1, step)
+            if not len(bar_close) or bar_close[-1] != close_:
+                bar_close = np.append(bar_close, close_)
+        bar_open = bar_close - (step - 1)
+        bar_open[0] = open_
+        opens.append(bar_open)
+        closes.append(bar_close)
+    return np.concatenate(opens).astype('int64'), np.concatenate(closes).astype('int64')
+
+
+def _pack_state(ordinal: int, freqs: List[str], freq: Optional[str], ignore: bool) -> int:
+    """pack ordinal, freq and ignore into one int, freq not in freqs is packed as 0"""
+    code = freqs.index(freq) + 1 if freq in freqs else 0
+    return (ordinal * 8 + code) * 2 + bool(ignore)
+
+
+def _unpack_state(state: int) -> Tuple[int, int, bool]:
+    return state >> 4, state >> 1 & 7, bool(state & 1)
+
+
 class _Time(_datetime.time):
     """自定义datetime.time类，增加加减功能"""
 
     def __add__(self, other: _datetime.timedelta):
         assert isinstance(other, _datetime.timedelta)
-        return (_datetime.datetime.combine(_datetime.date.today(), self) + other).time()
+        second = (_time2second(self) + _timedelta2second(other)) % 86400
+        return _Time(second // 3600, second // 60 % 60, second % 60)
 
     def __sub__(self, other: _datetime.timedelta):
         assert isinstance(other, _datetime.timedelta)
-        return (_datetime.datetime.combine(_datetime.date.today(), self) - other).time()
+        return self + -other
 
 
 class Calendar:
 
-    def __init__(self, freq):
+    def __init__(self, freq, open_ordinal=None, close_ordinal=None):
+        """open_ordinal, close_ordinal: 导入已计算的交易日历序数，不传入则从data.csv计算"""
         self._freq = freq
-        # Load Data From Anywhere, but pd.Series type.
-        calendar: pd.Series = pd.read_csv(os.path.join(__packagePath__, 'data.csv'))['time']
-        calendar = pd.to_datetime(calendar)
-        calendar.index = pd.to_datetime(calendar)
-
-        _open = calendar.resample(self._freq).first().dropna().reset_index(drop=True)
-        _close = calendar.resample(self._freq).last().dropna().reset_index(drop=True)
-        self._open = _open.apply(lambda x: date(x.year, x.month, x.day, freq=freq, ignore=True))
-        self._close = _close.apply(lambda x: date(x.year, x.month, x.day, freq=freq, ignore=True))
+        if open_ordinal is None or close_ordinal is None:
+            # Load Data From Anywhere, but pd.Series type.
+            calendar: pd.Series = pd.read_csv(os.path.join(__packagePath__, 'data.csv'))['time']
+            calendar = pd.to_datetime(calendar)
+            calendar.index = pd.to_datetime(calendar)
+
+            _open = calendar.resample(self._freq).first().dropna().reset_index(drop=True)
+            _close = calendar.resample(self._freq).last().dropna().reset_index(drop=True)
+            open_ordinal = _open.values.astype('datetime64[D]').view('int64')
+            close_ordinal = _close.values.astype('datetime64[D]').view('int64')
+
+        # 序数数组，便于向量化计算
+        self._open_ordinal = np.asarray(open_ordinal, dtype='int64')
+        self._close_ordinal = np.asarray(close_ordinal, dtype='int64')
+        # 规范实例：每个序数只有一个date实例，_from_ordinal等查找落在bar上时返回该实例
+        _open, _close, self._pool = _intern_bars(self._open_ordinal, self._close_ordinal,
+                                                 lambda x: _ordinal2date(x, freq))
+        self._open = pd.Series(_open, name='time', dtype=object)
+        self._close = pd.Series(_close, name='time', dtype=object)
+
+    def to_frame(self) -> pd.DataFrame:
+        """交易日历表：open, close, open_ordinal, close_ordinal"""
+        return pd.DataFrame({
+            'open': self._open_ordinal.astype('datetime64[D]'),
+            'close': self._close_ordinal.astype('datetime64[D]'),
+            'open_ordinal': self._open_ordinal,
+            'close_ordinal': self._close_ordinal,
+        })
 
     @property
     def open(self) -> pd.Series:
@@ -175,6 +346,16 @@ class Calendar:
     def range(self) -> Tuple[pd.Series, pd.Series]:
         return self._open, self._close
 
+    @property
+    def open_ordinal(self) -> np.ndarray:
+        """days since 1970-01-01 of open bars"""
+        return self._open_ordinal
+
+    @property
+    def close_ordinal(self) -> np.ndarray:
+        """days since 1970-01-01 of close bars"""
+        return self._close_ordinal
+
 
 class Session:
 
@@ -184,107 +365,61 @@ class Session:
     # 午盘开始和结束时间
     afternoon_open_time = _Time(hour=13, minute=0)
     afternoon_close_time = _Time(hour=15, minute=0)
+    # 夜盘开始和结束时间，可以跨越午夜，属于下一交易日，None表示没有夜盘
+    night_open_time: _Time = None
+    night_close_time: _Time = None
+    # 交易日切换时间，存在夜盘时之后的时间属于下一交易日
+    rollover_time = _Time(hour=18)
     # 是否包含开盘集合竞价
     include = True
 
-    def __init__(self, freq):
+    def __init__(self, freq, open_ordinal=None, close_ordinal=None):
+        """open_ordinal, close_ordinal: 导入已计算的交易时间序数，不传入则按交易时段计算"""
         self._freq = freq
         _check_time_freq(self._freq)
 
-        if freq == '1min':
-            if self.include:
-                morning_session = self.time_range(
-                    start=self.morning_open_time,
-                    end=self.morning_close_time,
-                    freq=freq
-                )
-            else:  # bars == 240
-                morning_session = self.time_range(
-                    start=self.morning_open_time + _datetime.timedelta(minutes=1),
-                    end=self.morning_close_time,
-                    freq=freq
-                )
-            afternoon_session = self.time_range(
-                start=self.afternoon_open_time + _datetime.timedelta(minutes=1),
-                end=self.afternoon_close_time,
-                freq=freq
-            )
-        elif freq == '1s':
-            if self.include:
-                morning_session = self.time_range(
-                    start=self.morning_open_time,
-                    end=self.morning_close_time,
-                    freq=freq
-                )
-            else:
-                self.morning_open_time + _datetime.timedelta(seconds=1)
-                morning_session = self.time_range(
-                    start=self.morning_open_time + _datetime.timedelta(seconds=1),
-                    end=self.morning_close_time,
-                    freq=freq
-                )
-            afternoon_session = self.time_range(
-                start=self.afternoon_open_time + _datetime.timedelta(seconds=1),
-                end=self.afternoon_close_time,
-                freq=freq
-            )
-        else:  # other freq type
-            morning_session = self.time_range(
-                start=self.morning_open_time,
-                end=self.morning_close_time,
-                freq=freq
-            )
-            afternoon_session = self.time_range(
-                start=self.afternoon_open_time,
-                end=self.afternoon_close_time,
-                freq=freq
-            )
-
-        # 计算Open Bar
-        freq_n = int(re.sub(u"([^\u0030-\u0039])", "", freq))
-        freq_type = re.sub(u"([^\u0041-\u007a])", "", freq)
-        if freq_type == 'min':
-            delta = (freq_n - 1) * 60 + 59
-        elif freq_type == 'H':
-            delta = (freq_n * 60 - 1) * 60 + 59
-        else:
-            raise ValueError
-
-        morning_session_open = pd.Series(morning_session).apply(lambda x: x - _datetime.timedelta(seconds=delta))
-        afternoon_session_open = pd.Series(afternoon_session).apply(lambda x: x - _datetime.timedelta(seconds=delta))
-        morning_session_open.loc[0] = self.morning_open_time
-        afternoon_session_open.loc[0] = self.afternoon_open_time
-
-        self._open = pd.Series(list(morning_session_open) + list(afternoon_session_open), name='time')
-        self._close = pd.Series(morning_session + afternoon_session, name='time')
-
-        # self._open = self._open.apply(
-        #     lambda x: "%s:%s:%s" % (str(x.hour).zfill(2), str(x.minute).zfill(2), str(x.second).zfill(2))
-        # )
-        # self._close = self._close.apply(
-        #     lambda x: "%s:%s:%s" % (str(x.hour).zfill(2), str(x.minute).zfill(2), str(x.second).zfill(2))
-        # )
-        self._open = self._open.apply(
-            lambda x: time(hour=x.hour, minute=x.minute, second=x.second, freq=self._freq, ignore=True)
-        )
-        self._close = self._close.apply(
-            lambda x: time(hour=x.hour, minute=x.minute, second=x.second, freq=self._freq, ignore=True)
-        )
+        if open_ordinal is None or close_ordinal is None:
+            open_ordinal, close_ordinal = _session_grid(freq, self.segments(), self.include)
+
+        # 序数数组，便于向量化计算
+        self._open_ordinal = np.asarray(open_ordinal, dtype='int64')
+        self._close_ordinal = np.asarray(close_ordinal, dtype='int64')
+        # 规范实例：每个时刻只有一个time实例，_from_ordinal等查找落在bar上时返回该实例
+        _open, _close, pool = _intern_bars(self._open_ordinal % 86400, self._close_ordinal % 86400,
+                                           lambda x: _ordinal2time(x, freq))
+        self._pool = pool
+        self._position = {}  # 时刻 -> 第一个close位置
+        for i, second in enumerate((self._close_ordinal % 86400).tolist()):
+            self._position.setdefault(second, i)
+        self._open = pd.Series(_open, name='time', dtype=object)
+        self._close = pd.Series(_close, name='time', dtype=object)
+        self._parents: Dict['Session', Dict[str, np.ndarray]] = {}
+
+    def to_frame(self) -> pd.DataFrame:
+        """交易时间表：open, close, open_ordinal, close_ordinal"""
+        return pd.DataFrame({
+            'open': to_strings((self._open_ordinal % 86400).astype('timedelta64[s]')),
+            'close': to_strings((self._close_ordinal % 86400).astype('timedelta64[s]')),
+            'open_ordinal': self._open_ordinal,
+            'close_ordinal': self._close_ordinal,
+        })
+
+    @classmethod
+    def segments(cls) -> List[Tuple[int, int]]:
+        """默认交易时段，秒数表示，夜盘为负数"""
+        segments = [(cls.morning_open_time, cls.morning_close_time), (cls.afternoon_open_time, cls.afternoon_close_time)]
+        if cls.night_open_time is not None:
+            segments.append((cls.night_open_time, cls.night_close_time))
+        return list(_normalize_segments(segments))
 
     @staticmethod
     def time_range(start, end, freq='1min'):
-        start = _datetime.datetime.combine(
-            _datetime.date.today(),
-            _datetime.time(hour=start.hour, minute=start.minute, second=start.second)
-        )
-        end = _datetime.datetime.combine(
-            _datetime.date.today(),
-            _datetime.time(hour=end.hour, minute=end.minute, second=end.second)
-        )
-
+        """start到end每隔freq的时间，end早于start时跨越午夜"""
+        start, end = _time2second(start), _time2second(end)
+        end = end + 86400 if end < start else end
         time_ranges = [
-            _Time(i.time().hour, i.time().minute, i.time().second)
-            for i in pd.date_range(start, end, freq=freq)
+            _Time(i // 3600 % 24, i // 60 % 60, i % 60)
+            for i in range(start, end + 1, _freq2second(freq))
         ]
 
         if freq not in ('1min', '1s'):
@@ -303,6 +438,92 @@ class Session:
     def range(self) -> Tuple[pd.Series, pd.Series]:
         return self._open, self._close
 
+    @property
+    def open_ordinal(self) -> np.ndarray:
+        """seconds since 00:00:00 of open bars"""
+        return self._open_ordinal
+
+    @property
+    def close_ordinal(self) -> np.ndarray:
+        """seconds since 00:00:00 of close bars"""
+        return self._close_ordinal
+
+    @property
+    def freq(self) -> str:
+        return self._freq
+
+    def parent_map(self, parent: 'Session') -> Dict[str, np.ndarray]:
+        """每个bar所属的更低频率bar，parent为同一交易时段更低频率的Session，与time.close(parent.freq)一致
+        parent: 所属bar的位置，position: 在所属bar中的位置，first, last: 是否所属bar的第一个、最后一个bar
+        """
+        if parent not in self._parents:
+            assert _freq2second(parent.freq) >= _freq2second(self._freq), \
+                f"{parent.freq} should be lower than {self._freq}"
+            bar = np.searchsorted(parent.close_ordinal, self._close_ordinal)
+            first = np.concatenate([[True], bar[1:] != bar[:-1]])
+            last = np.concatenate([bar[1:] != bar[:-1], [True]])
+            start = np.flatnonzero(first)
+            self._parents[parent] = {
+                'parent': bar,
+                'position': np.arange(len(bar)) - np.repeat(start, np.diff(np.append(start, len(bar)))),
+                'first': first,
+                'last': last,
+            }
+        return self._parents[parent]
+
+
+class Schedule:
+    """交易时段，不同交易日可以使用不同的交易时段，相同交易时段的交易日共享同一组bar"""
+
+    def __init__(self, segments, include: bool = None):
+        """segments: [(open, close), ...]，可以是datetime.time、'HH:MM:SS'或秒数
+        夜盘如('21:00:00', '02:30:00')跨越午夜，属于下一交易日
+        """
+        self._segments = _normalize_segments(segments)
+        self._include = Session.include if include is None else include
+        self._sessions: Dict[str, Session] = {}
+
+    def __repr__(self):
+        segments = ', '.join("('%s', '%s')" % tuple(
+            "%02d:%02d:%02d" % (x % 86400 // 3600, x // 60 % 60, x % 60) for x in segment) for segment in self._segments)
+        return "%s(segments=[%s], include=%s)" % (self.__class__.__qualname__, segments, self._include)
+
+    def __eq__(self, other):
+        if isinstance(other, Schedule):
+            return self._getstate() == other._getstate()
+        else:
+            return NotImplemented
+
+    def __hash__(self):
+        return hash(self._getstate())
+
+    def _getstate(self):
+        return self._segments, self._include
+
+    @property
+    def segments(self) -> Tuple[Tuple[int, int], ...]:
+        return self._segments
+
+    @property
+    def include(self) -> bool:
+        return self._include
+
+    @property
+    def night_close(self) -> Optional[int]:
+        """夜盘收盘秒数，没有夜盘为None"""
+        return max((close_ for open_, close_ in self._segments if open_ < 0), default=None)
+
+    @property
+    def night(self) -> bool:
+        return self.night_close is not None
+
+    def session(self, freq: str) -> Session:
+        """该交易时段对应频率的bar"""
+        if freq not in self._sessions:
+            _check_time_freq(freq)
+            self._sessions[freq] = Session(freq, *_session_grid(freq, self._segments, self._include))
+        return self._sessions[freq]
+
 
 class bardelta:
     """按bar位移"""
@@ -418,6 +639,11 @@ class date:
     calendar_open: Dict = None
     calendar_close: Dict = None
     calendar: Dict = None
+    calendars: Dict[str, Calendar] = None
+    # 最后一个确认的交易日序数，之后为推算的交易日，None表示没有推算
+    confirmed_end: int = None
+    # 交易日历版本，每次install加1，按交易日历缓存的对象据此失效
+    generation: int = 0
 
     # Operation inverse
     operation_inverse = False  # 是否允许反向运算
@@ -452,18 +678,40 @@ class date:
         return "%s(%s)" % (self.__class__.__qualname__, ', '.join(args),)
 
     def __str__(self):
-        return "%s-%s-%s" % (str(self._year).zfill(4),
-                             str(self._month).zfill(2),
-                             str(self._day).zfill(2)
-                             )
+        return "%04d-%02d-%02d" % (self._year, self._month, self._day)
+
+    @property
+    def ordinal(self) -> int:
+        """days since 1970-01-01"""
+        return _days_from_civil(self._year, self._month, self._day)
 
     @property
     def year(self):
         return self._year
 
     @property
-    def quarter(self):
-        return int((self.month - 0.5) // 3 + 1)
+    def quarter(self) -> int:
+        return (self._month - 1) // 3 + 1
+
+    @property
+    def week(self) -> int:
+        """ISO周数"""
+        return _iso_week(self.ordinal)
+
+    def trading_day_of(self, freq: str = 'M') -> Optional[int]:
+        """该周期第几个交易日，从1开始，非交易日为None"""
+        return self._attribute(f'trading_day_of_{_period_names[freq]}')
+
+    def trading_days_left(self, freq: str = 'M') -> Optional[int]:
+        """该周期之后剩余的交易日数，非交易日为None"""
+        return self._attribute(f'trading_days_left_in_{_period_names[freq]}')
+
+    def _attribute(self, column: str) -> Optional[int]:
+        trading = self.D.close_ordinal
+        i = int(np.searchsorted(trading, self.ordinal))
+        if i < len(trading) and trading[i] == self.ordinal:
+            return int(_attribute_table()[column][i])
+        return None
 
     @property
     def month(self):
@@ -481,63 +729,50 @@ class date:
     def ignore(self) -> bool:
         return self._ignore
 
+    @property
+    def projected(self) -> bool:
+        """是否在推算的交易日历中"""
+        return self.confirmed_end is not None and self.ordinal > self.confirmed_end
+
     def index(self, freq: str = None):
         freq = freq if freq else self.freq
-        if self.validate(freq):
-            return self.calendar[freq].values.tolist().index(self)
+        close_ordinal = self.calendars[freq].close_ordinal
+        i = int(np.searchsorted(close_ordinal, self.ordinal))
+        if i < len(close_ordinal) and close_ordinal[i] == self.ordinal:
+            return i
         else:
             raise ValueError(f"{self} is not in freq '{freq}'")
 
     def validate(self, freq: str = None):
         """验证是否符合该频率"""
         freq = freq if freq else self.freq
-        return self in self.calendar[freq].values
+        close_ordinal = self.calendars[freq].close_ordinal
+        i = int(np.searchsorted(close_ordinal, self.ordinal))
+        return bool(i < len(close_ordinal) and close_ordinal[i] == self.ordinal)
+
+    def _bar(self, freq: str, if_break: str = None) -> int:
+        """所属bar位置"""
+        assert if_break in ['past', 'future', None], "if_break can only be 'past', 'future' or None"
+        bar, missing = _bar_position(np.array([self.ordinal]), freq, if_break)
+        if missing[0]:
+            # 交易段间的非交易日，一定要指定if_break
+            raise ValueError("The date is external break, missing param if_break.")
+        if not 0 <= bar[0] < len(self.calendars[freq].close_ordinal):
+            raise IndexError(f"{self} is out of calendar")
+        return int(bar[0])
 
     def open(self, freq: str = None, if_break: str = None) -> 'date':
-        """必须是交易日"""
+        """所属bar的open，非交易日与close一致"""
         freq = freq if freq else self.freq
-        if self.is_trading(self):
-            i = bisect.bisect_left(self.calendar[freq], self)
-            return self.calendar_open[freq].loc[i]
-        else:
-            return self.close(freq, if_break).open(freq, if_break)
+        return self.calendar_open[freq].loc[self._bar(freq, if_break)]
 
     def close(self, freq: str = None, if_break: str = None) -> 'date':
-        """必须是交易日，如果不是交易日基于剔除未来函数的原则，寻找历史最近的一个交易日"""
-        assert if_break in ['past', 'future', None], "if_break can only be 'past', 'future' or None"
+        """必须是交易日，如果不是交易日基于剔除未来函数的原则：
+        internal break（bar内的非交易日）：None为所属bar，'past'为上一个bar，'future'为下一个bar
+        external break（bar间的非交易日）：'past'为之前最近的bar，'future'为之后最近的bar，None报错
+        """
         freq = freq if freq else self.freq
-        if self.is_trading(self):
-            i = bisect.bisect_left(self.calendar[freq], self)
-            return self.calendar_close[freq].loc[i]
-
-        # 区分属于哪种非交易日：（1）时间段内非交易日；（2）时间段间非交易日
-        else:
-            break_type = self.break_type(self, freq)
-
-        if break_type == "internal break":
-            if if_break == 'past':
-                # 自动迭代
-                return self.nearest(if_break='past').close(freq, if_break) - 1
-
-            elif if_break == 'future':
-                return self.nearest(if_break='past').close(freq, if_break) + 1  # 注意if_break不同
-
-            else:
-                return self.nearest(if_break='past').close(freq, if_break)
-
-        elif break_type == "external break":
-            if if_break == 'past':
-                return self.nearest(if_break).close(freq, if_break)
-
-            elif if_break == 'future':
-                return self.nearest(if_break).close(freq, if_break)
-
-            else:
-                # 交易段间的非交易日，一定要指定if_break
-                raise ValueError("The date is external break, missing param if_break.")
-
-        else:
-            raise ValueError("Break type error")
+        return self.calendar_close[freq].loc[self._bar(freq, if_break)]
 
     def range(self, freq: str = None, if_break: str = None):
         return self.open(freq, if_break), self.close(freq, if_break)
@@ -558,16 +793,22 @@ class date:
 
     def nearest(self, if_break: str = None):
         if self.is_break(self):
+            trading = self.D.close_ordinal
             if if_break == 'past':
-                return (self - _datetime.timedelta(days=1)).nearest(if_break)
+                i = int(np.searchsorted(trading, self.ordinal, side='right')) - 1
             elif if_break == 'future':
-                return (self + _datetime.timedelta(days=1)).nearest(if_break)
+                i = int(np.searchsorted(trading, self.ordinal, side='left'))
             else:
                 raise ValueError("The date is break, missing param if_break.")
+            if not 0 <= i < len(trading):
+                raise IndexError(f"{self} is out of calendar")
+            return _ordinal2date(trading[i:i + 1], self.freq)[0]
         else:
             return self
 
     def __eq__(self, other):
+        if other is self:
+            return True
         other = other if isinstance(other, date) else _convert2date(other)
 
         if isinstance(other, date):
@@ -609,6 +850,8 @@ class date:
 
     def _cmp(self, other):
         assert isinstance(other, date)
+        if other is self:
+            return 0
         return _cmp(self._getstate(), other._getstate())
 
     def __bool__(self):
@@ -617,15 +860,42 @@ class date:
     def _getstate(self):
         return self.year, self.month, self.day
 
+    def __reduce__(self):
+        """pickle为单个整数"""
+        state = _pack_state(self.ordinal, _freq_date_type, self._freq, self._ignore)
+        return (self._from_state, (state,)) if self._freq in _freq_date_type + [None] else \
+            (self._from_state, (state, self._freq))
+
+    @classmethod
+    def _from_state(cls, state: int, freq: str = None) -> 'date':
+        ordinal, code, ignore = _unpack_state(state)
+        return cls._from_ordinal(ordinal, _freq_date_type[code - 1] if code else freq, ignore)
+
+    @classmethod
+    def _from_ordinal(cls, ordinal: int, freq: str = None, ignore: bool = True) -> 'date':
+        """days since 1970-01-01 -> date，不经过__init__，落在交易日历bar上时返回规范实例"""
+        if ignore and cls is date and cls.calendars is not None and freq in cls.calendars:
+            self = cls.calendars[freq]._pool.get(ordinal)
+            if self is not None:
+                return self
+        self = cls.__new__(cls)
+        self._year, self._month, self._day = _civil_from_days(ordinal)
+        self._freq = freq
+        self._ignore = ignore
+        if not ignore and not self.validate(freq):
+            raise ValueError(f"{self} doesn't match freq {freq}")
+        return self
+
     def __add__(self, other):
         if isinstance(other, int):
             other = bardelta(date_bars=other, date_freq=self.freq)
         if isinstance(other, bardelta):
-            return self.calendar[other.date_freq].loc[
-                (self.index(other.date_freq) + other.date_bars) % len(self.calendar[other.date_freq])]
+            i = self.index(other.date_freq) + other.date_bars
+            if not 0 <= i < len(self.calendar[other.date_freq]):
+                raise IndexError(f"{self} + {other} is out of calendar")
+            return self.calendar[other.date_freq].loc[i]
         elif isinstance(other, _datetime.timedelta):
-            s = _datetime.date(self.year, self.month, self.day) + other
-            return date(s.year, s.month, s.day, freq=self.freq, ignore=True)
+            return self._from_ordinal(self.ordinal + other.days, self.freq)
         else:
             return NotImplemented
 
@@ -634,11 +904,12 @@ class date:
         if isinstance(other, int):
             other = bardelta(date_bars=other, date_freq=self.freq)
         if isinstance(other, bardelta):
-            return self.calendar[other.date_freq].loc[
-                (self.index(other.date_freq) - other.date_bars) % len(self.calendar[other.date_freq])]
+            i = self.index(other.date_freq) - other.date_bars
+            if not 0 <= i < len(self.calendar[other.date_freq]):
+                raise IndexError(f"{self} - {other} is out of calendar")
+            return self.calendar[other.date_freq].loc[i]
         elif isinstance(other, _datetime.timedelta):
-            s = _datetime.date(self.year, self.month, self.day) - other
-            return date(s.year, s.month, s.day, freq=self.freq, ignore=True)
+            return self._from_ordinal(self.ordinal - other.days, self.freq)
         elif isinstance(other, date):
             assert self.freq == other.freq, f"{self.freq} and {other.freq} inconsistent"
             return bardelta(date_bars=self.index() - other.index(), date_freq=self.freq)
@@ -682,12 +953,8 @@ class date:
         result = cls.bars(start_date, end_date, freq='Q', **kw_bars)
         if type_ == str:
             fmt = fmt if fmt else "(y)Q(q)"
-            return result.apply(
-                lambda x: fmt.replace(
-                    "(y)", str(x.year)
-                ).replace(
-                    "(q)", str(x.quarter)
-                ))
+            fmt = fmt.replace("(y)", "%Y").replace("(q)", "%q")
+            return pd.Series(to_strings(result, fmt), name=result.name, dtype=object)
         else:
             return result
 
@@ -715,7 +982,9 @@ class date:
         if isinstance(d, _datetime_type):
             d = _convert2date(d)
         assert isinstance(d, date)
-        return d in cls.calendar_close['D'].values.tolist()
+        origin, table = _trading_table()
+        i = d.ordinal - origin
+        return bool(0 <= i < len(table) and table[i])
 
     @classmethod
     def is_break(cls, d=None):
@@ -727,13 +996,13 @@ class date:
         d = d if isinstance(d, date) else _convert2date(d)
 
         if cls.is_break(d):
-            d_past = d_future = d
-            while cls.is_break(d_past):
-                d_past = d_past - _datetime.timedelta(days=1)
-            while cls.is_break(d_future):
-                d_future = d_future + _datetime.timedelta(days=1)
-            # 先确保是交易日
-            if d_past.close(freq) == d_future.close(freq):
+            trading, close_ordinal = cls.D.close_ordinal, cls.calendars[freq].close_ordinal
+            past = int(np.searchsorted(trading, d.ordinal, side='right')) - 1
+            future = int(np.searchsorted(trading, d.ordinal, side='left'))
+            if past < 0 or future >= len(trading):  # 交易日历之外
+                return "external break"
+            # 前后最近的交易日是否属于同一个bar
+            if np.searchsorted(close_ordinal, trading[past]) == np.searchsorted(close_ordinal, trading[future]):
                 return "internal break"
             else:
                 return "external break"
@@ -748,9 +1017,11 @@ class date:
         freq = 'M' if m else 'Q'
         m = m if m else q * 3
         d = cls(year, m, _calendar.monthrange(year, m)[-1], freq=freq, ignore=True)
-        while not cls.is_trading(d):
-            d = d - _datetime.timedelta(days=1)
-        return d
+        trading = cls.D.close_ordinal
+        i = np.searchsorted(trading, d.ordinal, side='right') - 1  # 月末之前最近的交易日
+        if i < 0:
+            raise IndexError(f"{year}-{m:02d} is before the start of calendar")
+        return _ordinal2date(trading[i:i + 1], freq)[0]
 
     @classmethod
     def get_open(cls, year=None, q=None, m=None):
@@ -761,17 +1032,28 @@ class date:
         cls.default_freqType = default_freq
 
         if cls._D is None:
-            cls._D = cls.D = Calendar('D')
-            cls._W = cls.W = Calendar('W')
-            cls._M = cls.M = Calendar('M')
-            cls._Q = cls.Q = Calendar('Q')
-            cls._Y = cls.Y = Calendar('Y')
-            # All Calendar Dict
-            cls.calendar_open = dict(
-                zip(list('DWMQY'), [cls._D.open, cls._W.open, cls._M.open, cls._Q.open, cls._Y.open]))
-            cls.calendar_close = dict(
-                zip(list('DWMQY'), [cls._D.close, cls._W.close, cls._M.close, cls._Q.close, cls._Y.close]))
-            cls.calendar = cls.calendar_close
+            cls.install({freq: Calendar(freq) for freq in _freq_date_type})
+
+    @classmethod
+    def install(cls, calendars: Dict[str, Calendar], confirmed_end: int = None):
+        """安装交易日历，calendars: {'D': Calendar, 'W': Calendar, ...}
+        confirmed_end: 最后一个确认的交易日序数，之后为推算的交易日
+        """
+        cls.confirmed_end = confirmed_end
+        cls.generation += 1
+        cls._D = cls.D = calendars['D']
+        cls._W = cls.W = calendars['W']
+        cls._M = cls.M = calendars['M']
+        cls._Q = cls.Q = calendars['Q']
+        cls._Y = cls.Y = calendars['Y']
+        # All Calendar Dict
+        cls.calendars = {freq: calendars[freq] for freq in _freq_date_type}
+        _cache.clear()
+        cls.calendar_open = dict(
+            zip(list('DWMQY'), [cls._D.open, cls._W.open, cls._M.open, cls._Q.open, cls._Y.open]))
+        cls.calendar_close = dict(
+            zip(list('DWMQY'), [cls._D.close, cls._W.close, cls._M.close, cls._Q.close, cls._Y.close]))
+        cls.calendar = cls.calendar_close
 
 
 class time:
@@ -795,6 +1077,10 @@ class time:
     session_open: Dict = None
     session_close: Dict = None
     session: Dict = None
+    sessions: Dict[str, Session] = None
+    # Session Schedule, 0为默认交易时段
+    schedules: List[Schedule] = None
+    schedule_rules: List[Tuple[int, int, int]] = []  # (start ordinal, end ordinal, schedule id)
 
     # 是否允许逆运算
     operation_inverse = False
@@ -812,7 +1098,7 @@ class time:
             self._hour = pytime.hour
             self._minute = pytime.minute
             self._second = pytime.second
-        elif hour or minute or second:
+        elif hour is not None or minute is not None or second is not None:  # time(0, 0, 0)为午夜
             self._hour = hour if hour else 0
             self._minute = minute if minute else 0
             self._second = second if second else 0
@@ -840,10 +1126,12 @@ class time:
         return "%s(%s)" % (self.__class__.__qualname__, ', '.join(args),)
 
     def __str__(self):
-        return "%s:%s:%s" % (str(self._hour).zfill(2),
-                             str(self._minute).zfill(2),
-                             str(self._second).zfill(2)
-                             )
+        return "%02d:%02d:%02d" % (self.hour, self.minute, self.second)
+
+    @property
+    def ordinal(self) -> int:
+        """seconds since 00:00:00"""
+        return self.hour * 3600 + self.minute * 60 + self.second
 
     @property
     def hour(self) -> int:
@@ -888,24 +1176,22 @@ class time:
     def index(self, freq: str = None) -> int:
         freq = freq if freq else self._freq
         if self.validate(freq):
-            return self.session[freq].values.tolist().index(self)
+            return self.sessions[freq]._position[self.ordinal]
         else:
             raise ValueError(f"{self} is not in freq '{freq}'")
 
     def validate(self, freq: str = None) -> bool:
         """time实例是否合法"""
         freq = freq if freq else self._freq
-        return self in self.session[freq].values
+        return self.ordinal in self.sessions[freq]._position
 
     def open(self, freq: str = None) -> 'time':
         freq = freq if freq else self._freq
-        i = bisect.bisect_left(self.session[freq], self)
-        return self.session_open[freq].loc[i]
+        return self.session_open[freq].loc[int(_second_bars(freq)[0, self.ordinal])]
 
     def close(self, freq: str = None) -> 'time':
         freq = freq if freq else self.freq
-        i = bisect.bisect_left(self.session[freq], self)
-        return self.session_close[freq].loc[i]
+        return self.session_close[freq].loc[int(_second_bars(freq)[0, self.ordinal])]
 
     def range(self, freq: str = None) -> Tuple['time', 'time']:
         return self.open(freq), self.close(freq)
@@ -917,6 +1203,8 @@ class time:
         return self.__str__()
 
     def __eq__(self, other):
+        if other is self:
+            return True
         if isinstance(other, _datetime_type):
             other = _datetime2time(other)
         if isinstance(other, time):
@@ -958,6 +1246,8 @@ class time:
 
     def _cmp(self, other):
         assert isinstance(other, time)
+        if other is self:
+            return 0
         return _cmp(self._getstate(), other._getstate())
 
     def __bool__(self):
@@ -966,17 +1256,43 @@ class time:
     def _getstate(self):
         return self.hour, self.minute, self.second
 
+    def __reduce__(self):
+        """pickle为单个整数"""
+        state = _pack_state(self.ordinal, _session_freq, self._freq, self._ignore)
+        return (self._from_state, (state,)) if self._freq in _session_freq + [None] else \
+            (self._from_state, (state, self._freq))
+
+    @classmethod
+    def _from_state(cls, state: int, freq: str = None) -> 'time':
+        ordinal, code, ignore = _unpack_state(state)
+        return cls._from_ordinal(ordinal, _session_freq[code - 1] if code else freq, ignore)
+
+    @classmethod
+    def _from_ordinal(cls, ordinal: int, freq: str = None, ignore: bool = True) -> 'time':
+        """seconds since 00:00:00 -> time，不经过__init__，落在交易时间bar上时返回规范实例"""
+        if ignore and cls is time and cls.sessions is not None and freq in cls.sessions:
+            self = cls.sessions[freq]._pool.get(ordinal)
+            if self is not None:
+                return self
+        self = cls.__new__(cls)
+        self._hour, self._minute, self._second = ordinal // 3600, ordinal // 60 % 60, ordinal % 60
+        self._freq = freq
+        self._ignore = ignore
+        if not ignore:
+            if cls.default_freqType in ('min', 'T'):
+                self._second = 0
+            if not self.validate(freq):
+                raise ValueError(f"{self} doesn't match freq {freq}")
+        return self
+
     def __add__(self, other, ignore=True) -> 'time':
         if isinstance(other, int):
             other = bardelta(time_bars=other)
         if isinstance(other, bardelta):
             return self.session[self.freq].loc[(self.index(freq=self.freq) + other.time_bars) % len(self.session[self.freq])]
         elif isinstance(other, _datetime.timedelta):
-            s = _datetime.datetime.combine(
-                _datetime.date.today(),
-                _datetime.time(self.hour, self.minute, self.second)
-            ) + other
-            return time(s.hour, s.minute, s.second, ignore=ignore)
+            s = (self.ordinal + _timedelta2second(other)) % 86400  # 跨越午夜取模
+            return self._from_ordinal(s, self.default_freq, ignore)
         else:
             return NotImplemented
 
@@ -986,11 +1302,8 @@ class time:
         if isinstance(other, bardelta):
             return self.session[self.freq].loc[(self.index(freq=self.freq) - other.time_bars) % len(self.session[self.freq])]
         elif isinstance(other, _datetime.timedelta):
-            s = _datetime.datetime.combine(
-                _datetime.date.today(),
-                _datetime.time(self.hour, self.minute, self.second)
-            ) - other
-            return time(s.hour, s.minute, s.second, ignore=ignore)
+            s = (self.ordinal - _timedelta2second(other)) % 86400  # 跨越午夜取模
+            return self._from_ordinal(s, self.default_freq, ignore)
         else:
             return NotImplemented
 
@@ -1028,7 +1341,7 @@ class time:
         start_id = start_time.close(freq).index(freq)
         end_id = end_time.close(freq).index(freq)
 
-        if cls.session_close[freq].loc[end_id] > end_time and not overflow:  # 可能溢出
+        if cls.sessions[freq].close_ordinal[end_id] > _session_clock(end_time.ordinal) and not overflow:  # 可能溢出
             end_id -= 1
 
         if not is_open:
@@ -1042,7 +1355,7 @@ class time:
         now_dt = _datetime.datetime.now()
         now_dt = _datetime.datetime(2022, 6, 13, 12)
         now = time(now_dt.hour, now_dt.minute, now_dt.second, freq=freq, ignore=True)
-        i = bisect.bisect_left(cls.session[freq], now)
+        i = int(np.searchsorted(cls.sessions[freq].close_ordinal, _session_clock(now.ordinal)))
         if cls.is_trading(now_dt) or if_break == 'future':
             return cls.session_close[freq].loc[i]
         else:
@@ -1067,15 +1380,8 @@ class time:
 
     @classmethod
     def is_trading(cls, t=None) -> bool:
-        if t is None:  # 没有传入时间，则默认现在
-            t = _datetime.datetime.now()
-        if isinstance(t, _anydatetime_type):
-            t = _convert2time(t)
-        assert isinstance(t, time), f'Error Type {t.__class__}'
-        return any([
-            Session.morning_open_time <= t.py_time() <= Session.morning_close_time,
-            Session.afternoon_open_time <= t.py_time() <= Session.afternoon_close_time
-        ])
+        """t为None则默认现在，按默认交易时段查表"""
+        return bool(_second_states()[0, _session_clock(_second_of_day(t)) + 86400] == _IN_SESSION)
 
     @classmethod
     def is_break(cls, t=None) -> bool:
@@ -1083,16 +1389,8 @@ class time:
 
     @classmethod
     def break_type(cls, t=None) -> str:
-        if cls.is_break(t):
-            if t is None:  # 没有传入时间，则默认现在
-                t = _datetime.datetime.now()
-            if isinstance(t, _anydatetime_type):
-                t = _convert2time(t)
-            assert isinstance(t, time)
-            if t < Session.morning_open_time or t.py_time() > Session.afternoon_close_time:
-                return 'external break'
-            if Session.morning_close_time < t.py_time() < Session.afternoon_open_time:
-                return 'internal break'
+        """交易中为None，午间休市为'internal break'，开盘前和收盘后为'external break'"""
+        return _break_types.get(int(_second_states()[0, _session_clock(_second_of_day(t)) + 86400]))
 
     @classmethod
     def set_option(cls, default_freq='1min', include=True):
@@ -1103,15 +1401,24 @@ class time:
         cls.default_freqType = re.sub(u"([^\u0041-\u007a])", "", default_freq)
 
         Session.include = include
+        cls.install({freq: Session(freq) for freq in _session_freq})
 
-        # cls._1s = Session('1s')
-        cls._1m = Session('1min')
-        cls._5m = Session('5min')
-        cls._15m = Session('15min')
-        cls._30m = Session('30min')
-        cls._1h = Session('1H')
+    @classmethod
+    def install(cls, sessions: Dict[str, Session]):
+        """安装交易时间，sessions: {'1min': Session, '5min': Session, ...}"""
+        # cls._1s = sessions['1s']
+        cls._1m = sessions['1min']
+        cls._5m = sessions['5min']
+        cls._15m = sessions['15min']
+        cls._30m = sessions['30min']
+        cls._1h = sessions['1H']
 
         # All Session Dict
+        cls.sessions = {freq: sessions[freq] for freq in _session_freq}
+        default = Schedule(Session.segments(), Session.include)
+        default._sessions.update(cls.sessions)
+        cls.schedules = [default] + (cls.schedules[1:] if cls.schedules else [])
+        _cache.clear()
         freq_list = [
             # '1s',
             '1min', '5min', '15min', '30min', '1H']
@@ -1131,7 +1438,1013 @@ class datetime(date):
 
 
 # Other Functions
-...
+def _to_ordinal(bars) -> Tuple[np.ndarray, str]:
+    """transfer bars to ordinal array, return (ordinal, kind)
+    kind 'date': days since 1970-01-01
+        pd.Series/list of tradetime.date or datetime.date, np.ndarray of datetime64[D]
+    kind 'time': seconds since 00:00:00
+        pd.Series/list of tradetime.time or datetime.time, np.ndarray of timedelta64
+    kind 'datetime': seconds since 1970-01-01 00:00:00
+        pd.Series/list of datetime.datetime, np.ndarray of datetime64
+    """
+    if isinstance(bars, (pd.Series, pd.Index)):
+        bars = bars.values
+    bars = np.asarray(bars)
+    if len(bars) == 0:
+        return np.empty(0, dtype='int64'), 'date'
+    if bars.dtype.kind == 'M':
+        if bars.dtype == np.dtype('datetime64[D]'):
+            return bars.view('int64'), 'date'
+        return bars.astype('datetime64[s]').view('int64'), 'datetime'
+    if bars.dtype.kind == 'm':
+        return bars.astype('timedelta64[s]').view('int64'), 'time'
+    if bars.dtype.kind != 'O':
+        raise TypeError(f"Invalid type: '{bars.dtype}'")
+    first = bars[0]
+    if isinstance(first, (date, time)):
+        return np.fromiter((x.ordinal for x in bars), dtype='int64', count=len(bars)), \
+               'date' if isinstance(first, date) else 'time'
+    if isinstance(first, _datetime.datetime):
+        return bars.astype('datetime64[s]').view('int64'), 'datetime'
+    if isinstance(first, _datetime.date):
+        return bars.astype('datetime64[D]').view('int64'), 'date'
+    if isinstance(first, _datetime.time):
+        return np.fromiter((x.hour * 3600 + x.minute * 60 + x.second for x in bars),
+                           dtype='int64', count=len(bars)), 'time'
+    raise TypeError(f"Invalid type: '{first.__class__}'")
+
+
+def _ordinal_fields(ordinal: np.ndarray, kind: str) -> Dict[str, np.ndarray]:
+    """split ordinal array into year, quarter, month, day, hour, minute, second arrays"""
+    if kind == 'datetime':
+        days, seconds = np.divmod(ordinal, 86400)
+        return {**_ordinal_fields(days, 'date'), **_ordinal_fields(seconds, 'time')}
+    if len(ordinal) and ordinal.max() - ordinal.min() + 1 < len(ordinal):
+        # 取值范围小于数组长度时，先对取值范围建表再索引
+        low = ordinal.min()
+        table = _ordinal_fields(np.arange(low, ordinal.max() + 1), kind)
+        return {field: values[ordinal - low] for field, values in table.items()}
+
+    fields = {}
+    if kind == 'date':
+        months = ordinal.astype('datetime64[D]').astype('datetime64[M]').view('int64')
+        fields['Y'] = months // 12 + 1970
+        fields['m'] = months % 12 + 1
+        fields['q'] = (fields['m'] - 1) // 3 + 1
+        fields['d'] = ordinal - months.astype('datetime64[M]').astype('datetime64[D]').view('int64') + 1
+    else:
+        fields['H'] = ordinal // 3600
+        fields['M'] = ordinal // 60 % 60
+        fields['S'] = ordinal % 60
+    return fields
+
+
+def _format_ordinal(ordinal: np.ndarray, kind: str, fmt: str) -> np.ndarray:
+    """format ordinal array into fixed width str array"""
+    if kind != 'datetime' and len(ordinal) and ordinal.max() - ordinal.min() + 1 < len(ordinal):
+        # 取值范围小于数组长度时，先格式化取值范围再索引
+        low = ordinal.min()
+        return _format_ordinal(np.arange(low, ordinal.max() + 1), kind, fmt)[ordinal - low]
+
+    fields = _ordinal_fields(ordinal, kind)
+    parts = [part for part in re.split('(%[YqmdHMS])', fmt) if part]
+    width = sum(_fmt_directive[part][1] if part in _fmt_directive else len(part) for part in parts)
+    if not width:
+        return np.full(len(ordinal), '', dtype='U1')
+
+    # 按unicode码位逐列填充定长字符串
+    buffer = np.empty((len(ordinal), width), dtype='uint32')
+    column = 0
+    for part in parts:
+        if part in _fmt_directive:
+            field, n = _fmt_directive[part]
+            if field not in fields:
+                raise ValueError(f"'{part}' is not supported by {kind} bars")
+            value = fields[field]
+            for i in range(column + n - 1, column - 1, -1):
+                value, digit = np.divmod(value, 10)
+                buffer[:, i] = digit + 48
+            column += n
+        else:
+            buffer[:, column: column + len(part)] = [ord(c) for c in part]
+            column += len(part)
+    return buffer.view(f'U{width}').ravel()
+
+
+def _ymd2ordinal(year: np.ndarray, month: np.ndarray, day: np.ndarray) -> np.ndarray:
+    """year, month, day arrays to days since 1970-01-01, invalid date raise ValueError"""
+    months = (year - 1970) * 12 + month - 1
+    month_open = months.astype('datetime64[M]').astype('datetime64[D]').view('int64')
+    month_days = (months + 1).astype('datetime64[M]').astype('datetime64[D]').view('int64') - month_open
+    invalid = (month < 1) | (month > 12) | (day < 1) | (day > month_days)
+    if invalid.any():
+        i = int(np.argmax(invalid))
+        raise ValueError(f"Invalid date: {year[i]}-{month[i]}-{day[i]}")
+    return month_open + day - 1
+
+
+def _str2codes(values: np.ndarray) -> np.ndarray:
+    """str array to (n, width) unicode code point matrix, padded with 0"""
+    values = values.astype('U')
+    width = max(values.dtype.itemsize // 4, 1)
+    return np.ascontiguousarray(values).view('uint32').reshape(len(values), width)
+
+
+def _codes2fields(codes: np.ndarray, fmt: str) -> Optional[List[np.ndarray]]:
+    """cut code point matrix into integer fields by fmt like 'YYYY-MM-DD', return None if not match
+    Y, M, D, h, m, s, q are digits, other characters are literals
+    """
+    if codes.shape[1] != len(fmt):
+        return None
+    fields = {}
+    for i, c in enumerate(fmt):
+        if c in 'YMDhmsq':
+            fields.setdefault(c, []).append(i)
+        elif not (codes[:, i] == ord(c)).all():
+            return None
+    digits = codes[:, [i for columns in fields.values() for i in columns]].astype('int64') - 48
+    if ((digits < 0) | (digits > 9)).any():
+        return None
+    result, column = [], 0
+    for columns in fields.values():
+        result.append(digits[:, column: column + len(columns)] @ 10 ** np.arange(len(columns) - 1, -1, -1))
+        column += len(columns)
+    return result
+
+
+def to_strings(bars, fmt: str = None) -> np.ndarray:
+    """批量格式化交易日期、交易时间
+    fmt: %Y, %q, %m, %d, %H, %M, %S, like '%Y-%m-%d', '%Y%m%d', '%YQ%q', '%H:%M:%S'
+    """
+    ordinal, kind = _to_ordinal(bars)
+    if fmt is None:
+        fmt = {'date': '%Y-%m-%d', 'time': '%H:%M:%S', 'datetime': '%Y-%m-%d %H:%M:%S'}[kind]
+    return _format_ordinal(ordinal, kind, fmt)
+
+
+def to_ints(bars) -> np.ndarray:
+    """批量转为整数，date: YYYYMMDD, time: HHMMSS, datetime: YYYYMMDDHHMMSS"""
+    ordinal, kind = _to_ordinal(bars)
+    fields = _ordinal_fields(ordinal, kind)
+    result = np.zeros(len(ordinal), dtype='int64')
+    if kind in ('date', 'datetime'):
+        result += fields['Y'] * 10000 + fields['m'] * 100 + fields['d']
+    if kind in ('time', 'datetime'):
+        result = result * 1000000 + fields['H'] * 10000 + fields['M'] * 100 + fields['S']
+    return result
+
+
+def parse_dates(values) -> np.ndarray:
+    """批量解析交易日期，返回datetime64[D]
+    int: YYYYMMDD
+    str: YYYYMMDD, YYYY-MM-DD or quarter label YYYYQn (close bar of the quarter)
+    """
+    if isinstance(values, (pd.Series, pd.Index)):
+        values = values.values
+    values = np.asarray(values)
+    if values.dtype.kind in 'iu':
+        year, month_day = np.divmod(values.astype('int64'), 10000)
+        month, day = np.divmod(month_day, 100)
+        return _ymd2ordinal(year, month, day).astype('datetime64[D]')
+    if len(values) == 0:
+        return np.empty(0, dtype='datetime64[D]')
+    codes = _str2codes(values)
+
+    fields = _codes2fields(codes, 'YYYYMMDD') or _codes2fields(codes, 'YYYY-MM-DD')
+    if fields is not None:
+        return _ymd2ordinal(*fields).astype('datetime64[D]')
+
+    quarters = _codes2fields(np.where(codes == ord('q'), ord('Q'), codes), 'YYYYQq')
+    if quarters is not None:
+        key = quarters[0] * 4 + quarters[1] - 1
+        fields = _ordinal_fields(date.Q.close_ordinal, 'date')
+        calendar_key = fields['Y'] * 4 + fields['q'] - 1
+        i = np.searchsorted(calendar_key, key).clip(0, len(calendar_key) - 1)
+        if (calendar_key[i] != key).any():
+            raise ValueError(f"Invalid quarter: '{values[np.argmax(calendar_key[i] != key)]}'")
+        return date.Q.close_ordinal[i].astype('datetime64[D]')
+
+    # 其他格式交由pandas解析
+    return pd.to_datetime(values).values.astype('datetime64[D]')
+
+
+def parse_times(values) -> np.ndarray:
+    """批量解析交易时间，返回timedelta64[s]
+    int: HHMMSS
+    str: HHMMSS or HH:MM:SS，格式不统一时按组解析，也支持H:MM:SS、H:MM，无法解析时报错
+    """
+    if isinstance(values, (pd.Series, pd.Index)):
+        values = values.values
+    values = np.asarray(values)
+    if values.dtype.kind in 'iu':
+        hour, minute_second = np.divmod(values.astype('int64'), 10000)
+        minute, second = np.divmod(minute_second, 100)
+    else:
+        if len(values) == 0:
+            return np.empty(0, dtype='timedelta64[s]')
+        codes = _str2codes(values)
+        fields = _codes2fields(codes, 'hhmmss') or _codes2fields(codes, 'hh:mm:ss')
+        if fields is None:
+            return _parse_mixed_times(values)
+        hour, minute, second = fields
+    return _hms2seconds(hour, minute, second).astype('timedelta64[s]')
+
+
+def _hms2seconds(hour: np.ndarray, minute: np.ndarray, second: np.ndarray) -> np.ndarray:
+    invalid = (hour > 23) | (minute > 59) | (second > 59) | (hour < 0) | (minute < 0) | (second < 0)
+    if invalid.any():
+        i = int(np.argmax(invalid))
+        raise ValueError(f"Invalid time: {hour[i]}:{minute[i]}:{second[i]}")
+    return hour * 3600 + minute * 60 + second
+
+
+def _parse_mixed_times(values: np.ndarray) -> np.ndarray:
+    """格式不统一的时间字符串按长度分组解析，每组为HHMMSS或HH:MM:SS，其他以':'分隔的格式（如H:MM:SS、H:MM）逐个解析
+    空字符串为NaT，无法解析或不在一天之内报错，不返回错误的秒数
+    """
+    values = np.char.strip(values.astype('U'))
+    lengths = np.char.str_len(values)
+    result = np.full(len(values), np.iinfo('int64').min)
+    for length in np.unique(lengths[lengths > 0]):
+        group = lengths == length
+        part = values[group].astype(f'U{length}')
+        codes = _str2codes(part)
+        fields = _codes2fields(codes, 'hhmmss') or _codes2fields(codes, 'hh:mm:ss')
+        if fields is None:
+            fields = np.array([_split_time(value) for value in part]).T
+        result[group] = _hms2seconds(*fields)
+    return result.view('timedelta64[s]')
+
+
+def _split_time(value: str) -> tuple:
+    fields = value.split(':')
+    if len(fields) not in (2, 3) or not all(field.isdigit() and len(field) <= 2 for field in fields):
+        raise ValueError(f"Invalid time: '{value}'")
+    return tuple(int(field) for field in fields) + (0,) * (3 - len(fields))
+
+
+def add_timedelta(values, offsets) -> np.ndarray:
+    """批量加减timedelta，values与offsets广播
+    values: 日期、时间或日期时间数组，也可以是单个值
+    offsets: timedelta64、datetime.timedelta数组或秒数
+    日期按天数取整返回datetime64[D]，时间跨越午夜取模返回timedelta64[s]，日期时间返回datetime64[ns]
+    """
+    if isinstance(values, (date, time, *_datetime_type)):
+        values = [values]
+    ordinal, kind = _to_ordinal(values)
+    if isinstance(offsets, (pd.Series, pd.Index)):
+        offsets = offsets.values
+    offsets = np.asarray(offsets)
+    seconds = offsets.astype('timedelta64[s]').view('int64') if offsets.dtype.kind in 'mO' else offsets.astype('int64')
+
+    if kind == 'date':
+        return (ordinal + seconds // 86400).astype('datetime64[D]')
+    if kind == 'time':
+        return ((ordinal + seconds) % 86400).astype('timedelta64[s]')
+    return (ordinal + seconds).astype('datetime64[s]').astype('datetime64[ns]')
+
+
+def _bar_position(ordinal: np.ndarray, freq: str, if_break: str = None) -> Tuple[np.ndarray, np.ndarray]:
+    """日期 -> 所属bar位置，非交易日与date.close的if_break规则一致
+    返回 (位置, 是否需要指定if_break)，超出交易日历的位置为-1或len
+    """
+    trading = date.D.close_ordinal
+    close_ordinal = date.calendars[freq].close_ordinal
+    past = np.searchsorted(trading, ordinal, side='right') - 1
+    future = np.searchsorted(trading, ordinal, side='left')
+    bar_past = np.where(past >= 0, np.searchsorted(close_ordinal, trading[past.clip(0)]), -1)
+    bar_future = np.where(future < len(trading),
+                          np.searchsorted(close_ordinal, trading[future.clip(0, len(trading) - 1)]), len(close_ordinal))
+    is_trading = (future < len(trading)) & (trading[future.clip(0, len(trading) - 1)] == ordinal)
+    internal = bar_past == bar_future  # 交易日或bar内的非交易日
+
+    if if_break == 'past':
+        return np.where(is_trading | ~internal, bar_past, bar_past - 1), np.zeros(len(ordinal), dtype=bool)
+    if if_break == 'future':
+        return np.where(is_trading, bar_future, np.where(internal, bar_past + 1, bar_future)), \
+            np.zeros(len(ordinal), dtype=bool)
+    return np.where(future < len(trading), bar_past, len(close_ordinal)), \
+        ~internal & (past >= 0) & (future < len(trading))
+
+
+def offset(dates, n=0, freq: str = 'D', if_break: str = None, errors: str = 'raise') -> np.ndarray:
+    """批量按交易日历位移，如T+n交割日，返回datetime64[D]
+    dates: 非交易日与date.close的if_break规则一致，先取所属bar
+    n: 位移bar数，可以是与dates等长的数组
+    errors: 'raise'超出交易日历或缺少if_break时报错，'coerce'返回NaT
+    """
+    assert if_break in ['past', 'future', None], "if_break can only be 'past', 'future' or None"
+    assert errors in ['raise', 'coerce'], "errors can only be 'raise' or 'coerce'"
+    ordinal, kind = _to_ordinal(dates)
+    assert kind != 'time', "dates should be date or datetime"
+    ordinal = ordinal // 86400 if kind == 'datetime' else ordinal
+
+    close_ordinal = date.calendars[freq].close_ordinal
+    bar, missing = _bar_position(ordinal, freq, if_break)
+    bar = bar + np.asarray(n, dtype='int64')
+    inside = (bar >= 0) & (bar < len(close_ordinal))
+    if errors == 'raise':
+        if missing.any():
+            raise ValueError(f"{ordinal[missing][0].astype('datetime64[D]')} is external break, missing param if_break.")
+        if not inside.all():
+            raise IndexError(f"{ordinal[~inside][0].astype('datetime64[D]')} is out of calendar")
+    result = close_ordinal[bar.clip(0, len(close_ordinal) - 1)].astype('datetime64[D]')
+    return np.where(inside & ~missing, result, np.datetime64('NaT'))
+
+
+def _trading_table() -> Tuple[int, np.ndarray]:
+    """交易日历首尾之间每个自然日是否交易日，返回 (首日序数, 表)"""
+    if 'trading_table' not in _cache:
+        trading = date.D.close_ordinal
+        table = np.zeros(trading[-1] - trading[0] + 1, dtype=bool)
+        table[trading - trading[0]] = True
+        _cache['trading_table'] = int(trading[0]), table
+    return _cache['trading_table']
+
+
+def _calendar_ordinals(trading: np.ndarray, freq: str) -> Tuple[np.ndarray, np.ndarray]:
+    """交易日 -> 该频率每个bar的open和close交易日，与pandas resample一致，周为周一至周日"""
+    if freq == 'D':
+        return trading, trading
+    if freq == 'W':
+        key = (trading + 3) // 7  # 1970-01-01为周四
+    else:
+        key = trading.astype('datetime64[D]').astype('datetime64[M]').view('int64') // {'M': 1, 'Q': 3, 'Y': 12}[freq]
+    edges = np.flatnonzero(np.diff(key)) + 1
+    return trading[np.concatenate([[0], edges])], trading[np.concatenate([edges - 1, [len(trading) - 1]])]
+
+
+def extend_calendar(end, holidays: List[str] = None):
+    """将交易日历推算到end，推算的交易日为工作日剔除固定日期的节假日，标记为projected
+    holidays: 'MM-DD'列表，默认为元旦、劳动节、国庆节
+    end早于最后一个确认的交易日时取消推算
+    """
+    trading = date.D.close_ordinal
+    confirmed_end = date.confirmed_end if date.confirmed_end is not None else int(trading[-1])
+    trading = trading[trading <= confirmed_end]
+
+    days = np.arange(confirmed_end + 1, _convert2date(end).ordinal + 1)
+    fields = _ordinal_fields(days, 'date')
+    holidays = _fixed_holidays if holidays is None else holidays
+    holiday = np.isin(fields['m'] * 100 + fields['d'], [int(x.replace('-', '')) for x in holidays])
+    projected = days[((days + 3) % 7 < 5) & ~holiday]
+
+    trading = np.concatenate([trading, projected])
+    date.install({freq: Calendar(freq, *_calendar_ordinals(trading, freq)) for freq in _freq_date_type},
+                 confirmed_end if len(projected) else None)
+
+
+def is_projected(dates) -> np.ndarray:
+    """批量判断日期是否在推算的交易日历中"""
+    ordinal, kind = _to_ordinal(dates)
+    ordinal = ordinal // 86400 if kind == 'datetime' else ordinal
+    return ordinal > date.confirmed_end if date.confirmed_end is not None else np.zeros(len(ordinal), dtype=bool)
+
+
+def set_schedule(segments, start=None, end=None, include: bool = None) -> Schedule:
+    """设置一段日期的交易时段，start, end为None表示不限，之后的设置覆盖之前的设置
+    segments: [(open, close), ...]，可以是datetime.time、'HH:MM:SS'或秒数
+    """
+    schedule = Schedule(segments, include)
+    if schedule not in time.schedules:
+        time.schedules.append(schedule)
+    start = _convert2date(start).ordinal if start is not None else np.iinfo('int64').min
+    end = _convert2date(end).ordinal if end is not None else np.iinfo('int64').max
+    time.schedule_rules.append((start, end, time.schedules.index(schedule)))
+    _cache.clear()
+    return time.schedules[time.schedules.index(schedule)]
+
+
+def _apply_schedule_rules(ordinal: np.ndarray) -> np.ndarray:
+    ids = np.zeros(len(ordinal), dtype='int64')
+    for start, end, i in time.schedule_rules:
+        ids[(ordinal >= start) & (ordinal <= end)] = i
+    return ids
+
+
+def _schedule_ids(ordinal: np.ndarray) -> np.ndarray:
+    """days since 1970-01-01 -> schedule id, 交易日历范围内查表"""
+    if not time.schedule_rules:
+        return np.zeros(len(ordinal), dtype='int64')
+    if 'schedule_id' not in _cache:
+        trading = date.D.close_ordinal
+        _cache['schedule_id'] = trading[0], _apply_schedule_rules(np.arange(trading[0], trading[-1] + 1))
+    origin, table = _cache['schedule_id']
+    i = ordinal - origin
+    inside = (i >= 0) & (i < len(table))
+    if inside.all():
+        return table[i]
+    return np.where(inside, table[i.clip(0, len(table) - 1)], _apply_schedule_rules(ordinal))
+
+
+def schedule_ids(dates) -> np.ndarray:
+    """批量获取日期的交易时段编号，对应time.schedules"""
+    ordinal, kind = _to_ordinal(dates)
+    return _schedule_ids(ordinal // 86400 if kind == 'datetime' else ordinal)
+
+
+def get_schedule(d=None) -> Schedule:
+    """日期的交易时段"""
+    d = d if isinstance(d, date) else _convert2date(d)
+    return time.schedules[int(_schedule_ids(np.array([d.ordinal]))[0])]
+
+
+def _second2time(second: int) -> _Time:
+    second = int(second) % 86400
+    return _Time(second // 3600, second // 60 % 60, second % 60)
+
+
+def _set_default_segments(segments, rollover: int):
+    """由规范化的交易时段恢复默认交易时段的设置，导入、挂载时使用，之后time.install按此生成默认交易时段
+    segments: 上午、下午两个时段，以及可选的夜盘（开盘为负数）
+    """
+    night = [segment for segment in segments if segment[0] < 0]
+    day = [segment for segment in segments if segment[0] >= 0]
+    assert len(day) == 2 and len(night) <= 1, f"Invalid default segments: {segments}"
+    Session.rollover_time = _second2time(rollover)
+    (Session.morning_open_time, Session.morning_close_time), (Session.afternoon_open_time, Session.afternoon_close_time) = \
+        [(_second2time(open_), _second2time(close_)) for open_, close_ in day]
+    Session.night_open_time, Session.night_close_time = \
+        (_second2time(night[0][0]), _second2time(night[0][1])) if night else (None, None)
+
+
+def _rollovers() -> np.ndarray:
+    """每个交易时段交易日切换的秒数，有夜盘为Session.rollover_time，没有夜盘为86400（不切换）"""
+    if 'rollover' not in _cache:
+        rollover = _time2second(Session.rollover_time)
+        _cache['rollover'] = np.array([rollover if schedule.night else 86400 for schedule in time.schedules])
+    return _cache['rollover']
+
+
+def _session_clock(second, schedule=0):
+    """seconds since 00:00:00 -> 交易时段内的秒数，交易日切换之后属于下一交易日，为负数
+    schedule: 交易时段编号，可以是数组，只有有夜盘的交易时段切换交易日
+    """
+    return second - (second >= _rollovers()[schedule]) * 86400
+
+
+def _schedule_grid(freq: str) -> Dict[str, np.ndarray]:
+    """全部交易时段bar合并后的数组，key为schedule id * _SCHEDULE_KEY + close秒数"""
+    if ('grid', freq) not in _cache:
+        sessions = [schedule.session(freq) for schedule in time.schedules]
+        length = np.array([len(session.close_ordinal) for session in sessions])
+        _cache[('grid', freq)] = {
+            'start': np.concatenate([[0], np.cumsum(length)[:-1]]),
+            'length': length,
+            'key': np.concatenate([i * _SCHEDULE_KEY + x.close_ordinal for i, x in enumerate(sessions)]),
+            'open': np.concatenate([session.open_ordinal for session in sessions]),
+            'close': np.concatenate([session.close_ordinal for session in sessions]),
+            # 夜盘bar，发生在上一交易日的晚上
+            'night': np.concatenate([
+                session.close_ordinal <= (schedule.night_close if schedule.night else np.iinfo('int64').min)
+                for schedule, session in zip(time.schedules, sessions)]),
+        }
+    return _cache[('grid', freq)]
+
+
+def _bar_offset(freq: str) -> np.ndarray:
+    """每个交易日第一根bar的全局位置，长度为交易日数 + 1"""
+    if ('offset', freq) not in _cache:
+        length = _schedule_grid(freq)['length'][_schedule_ids(date.D.close_ordinal)]
+        _cache[('offset', freq)] = np.concatenate([[0], np.cumsum(length)])
+    return _cache[('offset', freq)]
+
+
+def _second_states() -> np.ndarray:
+    """每个交易时段的日内状态，shape (交易时段数, 2 * 86400)，按交易时段内的秒数 + 86400查表（夜盘为负数），
+    seconds since 00:00:00先经_session_clock转换
+    """
+    if 'states' not in _cache:
+        clock = np.arange(-86400, 86400)
+        states = np.empty((len(time.schedules), len(clock)), dtype='uint8')
+        for i, schedule in enumerate(time.schedules):
+            segments = np.array(schedule.segments)
+            j = (np.searchsorted(segments[:, 0], clock, side='right') - 1).clip(0)
+            states[i] = np.select(
+                [(clock >= segments[j, 0]) & (clock <= segments[j, 1]), clock < segments[0, 0], clock > segments[-1, 1]],
+                [_IN_SESSION, _PRE_OPEN, _POST_CLOSE], _INTERNAL_BREAK)
+        _cache['states'] = states
+    return _cache['states']
+
+
+def _second_bars(freq: str) -> np.ndarray:
+    """每个交易时段每秒所属的日内bar位置，与time.close一致，收盘之后为-1，shape (交易时段数, 86400)"""
+    if ('second_bars', freq) not in _cache:
+        bars = np.empty((len(time.schedules), 86400), dtype='int32')
+        for i, schedule in enumerate(time.schedules):
+            clock = _session_clock(np.arange(86400), i)
+            close_ordinal = schedule.session(freq).close_ordinal
+            bar = np.searchsorted(close_ordinal, clock)
+            bars[i] = np.where(bar < len(close_ordinal), bar, -1)
+        _cache[('second_bars', freq)] = bars
+    return _cache[('second_bars', freq)]
+
+
+def _session_locate(ordinal: np.ndarray, second: np.ndarray, freq: str) -> Tuple[np.ndarray, ...]:
+    """定位日内bar，与time.close一致，归属于之后最近的bar
+    second为交易时段内的秒数，夜盘为负数
+    返回 (日内位置, open秒数, close秒数, 是否在收盘之前, 是否夜盘bar)
+    """
+    grid = _schedule_grid(freq)
+    i = _schedule_ids(ordinal)
+    start, end = grid['start'][i], grid['start'][i] + grid['length'][i]
+    position = np.searchsorted(grid['key'], i * _SCHEDULE_KEY + second)
+    found = position < end
+    position = np.minimum(position, end - 1)
+    return position - start, grid['open'][position], grid['close'][position], found, grid['night'][position]
+
+
+def _night_anchor(day_index: np.ndarray, night: np.ndarray) -> np.ndarray:
+    """bar所在的自然日，夜盘bar从上一交易日的次日零点起算"""
+    trading = date.D.close_ordinal
+    previous = np.where(day_index > 0, trading[day_index - 1], trading[0] - 1)
+    return np.where(night, previous + 1, trading[day_index])
+
+
+def _bar_locate(seconds: np.ndarray, freq: str) -> Dict[str, np.ndarray]:
+    """定位时间戳所属的交易日和日内bar
+    下一交易日有夜盘时，交易日切换时间之后的时间戳属于下一交易日，夜盘之后的凌晨跨越非交易日时同样属于下一交易日，
+    再由bar还原时间戳校验，过滤非交易日及没有夜盘的晚上
+    """
+    trading = date.D.close_ordinal
+    days, second = np.divmod(seconds, 86400)
+    following = np.searchsorted(trading, days + 1)
+    following = np.where(following < len(trading), trading[following.clip(0, len(trading) - 1)], days + 1)
+    clock = _session_clock(second, _schedule_ids(following))
+    day_index = np.searchsorted(trading, days + (second - clock) // 86400)
+    inside = day_index < len(trading)
+    day_index = day_index.clip(0, len(trading) - 1)
+
+    bar, bar_open, bar_close, found, night = _session_locate(trading[day_index], clock, freq)
+    anchor = _night_anchor(day_index, night) * 86400
+    return {
+        'day_index': day_index, 'bar': bar, 'found': found,
+        'open': anchor + bar_open, 'close': anchor + bar_close,
+        'clock': clock, 'valid': inside & (anchor + clock == seconds),
+    }
+
+
+def _to_seconds(timestamps) -> np.ndarray:
+    """transfer timestamps to seconds since 1970-01-01 00:00:00, NaT is int64 min"""
+    if isinstance(timestamps, (pd.Series, pd.Index)):
+        timestamps = timestamps.values
+    timestamps = np.asarray(timestamps)
+    if timestamps.dtype.kind != 'M':
+        timestamps = pd.to_datetime(timestamps).values
+    seconds = timestamps.astype('datetime64[s]').view('int64')
+    return np.where(np.isnat(timestamps), np.iinfo('int64').min, seconds)
+
+
+def bar_labels(timestamps, freq: str = None) -> pd.DataFrame:
+    """批量标记时间戳所属bar
+    trading_date: 交易日期，非交易日为NaT
+    bar_open, bar_close: 所属bar的开始和结束，日期频率为日期，时间频率为日期时间
+    bar_index: 所属bar的位置，时间频率为之前交易日的bar总数 + 日内位置，不属于任何bar为-1
+    时间频率与time.close一致，时间戳归属于之后最近的bar，收盘之后不属于任何bar
+    下一交易日有夜盘时，交易日切换时间之后的时间戳属于下一交易日
+    """
+    freq = freq if freq else time.default_freq
+    seconds = _to_seconds(timestamps)
+
+    located = _bar_locate(seconds, '1min' if freq in _freq_date_type else freq)
+    valid = located['valid']
+    days = date.D.close_ordinal[located['day_index']]
+
+    if freq in _freq_date_type:
+        calendar = date.calendars[freq]
+        bar = np.searchsorted(calendar.close_ordinal, days).clip(0, len(calendar.close_ordinal) - 1)
+        bar_open = calendar.open_ordinal[bar] * 86400
+        bar_close = calendar.close_ordinal[bar] * 86400
+    else:
+        valid &= located['found']
+        bar_open, bar_close = located['open'], located['close']
+        bar = _bar_offset(freq)[located['day_index']] + located['bar']
+
+    nat = np.datetime64('NaT')
+    return pd.DataFrame({
+        'trading_date': np.where(valid, days.astype('datetime64[D]'), nat).astype('datetime64[ns]'),
+        'bar_open': np.where(valid, bar_open.astype('datetime64[s]'), nat).astype('datetime64[ns]'),
+        'bar_close': np.where(valid, bar_close.astype('datetime64[s]'), nat).astype('datetime64[ns]'),
+        'bar_index': np.where(valid, bar, -1),
+    })
+
+
+def bar_timestamps(bar_index, freq: str = None, is_open: bool = False) -> np.ndarray:
+    """bar_labels的逆运算，bar_index -> bar的close（或open）时间戳，超出交易日历为NaT
+    bar_index可以直接加减做跨交易日、跨夜盘的bar位移
+    """
+    freq = freq if freq else time.default_freq
+    valid, day_index, position = _bar_rows(np.asarray(bar_index, dtype='int64'), freq)
+    grid = _schedule_grid(freq)
+    seconds = _night_anchor(day_index, grid['night'][position]) * 86400 + grid['open' if is_open else 'close'][position]
+    return np.where(valid, seconds.astype('datetime64[s]'), np.datetime64('NaT')).astype('datetime64[ns]')
+
+
+def _bar_rows(bar_index: np.ndarray, freq: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """bar_index -> (是否在交易日历内, 交易日位置, _schedule_grid中的位置)，超出交易日历的位置为0"""
+    offset = _bar_offset(freq)
+    valid = (bar_index >= 0) & (bar_index < offset[-1])
+    day_index = (np.searchsorted(offset, bar_index, side='right') - 1).clip(0, len(offset) - 2)
+    position = _schedule_grid(freq)['start'][_schedule_ids(date.D.close_ordinal[day_index])] + \
+        (bar_index - offset[day_index])
+    return valid, day_index, np.where(valid, position, 0)
+
+
+def parent_bars(bar_index, freq: str, parent_freq: str) -> pd.DataFrame:
+    """bar_labels的bar_index -> 同一交易日更低频率bar的bar_index，与time.close(parent_freq)一致
+    parent_index: 所属bar的位置，超出交易日历为-1
+    position: 在所属bar中的位置，is_first, is_last: 是否所属bar的第一个、最后一个bar
+    """
+    valid, day_index, row = _bar_rows(np.asarray(bar_index, dtype='int64'), freq)
+    table = _parent_table(freq, parent_freq)
+    return pd.DataFrame({
+        'parent_index': np.where(valid, _bar_offset(parent_freq)[day_index] + table['parent'][row], -1),
+        'position': np.where(valid, table['position'][row], -1),
+        'is_first': valid & table['first'][row],
+        'is_last': valid & table['last'][row],
+    })
+
+
+def _parent_table(freq: str, parent_freq: str) -> Dict[str, np.ndarray]:
+    """全部交易时段的Session.parent_map按_schedule_grid顺序合并"""
+    if ('parent', freq, parent_freq) not in _cache:
+        maps = [schedule.session(freq).parent_map(schedule.session(parent_freq)) for schedule in time.schedules]
+        _cache[('parent', freq, parent_freq)] = {key: np.concatenate([x[key] for x in maps]) for key in maps[0]}
+    return _cache[('parent', freq, parent_freq)]
+
+
+def bar_grid(start, end, time_freq: str = None, date_freq: str = 'D', is_open: bool = False) -> pd.DatetimeIndex:
+    """start到end之间每个交易日全部bar的close（或open）时间戳
+    date_freq: 取该频率的交易日历，如'M'为每月最后一个交易日
+    按每个交易日的交易时段，将交易日序数与日内秒数广播相加
+    """
+    time_freq = time_freq if time_freq else time.default_freq
+    start = start if isinstance(start, date) else _convert2date(start)
+    end = end if isinstance(end, date) else _convert2date(end)
+    days = date.calendars[date_freq].close_ordinal
+    days = days[(days >= start.ordinal) & (days <= end.ordinal)]
+    seconds = _grid_seconds(days, time_freq, is_open)
+    return pd.DatetimeIndex(seconds.astype('datetime64[s]').astype('datetime64[ns]'), name='time')
+
+
+def _grid_seconds(days: np.ndarray, freq: str, is_open: bool = False) -> np.ndarray:
+    """交易日全部bar的close（或open）秒数，seconds since 1970-01-01 00:00:00"""
+    grid = _schedule_grid(freq)
+    schedule = _schedule_ids(days)
+    length = grid['length'][schedule]
+    day = np.repeat(np.arange(len(days)), length)
+    position = grid['start'][schedule][day] + np.arange(len(day)) - np.repeat(np.cumsum(length) - length, length)
+
+    day_index = np.searchsorted(date.D.close_ordinal, days)[day]
+    return _night_anchor(day_index, grid['night'][position]) * 86400 + grid['open' if is_open else 'close'][position]
+
+
+def _bar_closes(freq: str) -> np.ndarray:
+    """全部交易日bar的close秒数，位置即bar_labels的bar_index"""
+    if ('bar_closes', freq) not in _cache:
+        _cache[('bar_closes', freq)] = _grid_seconds(date.D.close_ordinal, freq)
+    return _cache[('bar_closes', freq)]
+
+
+def asof_align(events: pd.DataFrame, on: str = None, freq: str = 'D', lag_bars: int = 1,
+               bars: pd.DataFrame = None, by=None) -> pd.DataFrame:
+    """事件按时点对齐到交易bar，从事件所属bar之后第lag_bars根bar起可用
+    所属bar：时间频率与bar_labels一致，休市时为之后最近的bar；日期频率与date.close(if_break='future')一致
+    on: 事件时间列，不指定则使用DatetimeIndex
+    返回events增加available_bar（可用bar位置，超出交易日历为-1）和available（可用bar的close）列
+    bars: 以bar时间为索引的pd.DataFrame，指定时返回bars合并每根bar最近可用的事件，by为分组列
+    """
+    timestamps = events.index if on is None else events[on]
+    seconds = _to_seconds(timestamps)
+    nat = seconds == np.iinfo('int64').min
+
+    if freq in _freq_date_type:
+        close_ordinal = date.calendars[freq].close_ordinal
+        bar, _ = _bar_position(seconds // 86400, freq, 'future')
+        closes = close_ordinal * 86400
+    else:
+        closes = _bar_closes(freq)
+        bar = np.searchsorted(closes, seconds)
+    bar = bar + lag_bars
+    valid = ~nat & (bar >= 0) & (bar < len(closes))
+    available = closes[bar.clip(0, len(closes) - 1)].astype('datetime64[s]')
+    events = events.assign(
+        available_bar=np.where(valid, bar, -1),
+        available=np.where(valid, available, np.datetime64('NaT')).astype('datetime64[ns]'),
+    )
+    if bars is None:
+        return events
+
+    events = events[valid].sort_values('available', kind='stable').set_index('available', drop=False)
+    return pd.merge_asof(bars.sort_index(), events, left_index=True, right_index=True, by=by, direction='backward')
+
+
+def _bar_span(start, end, freq: str) -> Tuple[int, int, np.ndarray]:
+    """start到end之间bar的首尾位置，与date.bars一致，返回 (首位置, 尾位置 + 1, 全部bar的close)"""
+    if freq in _freq_date_type:
+        closes = date.calendars[freq].close_ordinal
+        start = (start if isinstance(start, date) else _convert2date(start)).ordinal
+        end = (end if isinstance(end, date) else _convert2date(end)).ordinal
+    else:
+        closes = _bar_closes(freq)
+        start, end = _bar_seconds(start), _bar_seconds(end)
+    return int(np.searchsorted(closes, start, side='left')), int(np.searchsorted(closes, end, side='right')), closes
+
+
+def _bar_seconds(x) -> int:
+    """时间频率的端点转为seconds since 1970-01-01，int (YYYYMMDD)与date为当天00:00:00，其他交由pandas"""
+    if isinstance(x, (int, np.integer)):
+        x = _convert2date(int(x))
+    if isinstance(x, date):
+        return x.ordinal * 86400
+    return int(_to_seconds([pd.Timestamp(x)])[0])
+
+
+def rolling_windows(start, end, window: int, freq: str = 'D', step: int = 1, origin=None) -> Tuple[np.ndarray, np.ndarray]:
+    """start到end之间每根bar结束的滚动窗口，返回切片位置 (starts, stops)，values[starts[i]: stops[i]]为第i个窗口
+    window: 窗口包含的bar数，时间频率可以跨交易日
+    origin: values第一个元素对应的bar时间，默认为start，早于origin的部分截断，窗口长度为stops - starts；
+        origin晚于start时，结束在origin之前的窗口为空，starts, stops均为0
+    """
+    first, stop, closes = _bar_span(start, end, freq)
+    base = first if origin is None else _bar_span(origin, origin, freq)[0]
+    stops = (np.arange(first, stop, step) + 1 - base).clip(0)
+    return (stops - window).clip(0), stops
+
+
+def session_states(values) -> np.ndarray:
+    """批量获取日内状态：0交易中，1午间休市，2开盘前，3收盘后，4非交易日
+    values: 时间戳按所属交易日的交易时段计算，seconds since 00:00:00的整数按默认交易时段计算
+    """
+    values = np.asarray(values.values if isinstance(values, (pd.Series, pd.Index)) else values)
+    if values.dtype.kind in 'iu':
+        return _second_states()[0, _session_clock(values) + 86400]
+    seconds = _to_seconds(values)
+    located = _bar_locate(seconds, '1min')
+    schedule = _schedule_ids(date.D.close_ordinal[located['day_index']])
+    states = _second_states()[schedule, located['clock'] + 86400]
+    return np.where(located['valid'], states, _CLOSED).astype('uint8')
+
+
+def _time_seconds(values) -> np.ndarray:
+    """日内时间数组 -> seconds since 00:00:00
+    str、int（HHMMSS）、datetime.time、tradetime.time或timedelta64
+    """
+    values = np.asarray(values.values if isinstance(values, (pd.Series, pd.Index)) else values)
+    if values.dtype.kind in 'iuUS' or values.dtype.kind == 'O' and len(values) and isinstance(values[0], str):
+        return parse_times(values).view('int64')
+    ordinal, kind = _to_ordinal(values)
+    assert kind == 'time', "values should be time"
+    return ordinal
+
+
+def slice_schedule(start, end, freq: str = None, profile=None) -> pd.DataFrame:
+    """将母单按bar切分为子单，start, end广播，每个母单取收盘时间在(start, end]内的bar
+    profile: 成交量分布，bar权重，pd.Series的index为bar的close时间，或与time.sessions[freq].close对齐的数组；
+        不指定则等权，没有权重的bar为0，全部为0的母单等权
+    返回按母单、bar排序的pd.DataFrame：order（母单位置），bar_index, bar_open, bar_close, weight（每个母单合计为1）
+    """
+    freq = freq if freq else time.default_freq
+    start, end = np.broadcast_arrays(_to_seconds(np.atleast_1d(start)), _to_seconds(np.atleast_1d(end)))
+    closes = _bar_closes(freq)
+    first = np.searchsorted(closes, start, side='right')
+    count = (np.searchsorted(closes, end, side='right') - first).clip(0)
+    count[(start == np.iinfo('int64').min) | (end == np.iinfo('int64').min)] = 0
+
+    order = np.repeat(np.arange(len(count)), count)
+    bar = np.repeat(first, count) + np.arange(len(order)) - np.repeat(np.cumsum(count) - count, count)
+    _, day_index, position = _bar_rows(bar, freq)
+    grid = _schedule_grid(freq)
+
+    if profile is None:
+        weight = np.ones(len(bar))
+    else:
+        if isinstance(profile, pd.Series):
+            clock, values = _session_clock(_time_seconds(profile.index)), profile.values
+        else:
+            clock, values = time.sessions[freq].close_ordinal, np.asarray(profile)
+        assert len(clock) == len(values), "profile should be aligned with session close"
+        sorter = np.argsort(clock, kind='stable')
+        clock, values = clock[sorter], values[sorter].astype('float64')
+        i = np.searchsorted(clock, grid['close'][position]).clip(0, max(len(clock) - 1, 0))
+        weight = np.where(clock[i] == grid['close'][position], values[i], 0.) if len(clock) else np.zeros(len(bar))
+    total = np.bincount(order, weights=weight, minlength=len(count))
+    weight = np.where(total[order] > 0, weight / np.where(total > 0, total, 1)[order], 1 / count[order].clip(1))
+
+    anchor = _night_anchor(day_index, grid['night'][position]) * 86400
+    return pd.DataFrame({
+        'order': order,
+        'bar_index': bar,
+        'bar_open': (anchor + grid['open'][position]).astype('datetime64[s]').astype('datetime64[ns]'),
+        'bar_close': closes[bar].astype('datetime64[s]').astype('datetime64[ns]'),
+        'weight': weight,
+    })
+
+
+def _segment_table() -> Dict[str, np.ndarray]:
+    """全部交易日的交易时段，open, close为seconds since 1970-01-01 00:00:00，
+    before为该时段之前的累计交易秒数，多一个元素为全部交易秒数
+    """
+    if 'segments' not in _cache:
+        segments = [np.array(schedule.segments, dtype='int64').reshape(-1, 2) for schedule in time.schedules]
+        length = np.array([len(x) for x in segments])
+        table = np.concatenate(segments)
+        start = np.concatenate([[0], np.cumsum(length)[:-1]])
+
+        schedule = _schedule_ids(date.D.close_ordinal)
+        count = length[schedule]
+        day_index = np.repeat(np.arange(len(schedule)), count)
+        row = start[schedule][day_index] + np.arange(len(day_index)) - np.repeat(np.cumsum(count) - count, count)
+        days = _night_anchor(day_index, table[row, 0] < 0)
+        open_, close_ = days * 86400 + table[row, 0], days * 86400 + table[row, 1]
+        _cache['segments'] = {
+            'open': open_, 'close': close_, 'before': np.concatenate([[0], np.cumsum(close_ - open_)]),
+        }
+    return _cache['segments']
+
+
+def _trading_seconds(seconds: np.ndarray) -> np.ndarray:
+    """交易日历起点到seconds的累计交易秒数"""
+    table = _segment_table()
+    i = np.searchsorted(table['open'], seconds, side='right') - 1
+    j = i.clip(0)
+    elapsed = (seconds - table['open'][j]).clip(0, table['close'][j] - table['open'][j])
+    return np.where(i >= 0, table['before'][j] + elapsed, 0)
+
+
+def trading_duration(start, end, unit: str = 's', freq: str = None):
+    """start到end之间的交易时长，剔除午间休市、隔夜和非交易日，end早于start时为负数
+    start, end: 时间戳或时间戳数组，广播
+    unit: 's'秒数，'min'分钟数，'H'小时数，'bars'为start之后到end收盘的freq bar数
+    任一为NaT时结果为NaN
+    """
+    assert unit in ['s', 'min', 'H', 'bars'], "unit can only be 's', 'min', 'H' or 'bars'"
+    scalar = np.ndim(start) == 0 and np.ndim(end) == 0
+    start, end = np.broadcast_arrays(_to_seconds(np.atleast_1d(start)), _to_seconds(np.atleast_1d(end)))
+    nat = (start == np.iinfo('int64').min) | (end == np.iinfo('int64').min)
+
+    if unit == 'bars':
+        closes = _bar_closes(freq if freq else time.default_freq)
+        result = np.searchsorted(closes, end, side='right') - np.searchsorted(closes, start, side='right')
+    else:
+        result = _trading_seconds(end) - _trading_seconds(start)
+        if unit != 's':
+            result = result / (60 if unit == 'min' else 3600)
+    if nat.any():
+        result = np.where(nat, np.nan, result)
+    return result[0] if scalar else result
+
+
+def _attribute_table() -> Dict[str, np.ndarray]:
+    """交易日属性表，与date.D.close_ordinal对齐
+    trading_day_of_{period}: 所在周期第几个交易日，trading_days_left_in_{period}: 之后剩余的交易日数
+    周期与交易日历一致，周为周一至周日
+    """
+    if 'attributes' not in _cache:
+        trading = date.D.close_ordinal
+        year, month, _ = _civil_from_days(trading)
+        table = {'ordinal': trading, 'year': year, 'quarter': (month - 1) // 3 + 1, 'month': month,
+                 'week': _iso_week(trading)}
+        i = np.arange(len(trading))
+        for freq, name in _period_names.items():
+            period = np.searchsorted(date.calendars[freq].close_ordinal, trading)
+            table[f'trading_day_of_{name}'] = i - np.searchsorted(period, period, side='left') + 1
+            table[f'trading_days_left_in_{name}'] = np.searchsorted(period, period, side='right') - 1 - i
+        _cache['attributes'] = table
+    return _cache['attributes']
+
+
+def calendar_attributes(dates=None) -> pd.DataFrame:
+    """交易日属性表：ordinal, year, quarter, month, week（ISO周数），
+    trading_day_of_{week, month, quarter, year}: 所在周期第几个交易日，从1开始
+    trading_days_left_in_{week, month, quarter, year}: 所在周期之后剩余的交易日数
+    dates: 不指定则为全部交易日，指定则按日期批量取值，非交易日的交易日属性为-1
+    """
+    table = _attribute_table()
+    if dates is None:
+        return pd.DataFrame({'date': table['ordinal'].astype('datetime64[D]'), **table})
+
+    ordinal, kind = _to_ordinal(dates)
+    assert kind != 'time', "dates should be date or datetime"
+    ordinal = ordinal // 86400 if kind == 'datetime' else ordinal
+    trading = date.D.close_ordinal
+    i = np.searchsorted(trading, ordinal).clip(0, len(trading) - 1)
+    is_trading = trading[i] == ordinal
+    year, month, _ = _civil_from_days(ordinal)
+    result = {'date': ordinal.astype('datetime64[D]'), 'ordinal': ordinal, 'year': year,
+              'quarter': (month - 1) // 3 + 1, 'month': month, 'week': _iso_week(ordinal)}
+    for column in list(table)[5:]:
+        result[column] = np.where(is_trading, table[column][i], -1)
+    return pd.DataFrame(result)
+
+
+def _day_table() -> pd.DataFrame:
+    """自然日表，覆盖交易日历首尾之间的每个自然日
+    {freq}: 所属bar位置，非交易日为之后最近的bar
+    {freq}_break: 0为交易日，1为internal break，2为external break
+    schedule: 交易时段编号，对应time.schedules
+    projected: 是否在推算的交易日历中
+    """
+    trading = date.D.close_ordinal
+    ordinal = np.arange(trading[0], trading[-1] + 1)
+    past = trading[np.searchsorted(trading, ordinal, side='right') - 1]  # 最近的历史交易日
+    future = trading[np.searchsorted(trading, ordinal, side='left')]  # 最近的未来交易日
+    is_trading = future == ordinal
+
+    table = {'date': ordinal.astype('datetime64[D]'), 'ordinal': ordinal, 'is_trading': is_trading,
+             'projected': is_projected(ordinal.astype('datetime64[D]')), 'schedule': _schedule_ids(ordinal)}
+    for freq, calendar in date.calendars.items():
+        bar_past = np.searchsorted(calendar.close_ordinal, past, side='left')
+        bar_future = np.searchsorted(calendar.close_ordinal, future, side='left')
+        table[freq] = bar_future
+        table[f'{freq}_break'] = np.where(is_trading, 0, np.where(bar_past == bar_future, 1, 2)).astype('int8')
+    return pd.DataFrame(table)
+
+
+# Tables
+def _tables_fmt(path, fmt: str = None) -> str:
+    fmt = fmt if fmt else 'npz' if str(path).endswith('.npz') else 'parquet'
+    assert fmt in ['npz', 'parquet'], "fmt can only be 'npz' or 'parquet'"
+    return fmt
+
+
+def export_tables(path, fmt: str = None):
+    """导出交易日历、交易时间及自然日表
+    fmt: 'npz'为单个文件，'parquet'为目录，默认按后缀判断
+    """
+    tables = {f'calendar_{freq}': calendar.to_frame() for freq, calendar in date.calendars.items()}
+    tables.update({f'session_{freq}': session.to_frame() for freq, session in time.sessions.items()})
+    tables['days'] = _day_table()
+    tables['schedules'] = pd.DataFrame(
+        [(i, open_, close_, schedule.include)
+         for i, schedule in enumerate(time.schedules) for open_, close_ in schedule.segments],
+        columns=['schedule', 'open_ordinal', 'close_ordinal', 'include'])
+    tables['options'] = pd.DataFrame({'rollover': [_time2second(Session.rollover_time)], 'include': [Session.include]})
+
+    if _tables_fmt(path, fmt) == 'npz':
+        arrays = {}
+        for name, frame in tables.items():
+            for column in frame:
+                values = frame[column].to_numpy()
+                arrays[f'{name}.{column}'] = values.astype('U') if values.dtype == object else values
+        np.savez(path, **arrays)
+    else:
+        os.makedirs(path, exist_ok=True)
+        for name, frame in tables.items():
+            frame.to_parquet(os.path.join(path, f'{name}.parquet'), index=False)
+
+
+def _read_tables(path, fmt: str = None) -> Dict[str, pd.DataFrame]:
+    if _tables_fmt(path, fmt) == 'npz':
+        with np.load(path) as data:
+            columns = {}
+            for key in data.files:
+                name, column = key.split('.', 1)
+                columns.setdefault(name, {})[column] = data[key]
+        return {name: pd.DataFrame(frame) for name, frame in columns.items()}
+    else:
+        return {name[:-len('.parquet')]: pd.read_parquet(os.path.join(path, name))
+                for name in os.listdir(path) if name.endswith('.parquet')}
+
+
+def import_tables(path, fmt: str = None):
+    """导入export_tables导出的交易日历、交易时间及交易时段，无需重新计算"""
+    tables = _read_tables(path, fmt)
+    days = tables['days']
+    confirmed = days['ordinal'][days['is_trading'] & ~days['projected']] if 'projected' in days else None
+    date.install({
+        freq: Calendar(freq, tables[f'calendar_{freq}']['open_ordinal'], tables[f'calendar_{freq}']['close_ordinal'])
+        for freq in _freq_date_type
+    }, int(confirmed.max()) if confirmed is not None and days['projected'].any() else None)
+
+    # 默认交易时段（0）按导出的设置恢复，包括夜盘和开盘集合竞价
+    schedules = tables.get('schedules')
+    if schedules is not None:
+        rollover = int(tables['options']['rollover'].iloc[0]) if 'options' in tables else \
+            _time2second(Session.rollover_time)
+        default = schedules[schedules['schedule'] == 0]
+        _set_default_segments(list(zip(default['open_ordinal'].tolist(), default['close_ordinal'].tolist())), rollover)
+        Session.include = bool(tables['options']['include'].iloc[0]) if 'options' in tables else \
+            bool(default['include'].iloc[0])
+    time.install({
+        freq: Session(freq, tables[f'session_{freq}']['open_ordinal'], tables[f'session_{freq}']['close_ordinal'])
+        for freq in _session_freq
+    })
+
+    if schedules is not None:
+        time.schedules = time.schedules[:1] + [
+            Schedule(zip(group['open_ordinal'], group['close_ordinal']), bool(group['include'].iloc[0]))
+            for i, group in schedules[schedules['schedule'] > 0].groupby('schedule')
+        ]
+        # 按自然日表中连续相同的交易时段恢复设置
+        ordinal, ids = days['ordinal'].to_numpy(), days['schedule'].to_numpy()
+        edges = np.flatnonzero(np.diff(ids)) + 1
+        time.schedule_rules = [
+            (int(ordinal[start]), int(ordinal[end - 1]), int(ids[start]))
+            for start, end in zip(np.concatenate([[0], edges]), np.concatenate([edges, [len(ids)]]))
+            if ids[start]
+        ]
+        _cache.clear()
 
 
 # Settings
@@ -1159,7 +2472,21 @@ def update():
     print(f"[{_datetime.datetime.now().isoformat(sep=' ', timespec='seconds')}] @ TradeTime is updated.")
 
 
+def _load_tables():
+    """导入时加载交易日历、交易时间"""
+    if os.environ.get('TRADETIME_SHARED'):
+        # 挂载父进程共享的交易日历、交易时间
+        from .shared import attach_tables
+        try:
+            attach_tables(os.environ['TRADETIME_SHARED'])
+            return
+        except FileNotFoundError:
+            # 共享内存已被释放（父进程已退出），重新计算
+            warnings.warn(f"Shared tables {os.environ['TRADETIME_SHARED']} not found, loading from data.csv")
+    set_date()
+    set_time()
+
+
 # Default Settings
-set_date()
-set_time()
+_load_tables()
 set_operation_inverse()
\ No newline at end of file